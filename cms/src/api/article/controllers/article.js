@@ -6,7 +6,121 @@
 
 const { createCoreController } = require('@strapi/strapi').factories;
 
+// Most articles accepted by one bulk request
+const BULK_MAX_ARTICLES = 100;
+
+// Most articles per page of /articles/content
+const CONTENT_MAX_PAGE_SIZE = 100;
+
+// Where entries of each collection can be used, for /articles/references
+const REFERENCE_FIELDS = {
+  media: [
+    ['articles', 'api::article.article', 'featuredImage'],
+    ['articles', 'api::article.article', 'gallery'],
+    ['authors', 'api::author.author', 'profilePicture'],
+  ],
+  authors: [['articles', 'api::article.article', 'author']],
+  categories: [['articles', 'api::article.article', 'categories']],
+  tags: [['articles', 'api::article.article', 'tags']],
+};
+
 module.exports = createCoreController('api::article.article', ({ strapi }) => ({
+  async bulkCreate(ctx) {
+    const { data } = ctx.request.body || {};
+
+    if (!Array.isArray(data) || data.length === 0) {
+      return ctx.badRequest('Expected a non-empty "data" array of articles');
+    }
+    if (data.length > BULK_MAX_ARTICLES) {
+      return ctx.badRequest(`At most ${BULK_MAX_ARTICLES} articles per request`);
+    }
+    if (data.some(article => !article || typeof article !== 'object' || Array.isArray(article))) {
+      return ctx.badRequest('Every article must be an object');
+    }
+
+    // Creates every article (and its new categories/tags) or none of them
+    const { articles, created } = await strapi.service('api::article.article').bulkCreate(data);
+
+    return {
+      data: articles,
+      meta: {
+        created,
+      },
+    };
+  },
+
+  async findContent(ctx) {
+    // Article text and SEO fields for local tools (SEO audit, article index),
+    // oldest change first so a client can resume from the last updatedAt
+    const { page = 1, updatedSince } = ctx.query;
+    const pageSize = Math.min(parseInt(ctx.query.pageSize) || 25, CONTENT_MAX_PAGE_SIZE);
+    const filters = updatedSince ? { updatedAt: { $gt: updatedSince } } : {};
+
+    const articles = await strapi.entityService.findMany('api::article.article', {
+      fields: ['title', 'slug', 'summary', 'content', 'updatedAt'],
+      populate: {
+        seo: {
+          fields: ['metaTitle', 'metaDescription', 'keywords'],
+        },
+      },
+      filters,
+      sort: [{ updatedAt: 'asc' }, { id: 'asc' }],
+      start: (page - 1) * pageSize,
+      limit: pageSize,
+    });
+    const total = await strapi.entityService.count('api::article.article', { filters });
+
+    return {
+      data: articles.map(article => ({
+        id: article.id,
+        attributes: {
+          title: article.title,
+          slug: article.slug,
+          summary: article.summary,
+          content: article.content,
+          updatedAt: article.updatedAt,
+          seo: article.seo ? {
+            metaTitle: article.seo.metaTitle,
+            metaDescription: article.seo.metaDescription,
+            keywords: article.seo.keywords
+          } : null
+        }
+      })),
+      meta: {
+        pagination: {
+          page: parseInt(page),
+          pageSize,
+          pageCount: Math.ceil(total / pageSize),
+          total
+        }
+      }
+    };
+  },
+
+  async findReferences(ctx) {
+    // How many articles and authors (drafts included) use a media file,
+    // author, category or tag, so local tools can tell whether deleting it
+    // would break published content
+    const { collection, id } = ctx.query;
+    const fields = REFERENCE_FIELDS[collection];
+    if (!fields || !/^\d+$/.test(id || '')) {
+      return ctx.badRequest(
+        `Expected collection (${Object.keys(REFERENCE_FIELDS).join(', ')}) and a numeric id`
+      );
+    }
+
+    const data = {};
+    for (const [name, uid, field] of fields) {
+      const count = await strapi.entityService.count(uid, {
+        filters: { [field]: { id: parseInt(id) } },
+        publicationState: 'preview',
+      });
+      data[name] = (data[name] || 0) + count;
+    }
+
+    return { data };
+  },
+
   async find(ctx) {
     // Get pagination parameters from the query
     const { page = 1, pageSize = 25 } = ctx.query;
@@ -24,6 +24,26 @@ module.exports = {
         auth: false,
       },
     },
+    {
+      method: 'GET',
+      path: '/articles/content',
+      handler: 'article.findContent',
+      config: {
+        auth: {
+          strategies: ['api-token'],
+        },
+      },
+    },
+    {
+      method: 'GET',
+      path: '/articles/references',
+      handler: 'article.findReferences',
+      config: {
+        auth: {
+          strategies: ['api-token'],
+        },
+      },
+    },
     // Keep the default routes
     {
       method: 'GET',
@@ -52,6 +72,16 @@ module.exports = {
         },
       },
     },
+    {
+      method: 'POST',
+      path: '/articles/bulk',
+      handler: 'article.bulkCreate',
+      config: {
+        auth: {
+          strategies: ['api-token'],
+        },
+      },
+    },
     {
       method: 'PUT',
       path: '/articles/:id',
@@ -5,5 +5,101 @@
  */
 
 const { createCoreService } = require('@strapi/strapi').factories;
+const { ValidationError } = require('@strapi/utils').errors;
 
-module.exports = createCoreService('api::article.article'); 
\ No newline at end of file
+// Relation fields that accept inline { name, slug, description } references
+const TAXONOMIES = {
+  categories: 'api::category.category',
+  tags: 'api::tag.tag',
+};
+
+const normalizeName = (name) => String(name || '').trim().toLowerCase().split(/\s+/).join(' ');
+
+// Slugs created one by one by the publishing scripts end in "-<unix timestamp>"
+const escapeRegExp = (text) => text.replace(/[.*+?^${}()|[\]\\]/g, '\\$&');
+const slugPattern = (slug) => new RegExp(`^${escapeRegExp(slug)}(-\\d{10})?$`);
+
+module.exports = createCoreService('api::article.article', ({ strapi }) => ({
+  /**
+   * Resolve one category/tag reference to an ID. A number is an existing
+   * entry; an object is matched by name (case-insensitive) or slug, where
+   * "ci-cd" also matches "ci-cd-1712345678", and created if there is no
+   * match. A new entry keeps the plain slug, which nothing else uses or it
+   * would have matched. Resolved objects are remembered per request, so
+   * articles sharing a new tag create it once.
+   */
+  async resolveTaxonomyRef(field, ref, resolved, created) {
+    const uid = TAXONOMIES[field];
+
+    if (typeof ref === 'number' || (typeof ref === 'string' && /^\d+$/.test(ref))) {
+      const key = `id:${ref}`;
+      if (!resolved.has(key)) {
+        const entry = await strapi.db.query(uid).findOne({ where: { id: ref }, select: ['id'] });
+        if (!entry) {
+          throw new ValidationError(`${field} ${ref} does not exist`);
+        }
+        resolved.set(key, entry.id);
+      }
+      return resolved.get(key);
+    }
+
+    if (!ref || typeof ref !== 'object' || !ref.name) {
+      throw new ValidationError(`${field} references must be an ID or an object with a name`);
+    }
+
+    const key = `name:${normalizeName(ref.name)}`;
+    if (!resolved.has(key)) {
+      let entry = await strapi.db.query(uid).findOne({
+        where: { name: { $eqi: ref.name.trim() } },
+        select: ['id'],
+      });
+      if (!entry && ref.slug) {
+        const candidates = await strapi.db.query(uid).findMany({
+          where: { slug: { $startsWith: ref.slug } },
+          select: ['id', 'slug'],
+        });
+        const pattern = slugPattern(ref.slug);
+        entry = candidates.find((candidate) => pattern.test(candidate.slug));
+      }
+      if (!entry) {
+        entry = await strapi.service(uid).create({
+          data: { name: ref.name.trim(), slug: ref.slug, description: ref.description },
+        });
+        created[field].push({ id: entry.id, name: entry.name, slug: entry.slug });
+      }
+      resolved.set(key, entry.id);
+    }
+    return resolved.get(key);
+  },
+
+  /**
+   * Create many articles in one database transaction: if any article fails,
+   * none of them (and none of the categories/tags created for them) are kept.
+   */
+  async bulkCreate(articles) {
+    return strapi.db.transaction(async () => {
+      const resolved = { categories: new Map(), tags: new Map() };
+      const created = { categories: [], tags: [] };
+      const results = [];
+
+      for (const [index, article] of articles.entries()) {
+        try {
+          const data = { ...article };
+          for (const field of Object.keys(TAXONOMIES)) {
+            data[field] = [];
+            for (const ref of article[field] || []) {
+              data[field].push(await this.resolveTaxonomyRef(field, ref, resolved[field], created));
+            }
+          }
+
+          const entry = await this.create({ data });
+          results.push({ id: entry.id, slug: entry.slug });
+        } catch (error) {
+          throw new ValidationError(`Article ${index} (${article.title}): ${error.message}`, error.details);
+        }
+      }
+
+      return { articles: results, created };
+    });
+  },
+}));
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+Local mirror of the articles in Strapi
+
+Indexes over the published articles (near_duplicates.py) need their text,
+which the public /articles list doesn't return. The corpus keeps a copy of
+every article's title, slug, summary, keywords and content in a SQLite file
+in the cache directory:
+
+- Synced incrementally from GET /articles/content?updatedSince=, so only
+  new and edited articles are downloaded; a full sync also drops articles
+  that were deleted in Strapi
+- Articles published by these scripts are added right away, so a batch
+  already sees the articles it published itself
+- Every change gets an increasing sequence number. Derived indexes remember
+  the last one they applied and update from changed_since() instead of
+  rebuilding; after a full sync (generation changes) they rebuild
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+import requests
+
+from local_store import cache_path
+
+# Minimum seconds between two incremental syncs
+SYNC_INTERVAL = float(os.getenv("CORPUS_SYNC_INTERVAL", "300"))
+
+# Published articles live under this URL, by slug
+BLOG_URL = "https://bugninja.ai/blog"
+
+_FIELDS = ("id", "slug", "title", "summary", "keywords", "content", "updated_at", "seq")
+
+
+def article_url(slug):
+    return f"{BLOG_URL}/{slug}"
+
+
+class ArticleCorpus:
+    """SQLite copy of the articles collection"""
+
+    def __init__(self, path=None):
+        self.path = path or cache_path("article_corpus.sqlite3")
+        self.last_synced = 0.0
+        self._sync_lock = threading.RLock()
+        with self._connect() as db:
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS articles (id INTEGER PRIMARY KEY, "
+                "slug TEXT NOT NULL, title TEXT, summary TEXT, keywords TEXT, "
+                "content TEXT, updated_at TEXT, seq INTEGER NOT NULL)"
+            )
+            db.execute("CREATE INDEX IF NOT EXISTS articles_seq ON articles (seq)")
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)"
+            )
+
+    @contextmanager
+    def _connect(self, write=False):
+        db = sqlite3.connect(self.path, timeout=30)
+        try:
+            with db:
+                if write:
+                    # Take the write lock before _put() reads MAX(seq), so
+                    # concurrent writers get distinct sequence numbers and
+                    # commit them in order
+                    db.execute("BEGIN IMMEDIATE")
+                yield db
+        finally:
+            db.close()
+
+    def _meta(self, db, key, default=None):
+        row = db.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else default
+
+    def _set_meta(self, db, key, value):
+        db.execute("INSERT OR REPLACE INTO meta VALUES (?, ?)", (key, value))
+
+    @property
+    def generation(self):
+        """Changes on every full sync; derived indexes rebuild when it does"""
+        with self._connect() as db:
+            return int(self._meta(db, "generation", 0))
+
+    def __len__(self):
+        with self._connect() as db:
+            return db.execute("SELECT COUNT(*) FROM articles").fetchone()[0]
+
+    # Updates
+
+    def _put(self, db, article_id, slug, title, summary, keywords, content, updated_at):
+        (seq,) = db.execute("SELECT COALESCE(MAX(seq), 0) + 1 FROM articles").fetchone()
+        db.execute(
+            "INSERT OR REPLACE INTO articles VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (article_id, slug, title, summary, keywords, content, updated_at, seq),
+        )
+
+    def apply_entries(self, db, entries):
+        """Store /articles/content entries, returning the newest updatedAt"""
+        latest = None
+        for entry in entries:
+            attributes = entry["attributes"]
+            seo = attributes.get("seo") or {}
+            self._put(
+                db,
+                entry["id"],
+                attributes["slug"],
+                attributes.get("title"),
+                attributes.get("summary"),
+                seo.get("keywords"),
+                attributes.get("content"),
+                attributes.get("updatedAt"),
+            )
+            latest = max(latest or "", attributes.get("updatedAt") or "")
+        return latest
+
+    def add(self, article_id, data):
+        """Record an article right after publishing it
+
+        data is the /articles payload's "data" (see article_payload()). The
+        sync cursor isn't moved, so the next sync still fetches the article.
+        """
+        with self._connect(write=True) as db:
+            self._put(
+                db,
+                article_id,
+                data["slug"],
+                data.get("title"),
+                data.get("summary"),
+                (data.get("seo") or {}).get("keywords"),
+                data.get("content"),
+                None,
+            )
+
+    def sync(self, strapi, full=False):
+        """Pull new and changed articles from Strapi
+
+        With full, everything is downloaded again and articles deleted in
+        Strapi are dropped. Returns the number of articles received, or None
+        if the request failed.
+        """
+        with self._sync_lock:
+            with self._connect() as db:
+                since = None if full else self._meta(db, "last_updated_at")
+            params = {"updatedSince": since} if since else None
+            try:
+                entries = list(
+                    strapi.iter_collection("articles/content", params=params)
+                )
+            except requests.RequestException as e:
+                # Checks then run against the articles synced before
+                print(f"⚠️ Failed to sync the article corpus: {e}")
+                return None
+
+            with self._connect(write=True) as db:
+                if full:
+                    db.execute("DELETE FROM articles")
+                    generation = int(self._meta(db, "generation", 0)) + 1
+                    self._set_meta(db, "generation", generation)
+                latest = self.apply_entries(db, entries)
+                if latest and latest > (since or ""):
+                    self._set_meta(db, "last_updated_at", latest)
+            self.last_synced = time.time()
+            return len(entries)
+
+    def sync_if_stale(self, strapi, max_age=SYNC_INTERVAL):
+        """sync() unless the last sync is more recent than max_age seconds"""
+        if time.time() - self.last_synced < max_age:
+            return True
+        with self._sync_lock:
+            # Another thread may have synced while this one waited
+            if time.time() - self.last_synced < max_age:
+                return True
+            return self.sync(strapi) is not None
+
+    # Reads
+
+    def changed_since(self, seq=0):
+        """Articles added or changed after sequence number seq, oldest first"""
+        with self._connect() as db:
+            rows = db.execute(
+                f"SELECT {', '.join(_FIELDS)} FROM articles WHERE seq > ? ORDER BY seq",
+                (seq,),
+            ).fetchall()
+        return [dict(zip(_FIELDS, row)) for row in rows]
+
+    def get(self, article_id):
+        with self._connect() as db:
+            row = db.execute(
+                f"SELECT {', '.join(_FIELDS)} FROM articles WHERE id = ?", (article_id,)
+            ).fetchone()
+        return dict(zip(_FIELDS, row)) if row else None
+
+
+_corpus = None
+_corpus_lock = threading.Lock()
+
+
+def get_article_corpus():
+    """Return the process-wide article corpus"""
+    global _corpus
+    with _corpus_lock:
+        if _corpus is None:
+            _corpus = ArticleCorpus()
+        return _corpus
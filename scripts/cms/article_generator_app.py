@@ -7,43 +7,119 @@ Designed for non-technical users to easily create content.
 """
 
 import os
-import sys
-import json
 import time
-import requests
 import streamlit as st
-import tempfile
 import shutil
+import uuid
 from datetime import datetime
 from openai import AzureOpenAI
 from urllib.parse import urlparse
+from strapi_client import AUTHOR_FIELDS, StrapiClient
+from article_postprocess import postprocess_article
+from article_schema import STRUCTURED_OUTPUT, article_response_format
+from jobs import CANCELLED, DONE, FAILED, FINISHED, QUEUED, RUNNING, get_job_queue
+from json_stream import (
+    IncrementalJSONExtractor,
+    JSONStreamError,
+    save_unparsed_response,
+)
+from link_index import links_prompt, suggest_links
+from llm import stream_completion
+from metrics import (
+    ARTICLES_GENERATED,
+    LLM_PARSE_FAILURES,
+    counted,
+    start_server as start_metrics_server,
+)
+from llm_cache import CACHE_ENABLED, get_response_cache
+from local_store import cache_path
+from near_duplicates import find_duplicates, format_match
+from outline_engine import (
+    DEFAULT_ENGINE,
+    ENGINES,
+    OUTLINE_MAX_TOKENS,
+    outline_prompt,
+    outline_response_format,
+)
+from seo_rules import ContentChecker
+from strapi_async import get_sync_runner, reporting_to, upload_to_strapi_async
+from tracing import span, traced
+
+# Streamlit runs this whole file again on every widget interaction, so the
+# config and clients below are process-wide resources shared by all sessions
+# (restart the app after changing the secrets)
+
+
+@st.cache_resource(show_spinner=False)
+def load_config():
+    """Read the configuration from Streamlit secrets once per process"""
+    strapi_api_url = st.secrets.get("STRAPI_API_URL", "http://localhost:1337")
+    # Ensure we have the /api suffix for API calls if not already present
+    if strapi_api_url and not strapi_api_url.endswith("/api"):
+        strapi_api_url = strapi_api_url + "/api"
+
+    return {
+        "STRAPI_API_URL": strapi_api_url,
+        "STRAPI_API_TOKEN": st.secrets.get("STRAPI_API_TOKEN"),
+        "AZURE_OPENAI_API_KEY": st.secrets.get("AZURE_OPENAI_API_KEY"),
+        "AZURE_OPENAI_ENDPOINT": st.secrets.get("AZURE_OPENAI_ENDPOINT"),
+        # Structured output mode needs API version 2024-08-01-preview or later
+        "AZURE_OPENAI_API_VERSION": st.secrets.get(
+            "AZURE_OPENAI_API_VERSION", "2024-07-01-preview"
+        ),
+        "AZURE_OPENAI_DEPLOYMENT": st.secrets.get("AZURE_OPENAI_DEPLOYMENT", "gpt-4"),
+    }
+
+
+@st.cache_resource(show_spinner=False)
+def get_strapi_client(api_url, api_token):
+    """Pooled Strapi client (keep-alive connections, timeouts and retries)"""
+    return StrapiClient(api_url, api_token)
+
+
+@st.cache_resource(show_spinner=False)
+def get_openai_client(api_key, endpoint, api_version):
+    """Azure OpenAI client; its HTTP connection pool is reused across reruns"""
+    return AzureOpenAI(
+        api_key=api_key, api_version=api_version, azure_endpoint=endpoint
+    )
+
 
 # Configuration - using Streamlit secrets
-STRAPI_API_URL = st.secrets.get("STRAPI_API_URL", "http://localhost:1337")
-STRAPI_API_TOKEN = st.secrets.get("STRAPI_API_TOKEN")
-AZURE_OPENAI_API_KEY = st.secrets.get("AZURE_OPENAI_API_KEY")
-AZURE_OPENAI_ENDPOINT = st.secrets.get("AZURE_OPENAI_ENDPOINT")
-
-# Ensure we have the /api suffix for API calls if not already present
-if STRAPI_API_URL and not STRAPI_API_URL.endswith("/api"):
-    STRAPI_API_URL = STRAPI_API_URL + "/api"
-
-# Headers for API requests
-headers = {
-    "Content-Type": "application/json",
-    "Authorization": f"Bearer {STRAPI_API_TOKEN}",
+config = load_config()
+STRAPI_API_URL = config["STRAPI_API_URL"]
+STRAPI_API_TOKEN = config["STRAPI_API_TOKEN"]
+AZURE_OPENAI_API_KEY = config["AZURE_OPENAI_API_KEY"]
+AZURE_OPENAI_ENDPOINT = config["AZURE_OPENAI_ENDPOINT"]
+AZURE_OPENAI_API_VERSION = config["AZURE_OPENAI_API_VERSION"]
+AZURE_OPENAI_DEPLOYMENT = config["AZURE_OPENAI_DEPLOYMENT"]
+
+strapi = get_strapi_client(STRAPI_API_URL, STRAPI_API_TOKEN)
+
+# Featured images are saved here until they are published or discarded
+UPLOAD_DIR = os.path.dirname(cache_path("uploads", ""))
+UPLOAD_MAX_AGE = 24 * 60 * 60
+
+# Article generation and publishing run as background jobs (see jobs.py)
+job_queue = get_job_queue()
+# Prometheus metrics for scraping, served once per process if METRICS_PORT is set
+start_metrics_server()
+JOB_POLL_SECONDS = 1.0
+JOB_LIST_SIZE = 10
+JOB_STATUS_ICONS = {
+    QUEUED: "🕒",
+    RUNNING: "⚙️",
+    DONE: "✅",
+    FAILED: "❌",
+    CANCELLED: "✖️",
 }
 
-auth_header = {"Authorization": f"Bearer {STRAPI_API_TOKEN}"}
-
 # Initialize Azure OpenAI client (only if credentials are available)
 client = None
 if AZURE_OPENAI_API_KEY and AZURE_OPENAI_ENDPOINT:
     try:
-        client = AzureOpenAI(
-            api_key=AZURE_OPENAI_API_KEY,
-            api_version="2024-07-01-preview",
-            azure_endpoint=AZURE_OPENAI_ENDPOINT,
+        client = get_openai_client(
+            AZURE_OPENAI_API_KEY, AZURE_OPENAI_ENDPOINT, AZURE_OPENAI_API_VERSION
         )
     except Exception as e:
         st.error(f"Failed to initialize Azure OpenAI client: {e}")
@@ -151,43 +227,100 @@ def init_streamlit():
 def get_authors():
     """Get all authors from Strapi"""
     try:
-        response = requests.get(f"{STRAPI_API_URL}/authors?populate=*", headers=headers)
-        if response.status_code == 200:
-            authors = response.json()
-            if authors.get("data") and len(authors["data"]) > 0:
-                return authors["data"]
-        return []
+        return list(strapi.iter_collection("authors", fields=AUTHOR_FIELDS))
     except Exception as e:
         st.error(f"Failed to fetch authors: {str(e)}")
         return []
 
 
-def save_uploaded_image(uploaded_file):
-    """Save uploaded image to temporary location and return path"""
-    if uploaded_file is not None:
-        # Create temporary file
-        temp_dir = tempfile.mkdtemp()
-        temp_path = os.path.join(temp_dir, uploaded_file.name)
-
-        # Save uploaded file
-        with open(temp_path, "wb") as f:
-            f.write(uploaded_file.getvalue())
+def _remove_stale_uploads():
+    """Delete saved images of sessions that ended without publishing"""
+    cutoff = time.time() - UPLOAD_MAX_AGE
+    for entry in os.scandir(UPLOAD_DIR):
+        if entry.is_dir() and entry.stat().st_mtime < cutoff:
+            shutil.rmtree(entry.path, ignore_errors=True)
 
-        return temp_path
-    return None
 
+def remove_saved_image(image_path):
+    """Delete an image saved by save_uploaded_image()"""
+    if image_path and os.path.dirname(os.path.dirname(image_path)) == UPLOAD_DIR:
+        shutil.rmtree(os.path.dirname(image_path), ignore_errors=True)
 
-def generate_seo_content(topic, author, cta_text, cta_link, references_list):
-    """Generate SEO-optimized content using Azure OpenAI"""
 
-    # Create a progress bar
-    progress_bar = st.progress(0)
-    status_text = st.empty()
+def save_uploaded_image(uploaded_file):
+    """Save uploaded image to the uploads directory and return path
+
+    Streamlit hands the same file back on every rerun, so it is only written
+    once per upload; the previous image of the session is deleted. Once an
+    article job is submitted the job owns the saved file, and the next
+    article gets its own copy.
+    """
+    if uploaded_file is None:
+        return None
 
-    status_text.text("🧠 Connecting to AI...")
-    progress_bar.progress(25)
+    saved_path = st.session_state.get("uploaded_image_path")
+    if (
+        st.session_state.get("uploaded_image_file_id") == uploaded_file.file_id
+        and saved_path
+        and os.path.exists(saved_path)
+    ):
+        return saved_path
+
+    discard_uploaded_image()
+    _remove_stale_uploads()
+
+    temp_path = cache_path("uploads", uuid.uuid4().hex, uploaded_file.name)
+    # Copy from the upload buffer in chunks instead of duplicating it in memory
+    uploaded_file.seek(0)
+    with open(temp_path, "wb") as f:
+        shutil.copyfileobj(uploaded_file, f)
+
+    st.session_state.uploaded_image_file_id = uploaded_file.file_id
+    return temp_path
+
+
+def discard_uploaded_image():
+    """Delete the session's saved image and forget its path"""
+    remove_saved_image(st.session_state.get("uploaded_image_path"))
+    st.session_state.uploaded_image_path = None
+    st.session_state.uploaded_image_file_id = None
+
+
+@traced()
+@counted(ARTICLES_GENERATED)
+def generate_seo_content(
+    job,
+    topic,
+    author,
+    cta_text,
+    cta_link,
+    references_list,
+    use_cache=False,
+    structured=False,
+    engine="single",
+):
+    """Generate SEO-optimized content using Azure OpenAI
+
+    Runs as a background job (see jobs.py): progress, real token counts and
+    a live preview of the article are reported through job, and cancelling
+    the job closes the stream. With
+    use_cache, an identical earlier prompt is replayed from the disk cache.
+    With structured, the API enforces the article schema and invalid fields
+    are fixed with a targeted repair prompt. The "outline" engine generates an
+    outline first and then writes every section in parallel.
+    """
+
+    job.update("🧠 Connecting to AI...", progress=0)
+    response_cache = get_response_cache() if use_cache else None
 
     try:
+        # Checked before the completion is paid for (see near_duplicates.py)
+        for check, match in find_duplicates(strapi, topic=topic):
+            job.log("warning", f"⚠️ {format_match(match, check)}")
+
+        # Real blog URLs for the internal links the system prompt asks for
+        link_instructions = links_prompt(suggest_links(strapi, topic))
+
         # Prepare references text from list
         references_text = ""
         if references_list and any(ref.strip() for ref in references_list):
@@ -203,9 +336,6 @@ def generate_seo_content(topic, author, cta_text, cta_link, references_list):
                 f"\n\nUse this CTA in the article:\nText: {cta_text}\nLink: {cta_link}"
             )
 
-        status_text.text("🤖 Generating content...")
-        progress_bar.progress(50)
-
         # Create the prompt
         current_date = datetime.now().strftime("%Y-%m-%d")
         json_template = f"""
@@ -323,6 +453,21 @@ def generate_seo_content(topic, author, cta_text, cta_link, references_list):
         }}
         """
 
+        completion_options = {}
+        outlined = engine == "outline"
+        if structured:
+            # The API enforces the schema, so the JSON template can be left out
+            completion_options["response_format"] = (
+                outline_response_format() if outlined else article_response_format()
+            )
+            format_instruction = ""
+        else:
+            format_instruction = f"""
+        Return a JSON object with the complete article structure following this EXACT format:
+        
+        {json_template}
+        """
+
         full_prompt = f"""
         Create a complete SEO-optimized article based on this topic:
         
@@ -336,6 +481,7 @@ def generate_seo_content(topic, author, cta_text, cta_link, references_list):
         - Expertise: {author['expertise']}
         
         {cta_instruction}
+        {link_instructions}
         {references_text}
         
         FIXED INSTRUCTIONS (MUST FOLLOW):
@@ -348,155 +494,122 @@ def generate_seo_content(topic, author, cta_text, cta_link, references_list):
         4. Meta tags should reference https://bugninja.ai/blog for the blog section
         
         Include all metadata, categories, and tags. Make sure to include structured data for SEO.
-        
-        Return a JSON object with the complete article structure following this EXACT format:
-        
-        {json_template}
-        
+        {format_instruction}
         IMPORTANT: The keywords listed in the SEO section MUST appear at least twice in the article content.
         """
 
-        response = client.chat.completions.create(
-            model="gpt-4",
+        max_tokens = 4000
+        if outlined:
+            # Outline and metadata first, the sections are written afterwards
+            full_prompt = outline_prompt(full_prompt)
+            max_tokens = OUTLINE_MAX_TOKENS
+
+        extractor = IncrementalJSONExtractor()
+        # Heading rules are checked live on the streamed content
+        seo_checker = ContentChecker()
+        last_render = [0.0]
+
+        def render_progress(delta, stats):
+            extractor.feed(delta)
+            # Re-rendering on every token would flood the browser; ~4 updates/s
+            now = time.monotonic()
+            if now - last_render[0] < 0.25:
+                return
+            last_render[0] = now
+
+            # Show the article itself as it is written instead of raw JSON
+            title = extractor.value_at(("article", "title"))
+            slug = extractor.value_at(("article", "slug"))
+            article_content = extractor.value_at(("article", "content"))
+            outline = extractor.value_at(("article", "outline")) or []
+            preview = []
+            if title:
+                preview.append(f"### {title}")
+            if slug:
+                preview.append(f"*https://bugninja.ai/blog/{slug}*")
+            if article_content:
+                preview.append(article_content)
+                seo_checker.update(article_content)
+            preview.extend(
+                f"- {section['heading']}"
+                for section in outline
+                if isinstance(section, dict) and section.get("heading")
+            )
+
+            issues = len(seo_checker.violations)
+            job.update(
+                f"✍️ Generating... {stats.completion_tokens} {stats.unit} · "
+                f"{stats.tokens_per_second:.1f}/s · "
+                f"first token after {stats.time_to_first_token:.1f}s"
+                + (f" · 🔎 {issues} SEO issue(s)" if issues else ""),
+                progress=min(stats.completion_tokens / max_tokens, 0.99),
+                preview="\n\n".join(preview),
+            )
+
+        def render_wait(seconds, reason):
+            job.update(f"⏳ Waiting {seconds:.1f}s for Azure OpenAI ({reason})...")
+
+        job.update("🤖 Generating content...")
+        content, stats = stream_completion(
+            client,
+            on_delta=render_progress,
+            cache=response_cache,
+            on_wait=render_wait,
+            model=AZURE_OPENAI_DEPLOYMENT,
             messages=[
                 {"role": "system", "content": SEO_SYSTEM_PROMPT},
                 {"role": "user", "content": full_prompt},
             ],
             temperature=0.7,
-            max_tokens=4000,
+            max_tokens=max_tokens,
+            **completion_options,
+        )
+        job.update(
+            f"✨ Processing response... ({stats.summary()})", progress=1, preview=""
         )
 
-        status_text.text("✨ Processing response...")
-        progress_bar.progress(75)
+        # The extractor already skipped any text or ```json fence around the object
+        with span("parse_seo_content"):
+            seo_data = extractor.result()
 
-        # Extract the JSON content from the response
-        content = response.choices[0].message.content
+        written = {}
 
-        # Find JSON content between triple backticks if present
-        if "```json" in content and "```" in content.split("```json", 1)[1]:
-            json_str = content.split("```json", 1)[1].split("```", 1)[0].strip()
-        elif "```" in content and "```" in content.split("```", 1)[1]:
-            json_str = content.split("```", 1)[1].split("```", 1)[0].strip()
-        else:
-            json_str = content
-
-        # Clean up any non-JSON text
-        json_str = json_str.strip()
-        if not json_str.startswith("{"):
-            json_str = json_str[json_str.find("{") :]
-        if not json_str.endswith("}"):
-            json_str = json_str[: json_str.rfind("}") + 1]
-
-        # Parse the JSON
-        seo_data = json.loads(json_str)
-
-        # Ensure the author data is correct (replace with our real author data if needed)
-        if "author" in seo_data:
-            # Check if the author name matches our real author
-            if seo_data["author"]["name"] != author["name"]:
-                st.info(
-                    f"⚠️ Replacing generated author with real author: {author['name']}"
-                )
-                seo_data["author"] = author
-        else:
-            st.info(f"⚠️ Adding missing author information: {author['name']}")
-            seo_data["author"] = author
-
-        # Validate and truncate SEO fields that exceed character limits
-        if "seo" in seo_data:
-            # Meta title should be max 60 characters
-            if len(seo_data["seo"].get("metaTitle", "")) > 60:
-                original_title = seo_data["seo"]["metaTitle"]
-                seo_data["seo"]["metaTitle"] = original_title[:57] + "..."
-                st.warning(
-                    f"⚠️ Meta title truncated from {len(original_title)} to 60 characters"
-                )
-
-            # Meta description should be max 160 characters
-            if len(seo_data["seo"].get("metaDescription", "")) > 160:
-                original_desc = seo_data["seo"]["metaDescription"]
-                seo_data["seo"]["metaDescription"] = original_desc[:157] + "..."
-                st.warning(
-                    f"⚠️ Meta description truncated from {len(original_desc)} to 160 characters"
-                )
-
-            # Slug should be under 75 characters
-            if "article" in seo_data and len(seo_data["article"].get("slug", "")) > 75:
-                original_slug = seo_data["article"]["slug"]
-                seo_data["article"]["slug"] = original_slug[:72] + "..."
-                st.warning(
-                    f"⚠️ Slug truncated from {len(original_slug)} to 75 characters"
-                )
+        def render_section(index, markdown, done, total):
+            written[index] = markdown
+            # Show the finished sections in article order
+            job.update(
+                f"✍️ Writing sections in parallel... {done}/{total}",
+                progress=done / total,
+                preview="\n\n".join(written[i] for i in sorted(written)),
+            )
 
-            # Ensure metaSocial entries have image placeholders
-            if "metaSocial" in seo_data["seo"]:
-                for social in seo_data["seo"]["metaSocial"]:
-                    if "image" not in social:
-                        social["image"] = (
-                            "placeholder-will-be-replaced-with-featured-image"
-                        )
-            else:
-                # Create default metaSocial entries if missing
-                st.info("⚠️ Adding missing social media metadata...")
-                seo_data["seo"]["metaSocial"] = [
-                    {
-                        "socialNetwork": "Facebook",
-                        "title": seo_data["seo"].get(
-                            "metaTitle", seo_data["article"]["title"]
-                        ),
-                        "description": seo_data["seo"].get(
-                            "metaDescription", seo_data["article"]["summary"]
-                        ),
-                        "image": "placeholder-will-be-replaced-with-featured-image",
-                    },
-                    {
-                        "socialNetwork": "Twitter",
-                        "title": seo_data["seo"].get(
-                            "metaTitle", seo_data["article"]["title"]
-                        ),
-                        "description": seo_data["seo"].get(
-                            "metaDescription", seo_data["article"]["summary"]
-                        ),
-                        "image": "placeholder-will-be-replaced-with-featured-image",
-                    },
-                ]
-
-        # Ensure structured data exists in SEO
-        if "seo" in seo_data and not seo_data["seo"].get("structuredData"):
-            st.info("⚠️ Adding missing structured data to SEO...")
-            seo_data["seo"]["structuredData"] = {
-                "@context": "https://schema.org",
-                "@type": "Article",
-                "headline": seo_data["article"]["title"],
-                "description": seo_data["article"]["summary"],
-                "datePublished": datetime.now().isoformat(),
-                "dateModified": datetime.now().isoformat(),
-                "author": {"@type": "Person", "name": author["name"]},
-                "mainEntityOfPage": {
-                    "@type": "WebPage",
-                    "@id": f"https://bugninja.ai/blog/{seo_data['article']['slug']}",
-                },
-            }
-        elif "structuredData" in seo_data["seo"]:
-            # Ensure the author in structured data matches our real author
-            if (
-                seo_data["seo"]["structuredData"].get("author", {}).get("name")
-                != author["name"]
-            ):
-                st.info(f"⚠️ Updating author in structured data to: {author['name']}")
-                seo_data["seo"]["structuredData"]["author"] = {
-                    "@type": "Person",
-                    "name": author["name"],
-                }
+        # Shared with real_article.py (see article_postprocess.py)
+        with reporting_to(lambda message: job.log(log_level(message), message.strip())):
+            seo_data, duplicates = postprocess_article(
+                seo_data,
+                author,
+                client,
+                AZURE_OPENAI_DEPLOYMENT,
+                strapi,
+                SEO_SYSTEM_PROMPT,
+                outlined=outlined,
+                structured=structured,
+                cache=response_cache,
+                link_instructions=link_instructions,
+                on_section=render_section,
+            )
+        job.update(preview="")
+        for check, match in duplicates:
+            job.log("warning", f"⚠️ {format_match(match, check)}")
 
         # Update references to use today's date
-        if "article" in seo_data and "references" in seo_data["article"]:
+        if "references" in seo_data["article"]:
             current_date = datetime.now().strftime("%Y-%m-%d")
             for reference in seo_data["article"]["references"]:
                 reference["publishDate"] = current_date
 
         # Ensure reading time is calculated if missing
-        if "article" in seo_data and not seo_data["article"].get("readingTime"):
+        if not seo_data["article"].get("readingTime"):
             word_count = len(seo_data["article"]["content"].split())
             seo_data["article"]["readingTime"] = max(
                 1, word_count // 200
@@ -504,31 +617,29 @@ def generate_seo_content(topic, author, cta_text, cta_link, references_list):
 
         # Add CTA if provided
         if cta_text and cta_link:
-            if "article" in seo_data:
-                seo_data["article"]["ctas"] = [
-                    {
-                        "text": cta_text,
-                        "url": cta_link,
-                        "type": "primary",
-                        "newTab": True,
-                        "icon": "arrow-right",
-                    }
-                ]
-
-        status_text.text("✅ Content generated successfully!")
-        progress_bar.progress(100)
-
-        time.sleep(1)  # Brief pause to show completion
-        status_text.empty()
-        progress_bar.empty()
+            seo_data["article"]["ctas"] = [
+                {
+                    "text": cta_text,
+                    "url": cta_link,
+                    "type": "primary",
+                    "newTab": True,
+                    "icon": "arrow-right",
+                }
+            ]
+
+        job.update(f"✅ Content generated successfully! ({stats.summary()})")
 
         return seo_data
 
-    except json.JSONDecodeError as e:
-        st.error(f"❌ Error parsing AI response: {e}")
+    except JSONStreamError as e:
+        LLM_PARSE_FAILURES.inc()
+        job.log("error", f"❌ Error parsing AI response: {e}")
+        job.log("info", f"💾 Raw response saved to {save_unparsed_response(content)}")
+        if response_cache and stats.cache_key:
+            response_cache.discard(stats.cache_key)
         return None
     except Exception as e:
-        st.error(f"❌ Error generating content: {e}")
+        job.log("error", f"❌ Error generating content: {e}")
         return None
 
 
@@ -610,203 +721,186 @@ def display_article_preview(content):
             )
 
 
-def upload_image(image_path, name=None, alt_text=None):
-    """Upload an image to Strapi media library"""
-    try:
-        files = {
-            "files": (os.path.basename(image_path), open(image_path, "rb"), "image/png")
-        }
-
-        data = {}
-        if name or alt_text:
-            file_info = {}
-            if name:
-                file_info["name"] = name
-            if alt_text:
-                file_info["alternativeText"] = alt_text
-            data = {"fileInfo": json.dumps(file_info)}
-
-        response = requests.post(
-            f"{STRAPI_API_URL}/upload", headers=auth_header, files=files, data=data
-        )
-
-        if response.status_code == 200:
-            uploaded_file = response.json()[0]
-            return uploaded_file["id"]
-        else:
-            st.error(f"Failed to upload image: {response.text}")
-            return None
-
-    except Exception as e:
-        st.error(f"Error uploading image: {e}")
-        return None
+def log_level(message):
+    """Job log level of a progress message, from its icon"""
+    message = message.lstrip()
+    if message.startswith("❌"):
+        return "error"
+    if message.startswith("⚠️"):
+        return "warning"
+    return "info"
 
 
-def create_category(category_data):
-    """Create a category in Strapi"""
-    timestamp = int(time.time())
-    unique_slug = f"{category_data['slug']}-{timestamp}"
+def upload_to_strapi(job, content, author_id, image_path):
+    """Upload the complete article to Strapi, reporting progress through job
 
-    payload = {
-        "data": {
-            "name": category_data["name"],
-            "slug": unique_slug,
-            "description": category_data["description"],
-        }
-    }
+    Runs the same journaled upload as the command-line generator (see
+    strapi_async.py), with its messages going to the job log.
+    """
 
-    response = requests.post(
-        f"{STRAPI_API_URL}/categories", headers=headers, json=payload
-    )
-
-    if response.status_code == 200:
-        category = response.json()
-        return category["data"]["id"]
-    else:
-        st.error(f"Failed to create category: {category_data['name']}")
-        return None
-
-
-def create_tag(tag_data):
-    """Create a tag in Strapi"""
-    timestamp = int(time.time())
-    unique_slug = f"{tag_data['slug']}-{timestamp}"
-
-    payload = {
-        "data": {
-            "name": tag_data["name"],
-            "slug": unique_slug,
-            "description": tag_data["description"],
-        }
-    }
-
-    response = requests.post(f"{STRAPI_API_URL}/tags", headers=headers, json=payload)
-
-    if response.status_code == 200:
-        tag = response.json()
-        return tag["data"]["id"]
-    else:
-        st.error(f"Failed to create tag: {tag_data['name']}")
-        return None
-
-
-def upload_to_strapi(content, author_id, image_path):
-    """Upload the complete article to Strapi"""
-
-    progress_bar = st.progress(0)
-    status_text = st.empty()
+    job.update(progress=0)
 
     try:
-        # Upload featured image
-        status_text.text("📸 Uploading featured image...")
-        progress_bar.progress(20)
-
         if not image_path or not os.path.exists(image_path):
-            st.error("No valid image provided for upload")
+            job.log("error", "No valid image provided for upload")
             return False
 
-        image_id = upload_image(
-            image_path,
-            f"{content['article']['slug']}_featured",
-            f"Featured image for article: {content['article']['title']}",
-        )
-
-        if not image_id:
-            st.error("Failed to upload featured image")
-            return False
-
-        # Create categories
-        status_text.text("🏷️ Creating categories...")
-        progress_bar.progress(40)
-
-        category_ids = []
-        for category in content["categories"]:
-            category_id = create_category(category)
-            if category_id:
-                category_ids.append(category_id)
-
-        # Create tags
-        status_text.text("🔖 Creating tags...")
-        progress_bar.progress(60)
+        job.update("📸 Uploading featured image, categories and tags...", progress=0.2)
 
-        tag_ids = []
-        for tag in content["tags"]:
-            tag_id = create_tag(tag)
-            if tag_id:
-                tag_ids.append(tag_id)
-
-        # Create article
-        status_text.text("📝 Creating article...")
-        progress_bar.progress(80)
-
-        timestamp = int(time.time())
-        unique_slug = f"{content['article']['slug']}-{timestamp}"
-        current_date = datetime.now().isoformat()
-
-        # Update structured data with dynamic values if it exists
-        if "structuredData" in content["seo"]:
-            # Update dates
-            content["seo"]["structuredData"]["datePublished"] = current_date
-            content["seo"]["structuredData"]["dateModified"] = current_date
-
-            # Update headline and description
-            content["seo"]["structuredData"]["headline"] = content["article"]["title"]
-            content["seo"]["structuredData"]["description"] = content["article"][
-                "summary"
-            ]
+        with reporting_to(lambda message: job.log(log_level(message), message.strip())):
+            published = get_sync_runner(STRAPI_API_URL, STRAPI_API_TOKEN).run(
+                upload_to_strapi_async, content, {"id": author_id}, image_path
+            )
 
-            # Update mainEntityOfPage with final slug
-            content["seo"]["structuredData"]["mainEntityOfPage"][
-                "@id"
-            ] = f"https://bugninja.ai/blog/{unique_slug}"
+        if published:
+            job.update("✅ Article uploaded successfully!", progress=1)
+        return published
 
-        # Update references to use today's date
-        if "article" in content and "references" in content["article"]:
-            for reference in content["article"]["references"]:
-                reference["publishDate"] = current_date
+    except Exception as e:
+        job.log("error", f"Error uploading to Strapi: {e}")
+        return False
 
-        # Update metaSocial with image ID
-        if "metaSocial" in content["seo"]:
-            for social in content["seo"]["metaSocial"]:
-                social["image"] = image_id
-
-        payload = {
-            "data": {
-                "title": content["article"]["title"],
-                "slug": unique_slug,
-                "summary": content["article"]["summary"],
-                "content": content["article"]["content"],
-                "author": author_id,
-                "categories": category_ids,
-                "tags": tag_ids,
-                "readingTime": content["article"].get(
-                    "readingTime", len(content["article"]["content"].split()) // 200 + 1
-                ),
-                "publishDate": current_date,
-                "updateDate": current_date,
-                "featured": True,
-                "seo": content["seo"],
-                "cta": content["article"].get("ctas", []),
-                "references": content["article"].get("references", []),
-                "featuredImage": image_id,
-            }
-        }
-
-        response = requests.post(
-            f"{STRAPI_API_URL}/articles", headers=headers, json=payload
-        )
 
-        if response.status_code == 200:
-            status_text.text("✅ Article uploaded successfully!")
-            progress_bar.progress(100)
-            return True
-        else:
-            st.error(f"Failed to create article: {response.text}")
-            return False
+def generate_article(
+    job,
+    topic,
+    author,
+    image_path,
+    cta_text,
+    cta_link,
+    references_list,
+    use_cache=False,
+    structured=False,
+    engine="single",
+):
+    """Generation job: the article plus what publishing it needs"""
+    content = generate_seo_content(
+        job,
+        topic,
+        author,
+        cta_text,
+        cta_link,
+        references_list,
+        use_cache,
+        structured,
+        engine,
+    )
+    if not content:
+        raise RuntimeError("Failed to generate article. Please try again.")
+    job.update(title=content["article"]["title"])
+    return {"content": content, "author": author, "image_path": image_path}
+
+
+def publish_article(job, content, author_id, image_path):
+    """Publishing job: upload a generated article to Strapi"""
+    if not upload_to_strapi(job, content, author_id, image_path):
+        raise RuntimeError("Failed to upload article. Please try again.")
+    remove_saved_image(image_path)
+    return {"slug": content["article"]["slug"]}
+
+
+def job_title(topic):
+    """Short label of a generation job for the job list"""
+    title = " ".join(topic.replace("#", " ").split())
+    return title[:57] + "..." if len(title) > 60 else title
+
+
+def open_article(job):
+    """Show the article of a finished generation job in this session"""
+    result = job["result"]
+    st.session_state.generated_content = result["content"]
+    st.session_state.selected_author = result["author"]
+    st.session_state.article_image_path = result["image_path"]
+    st.session_state.show_article = True
+    # Keeps the article after a refresh or reconnect
+    st.query_params["article"] = job["id"]
+
+
+def close_article():
+    """Leave the article view, deleting the article's saved image"""
+    remove_saved_image(st.session_state.article_image_path)
+    st.session_state.generated_content = None
+    st.session_state.show_article = False
+    st.session_state.article_image_path = None
+    st.query_params.clear()
+
+
+def render_job_list():
+    """Sidebar list of recent jobs, so queued articles can be reopened"""
+    jobs = job_queue.recent(JOB_LIST_SIZE)
+    if not jobs:
+        return
+
+    with st.sidebar:
+        st.subheader("🗂️ Jobs")
+        for job in jobs:
+            label = f"{JOB_STATUS_ICONS[job['status']]} {job['title'] or job['kind']}"
+            if job["status"] == RUNNING:
+                label += f" ({job['progress']:.0%})"
+            if st.button(label, key=f"job-{job['id']}", use_container_width=True):
+                st.query_params["job"] = job["id"]
+                st.rerun()
+
+
+def show_job(job_id):
+    """Show a job's progress until it finishes
+
+    The page polls the job table, so the job keeps running when the browser
+    is closed and is picked up again from the ?job= URL.
+    """
+    job = job_queue.get(job_id)
+    if job is None:
+        st.warning("⚠️ This job no longer exists.")
+        if st.button("⬅️ Back"):
+            del st.query_params["job"]
+            st.rerun()
+        return
+
+    if job["kind"] == "generate" and job["status"] == DONE:
+        del st.query_params["job"]
+        open_article(job)
+        st.rerun()
+
+    st.header(f"{JOB_STATUS_ICONS[job['status']]} {job['title'] or job['kind']}")
+    st.progress(job["progress"])
+    if job["message"]:
+        st.text(job["message"])
+    for event in job["events"]:
+        getattr(st, event["level"], st.info)(event["message"])
+    if job["error"]:
+        st.error(f"❌ {job['error']}")
+    if job["preview"]:
+        st.divider()
+        st.markdown(job["preview"])
 
-    except Exception as e:
-        st.error(f"Error uploading to Strapi: {e}")
-        return False
+    if job["status"] not in FINISHED:
+        col1, col2 = st.columns([1, 1])
+        with col1:
+            if st.button("✖️ Cancel", use_container_width=True):
+                job_queue.cancel(job_id)
+                st.rerun()
+        with col2:
+            if job["kind"] == "generate" and st.button(
+                "➕ Start another article",
+                use_container_width=True,
+                help="The article keeps generating; reopen it from the job list",
+            ):
+                del st.query_params["job"]
+                st.rerun()
+        time.sleep(JOB_POLL_SECONDS)
+        st.rerun()
+    elif job["status"] == DONE:
+        st.success("🎉 Article successfully uploaded to CMS!")
+        if st.session_state.get("celebrated_job") != job_id:
+            st.session_state.celebrated_job = job_id
+            st.balloons()
+        if st.button("✍️ Write another article", type="primary"):
+            close_article()
+            st.rerun()
+    elif st.button("⬅️ Back"):
+        # A failed upload goes back to the article, a failed generation to the form
+        del st.query_params["job"]
+        st.rerun()
 
 
 def main():
@@ -825,7 +919,7 @@ def main():
         "AZURE_OPENAI_ENDPOINT",
     ]
     for secret in required_secrets:
-        if not st.secrets.get(secret):
+        if not config.get(secret):
             missing_secrets.append(secret)
 
     if missing_secrets:
@@ -869,6 +963,25 @@ password = "your-password"
         ]
     if "uploaded_image_path" not in st.session_state:
         st.session_state.uploaded_image_path = None
+    if "article_image_path" not in st.session_state:
+        st.session_state.article_image_path = None
+
+    # After a refresh or reconnect, pick the generated article back up
+    article_job_id = st.query_params.get("article")
+    if article_job_id and st.session_state.generated_content is None:
+        article_job = job_queue.get(article_job_id)
+        if article_job and article_job["status"] == DONE:
+            open_article(article_job)
+        else:
+            del st.query_params["article"]
+
+    render_job_list()
+
+    # A running (or just finished) job takes over the page until it's done
+    job_id = st.query_params.get("job")
+    if job_id:
+        show_job(job_id)
+        return
 
     # Main page layout - organized in sections
     if not st.session_state.show_article:
@@ -1056,6 +1169,28 @@ Scheduled runs"""
                 label_visibility="collapsed",
             )
 
+            use_cache = st.checkbox(
+                "♻️ Reuse cached generation",
+                value=CACHE_ENABLED,
+                help="Replay the stored response if this exact prompt was generated before, instead of paying for a new generation",
+            )
+            structured = st.checkbox(
+                "🧱 Structured output mode",
+                value=STRUCTURED_OUTPUT,
+                help="Enforce the article schema through the API and repair invalid fields with a short follow-up prompt (needs API version 2024-08-01-preview or later)",
+            )
+            engine = st.radio(
+                "Generation engine",
+                ENGINES,
+                index=ENGINES.index(DEFAULT_ENGINE),
+                format_func=lambda e: {
+                    "single": "⚡ Single call",
+                    "outline": "🧩 Outline + parallel sections (long-form)",
+                }[e],
+                horizontal=True,
+                help="The outline engine writes an outline first and then every H2 section in parallel, so long articles finish faster and aren't limited to one completion's token budget",
+            )
+
         # Generate Button Section
         st.markdown("---")
 
@@ -1101,18 +1236,26 @@ Scheduled runs"""
                     for error in validation_errors:
                         st.error(f"• {error}")
                 else:
-                    with st.spinner("Generating your article..."):
-                        content = generate_seo_content(
-                            topic, selected_author, cta_text, cta_link, valid_references
-                        )
-
-                        if content:
-                            st.session_state.generated_content = content
-                            st.session_state.selected_author = selected_author
-                            st.session_state.show_article = True
-                            st.rerun()
-                        else:
-                            st.error("Failed to generate article. Please try again.")
+                    image_path = st.session_state.uploaded_image_path
+                    # The job owns the saved image now (see save_uploaded_image)
+                    st.session_state.uploaded_image_path = None
+                    st.session_state.uploaded_image_file_id = None
+
+                    st.query_params["job"] = job_queue.submit(
+                        "generate",
+                        generate_article,
+                        topic,
+                        selected_author,
+                        image_path,
+                        cta_text,
+                        cta_link,
+                        valid_references,
+                        use_cache,
+                        structured,
+                        engine,
+                        title=job_title(topic),
+                    )
+                    st.rerun()
 
     else:
         # Show generated article
@@ -1128,40 +1271,30 @@ Scheduled runs"""
                 if st.button(
                     "🗑️ Discard & Start Over", type="secondary", use_container_width=True
                 ):
-                    st.session_state.generated_content = None
-                    st.session_state.show_article = False
-                    st.session_state.uploaded_image_path = None
+                    close_article()
                     st.rerun()
 
             with col3:
                 if st.button(
                     "📤 Upload to CMS", type="primary", use_container_width=True
                 ):
-                    if not st.session_state.uploaded_image_path:
+                    if not st.session_state.article_image_path or not os.path.exists(
+                        st.session_state.article_image_path
+                    ):
                         st.error(
                             "No uploaded image found. Please go back and upload an image."
                         )
                     else:
-                        with st.spinner("Uploading to CMS..."):
-                            success = upload_to_strapi(
-                                st.session_state.generated_content,
-                                st.session_state.selected_author["id"],
-                                st.session_state.uploaded_image_path,
-                            )
-
-                            if success:
-                                st.success("🎉 Article successfully uploaded to CMS!")
-                                st.balloons()
-                                time.sleep(2)
-                                # Reset for next article
-                                st.session_state.generated_content = None
-                                st.session_state.show_article = False
-                                st.session_state.uploaded_image_path = None
-                                st.rerun()
-                            else:
-                                st.error(
-                                    "❌ Failed to upload article. Please try again."
-                                )
+                        content = st.session_state.generated_content
+                        st.query_params["job"] = job_queue.submit(
+                            "publish",
+                            publish_article,
+                            content,
+                            st.session_state.selected_author["id"],
+                            st.session_state.article_image_path,
+                            title=content["article"]["title"],
+                        )
+                        st.rerun()
 
 
 if __name__ == "__main__":
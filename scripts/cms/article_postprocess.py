@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Post-processing of a generated article, shared by both scripts
+
+real_article.py and the Streamlit app parse the completion themselves (their
+prompts and progress displays differ) and then hand the article to
+postprocess_article(), which:
+
+- Writes the sections of an outline (the "outline" engine, see outline_engine.py)
+- Repairs fields that break the schema (structured mode, see article_schema.py)
+- Puts the real author in the article and its structured data
+- Truncates SEO fields over their limits and fills in missing social and
+  structured data
+- Drops links to blog posts that don't exist (see link_index.py)
+- Checks the SEO rules (see seo_rules.py)
+- Looks for published articles the result duplicates (see near_duplicates.py)
+
+Messages go through strapi_async.report(), so the app can send them to a
+job log with reporting_to().
+"""
+
+from datetime import datetime
+
+from article_corpus import article_url
+from article_schema import format_errors, repair_article, validate_article
+from link_index import fix_article_links
+from metrics import SEO_VIOLATIONS
+from near_duplicates import find_duplicates
+from outline_engine import write_sections
+from seo_rules import check_article, format_violation
+from strapi_async import report
+from tracing import traced
+
+META_TITLE_LIMIT = 60
+META_DESCRIPTION_LIMIT = 160
+SLUG_LIMIT = 75
+SOCIAL_IMAGE_PLACEHOLDER = "placeholder-will-be-replaced-with-featured-image"
+
+
+@traced()
+def postprocess_article(
+    seo_data,
+    author,
+    client,
+    deployment,
+    strapi,
+    system_prompt,
+    outlined=False,
+    structured=False,
+    cache=None,
+    link_instructions="",
+    on_section=None,
+):
+    """Finish a parsed article, returning (seo_data, duplicates)
+
+    duplicates are the (check, Match) pairs of find_duplicates() for the
+    finished article; whether to keep it is up to the caller.
+    on_section(index, markdown, done, total) reports written outline sections.
+    """
+    if outlined:
+        sections = seo_data["article"].get("outline") or []
+        report(f"✍️ Writing {len(sections)} sections in parallel...")
+        seo_data = write_sections(
+            client,
+            deployment,
+            system_prompt,
+            seo_data,
+            cache=cache,
+            on_section=on_section,
+            link_instructions=link_instructions,
+        )
+
+    if structured:
+        # Fix only the fields that break rules the API can't enforce
+        errors = validate_article(seo_data)
+        if errors:
+            report(f"🔧 Repairing invalid fields: {format_errors(errors)}")
+            seo_data, errors = repair_article(client, seo_data, errors, deployment)
+            if errors:
+                report(f"⚠️ Still invalid after repair: {format_errors(errors)}")
+
+    _use_real_author(seo_data, author)
+    if "seo" in seo_data:
+        _fit_seo_limits(seo_data)
+        _fill_structured_data(seo_data, author)
+
+    # Links to blog posts that don't exist are dropped (see link_index.py)
+    linked, removed, unchecked = fix_article_links(seo_data["article"])
+    report(f"🔗 {len(linked)} internal link(s)")
+    if unchecked:
+        report(
+            f"⚠️ No published articles are indexed, {len(unchecked)} blog link(s) "
+            "were kept unchecked"
+        )
+    if removed:
+        report(
+            f"⚠️ Removed links to unpublished posts: {', '.join(dict.fromkeys(removed))}"
+        )
+
+    # Rules the prompt asks for but nothing enforces (see seo_rules.py)
+    violations = check_article(seo_data)
+    if violations:
+        report(f"🔎 {len(violations)} SEO issue(s) in the generated article:")
+    for violation in violations:
+        SEO_VIOLATIONS.inc(rule=violation.rule)
+        report(f"  {format_violation(violation)}")
+
+    return seo_data, find_duplicates(strapi, article=seo_data["article"])
+
+
+def _use_real_author(seo_data, author):
+    if "author" not in seo_data:
+        report(f"⚠️ Adding missing author information: {author['name']}")
+        seo_data["author"] = author
+    elif seo_data["author"].get("name") != author["name"]:
+        report(f"⚠️ Replacing generated author with real author: {author['name']}")
+        seo_data["author"] = author
+
+
+def _fit_seo_limits(seo_data):
+    seo = seo_data["seo"]
+    if len(seo.get("metaTitle", "")) > META_TITLE_LIMIT:
+        original = seo["metaTitle"]
+        seo["metaTitle"] = original[: META_TITLE_LIMIT - 3] + "..."
+        report(
+            f"⚠️ Meta title truncated from {len(original)} to {META_TITLE_LIMIT} characters"
+        )
+
+    if len(seo.get("metaDescription", "")) > META_DESCRIPTION_LIMIT:
+        original = seo["metaDescription"]
+        seo["metaDescription"] = original[: META_DESCRIPTION_LIMIT - 3] + "..."
+        report(
+            f"⚠️ Meta description truncated from {len(original)} to "
+            f"{META_DESCRIPTION_LIMIT} characters"
+        )
+
+    article = seo_data.get("article", {})
+    if len(article.get("slug", "")) > SLUG_LIMIT:
+        original = article["slug"]
+        article["slug"] = original[: SLUG_LIMIT - 3] + "..."
+        report(f"⚠️ Slug truncated from {len(original)} to {SLUG_LIMIT} characters")
+
+    if "metaSocial" in seo:
+        for social in seo["metaSocial"]:
+            social.setdefault("image", SOCIAL_IMAGE_PLACEHOLDER)
+    else:
+        report("⚠️ Adding missing social media metadata...")
+        seo["metaSocial"] = [
+            {
+                "socialNetwork": network,
+                "title": seo.get("metaTitle", article["title"]),
+                "description": seo.get("metaDescription", article["summary"]),
+                "image": SOCIAL_IMAGE_PLACEHOLDER,
+            }
+            for network in ("Facebook", "Twitter")
+        ]
+
+
+def _fill_structured_data(seo_data, author):
+    seo = seo_data["seo"]
+    if not seo.get("structuredData"):
+        report("⚠️ Adding missing structured data to SEO...")
+        now = datetime.now().isoformat()
+        seo["structuredData"] = {
+            "@context": "https://schema.org",
+            "@type": "Article",
+            "headline": seo_data["article"]["title"],
+            "description": seo_data["article"]["summary"],
+            "datePublished": now,
+            "dateModified": now,
+            "author": {"@type": "Person", "name": author["name"]},
+            "mainEntityOfPage": {
+                "@type": "WebPage",
+                "@id": article_url(seo_data["article"]["slug"]),
+            },
+        }
+    elif seo["structuredData"].get("author", {}).get("name") != author["name"]:
+        report(f"⚠️ Updating author in structured data to: {author['name']}")
+        seo["structuredData"]["author"] = {"@type": "Person", "name": author["name"]}
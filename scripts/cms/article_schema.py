@@ -0,0 +1,359 @@
+#!/usr/bin/env python3
+"""
+Article schema, validation and targeted repair
+
+The JSON schema of a generated article, shared by real_article.py and
+article_generator_app.py. In structured output mode the schema is sent as the
+response_format, so the model can't omit fields or change their types, and
+the free-text JSON template is dropped from the prompt.
+
+Rules the API can't enforce (length limits, slug format, no H1 headings) are
+checked by validate_article(). Fields that break them are fixed with a small
+repair prompt that asks for just those fields instead of a full regeneration.
+"""
+
+import json
+import os
+import re
+
+from json_stream import JSONStreamError, extract_json
+from llm import stream_completion
+from seo_rules import parse_headings
+
+# Enable structured output mode by default (--structured / the app checkbox)
+STRUCTURED_OUTPUT = os.getenv("STRUCTURED_OUTPUT", "0").lower() in ("1", "true", "yes")
+
+# Repair prompts sent before giving up and falling back to post-processing
+REPAIR_ATTEMPTS = int(os.getenv("REPAIR_ATTEMPTS", "2"))
+
+# Keywords that structured outputs don't support; only checked locally
+LOCAL_ONLY_KEYWORDS = ("maxLength", "minLength", "pattern", "minItems")
+
+SLUG_PATTERN = r"^[a-z0-9]+(-[a-z0-9]+)*$"
+
+# Enumerations of the shared Strapi components (cms/src/components/shared)
+REFERENCE_TYPES = [
+    "Website",
+    "Book",
+    "Journal",
+    "Article",
+    "Research Paper",
+    "Video",
+    "Podcast",
+    "Interview",
+    "Other",
+]
+SOCIAL_PLATFORMS = [
+    "Twitter",
+    "Facebook",
+    "Instagram",
+    "LinkedIn",
+    "YouTube",
+    "GitHub",
+    "Website",
+    "Medium",
+    "TikTok",
+    "Other",
+]
+
+
+def _string(description=None, **rules):
+    schema = {"type": "string", **rules}
+    if description:
+        schema["description"] = description
+    return schema
+
+
+def _object(**properties):
+    return {
+        "type": "object",
+        "properties": properties,
+        "required": list(properties),
+        "additionalProperties": False,
+    }
+
+
+def _array(items, **rules):
+    return {"type": "array", "items": items, **rules}
+
+
+def _taxonomy(kind):
+    return _object(
+        name=_string(f"{kind} name in sentence case"),
+        slug=_string(f"URL-friendly {kind.lower()} slug", pattern=SLUG_PATTERN),
+        description=_string(f"One sentence {kind.lower()} description"),
+    )
+
+
+ARTICLE_SCHEMA = _object(
+    article=_object(
+        title=_string("SEO-optimized title with the primary keyword", maxLength=70),
+        slug=_string(
+            "URL-friendly slug with the primary keyword",
+            maxLength=75,
+            pattern=SLUG_PATTERN,
+        ),
+        summary=_string(
+            "Compelling 1-2 sentence summary with the primary keyword", maxLength=160
+        ),
+        content=_string(
+            "Full markdown content with H2 and H3 headings (NO H1), lists, examples"
+        ),
+        readingTime={"type": "integer", "description": "Reading time in minutes"},
+        ctas=_array(
+            _object(
+                text=_string(),
+                url=_string(),
+                type=_string(enum=["primary", "secondary", "tertiary", "link"]),
+                newTab={"type": "boolean"},
+                icon=_string(),
+            )
+        ),
+        references=_array(
+            _object(
+                title=_string(),
+                url=_string(),
+                authors=_string(),
+                publisher=_string(),
+                publishDate=_string("YYYY-MM-DD"),
+                description=_string(),
+                referenceType=_string(enum=REFERENCE_TYPES),
+            )
+        ),
+    ),
+    seo=_object(
+        metaTitle=_string("Keyword-rich title", maxLength=60),
+        metaDescription=_string(
+            "Meta description with the primary keyword", maxLength=160
+        ),
+        keywords=_string(
+            "3-5 comma-separated keywords, each used at least twice in the content"
+        ),
+        metaRobots=_string("e.g. index, follow"),
+        canonicalURL=_string("https://bugninja.ai/blog/<article slug>"),
+        preventIndexing={"type": "boolean"},
+        structuredData=_object(
+            **{
+                "@context": _string(enum=["https://schema.org"]),
+                "@type": _string(enum=["Article"]),
+                "headline": _string("Same as the title"),
+                "description": _string("Same as the summary"),
+                "image": _string("Filled automatically"),
+                "datePublished": _string("Filled automatically"),
+                "dateModified": _string("Filled automatically"),
+                "author": _object(
+                    **{"@type": _string(enum=["Person"]), "name": _string()}
+                ),
+                "mainEntityOfPage": _object(
+                    **{"@type": _string(enum=["WebPage"]), "@id": _string()}
+                ),
+            }
+        ),
+        metaSocial=_array(
+            _object(
+                socialNetwork=_string(enum=["Facebook", "Twitter"]),
+                title=_string(maxLength=60),
+                description=_string(maxLength=160),
+                image=_string("Filled automatically with the featured image"),
+            ),
+            minItems=1,
+        ),
+    ),
+    author=_object(
+        name=_string(),
+        slug=_string(),
+        email=_string(),
+        bio=_string(),
+        role=_string(),
+        expertise=_string(),
+        socialLinks=_array(
+            _object(
+                platform=_string(enum=SOCIAL_PLATFORMS),
+                url=_string(),
+                username=_string(),
+            )
+        ),
+    ),
+    categories=_array(_taxonomy("Category"), minItems=1),
+    tags=_array(_taxonomy("Tag"), minItems=1),
+)
+
+
+def api_schema(schema=ARTICLE_SCHEMA):
+    """Return the schema without the keywords structured outputs reject"""
+    if isinstance(schema, dict):
+        return {
+            key: api_schema(value)
+            for key, value in schema.items()
+            if key not in LOCAL_ONLY_KEYWORDS
+        }
+    if isinstance(schema, list):
+        return [api_schema(value) for value in schema]
+    return schema
+
+
+def article_response_format():
+    """response_format for chat.completions.create in structured output mode"""
+    return {
+        "type": "json_schema",
+        "json_schema": {"name": "seo_article", "strict": True, "schema": api_schema()},
+    }
+
+
+# Validation
+
+_TYPES = {
+    "object": lambda v: isinstance(v, dict),
+    "array": lambda v: isinstance(v, list),
+    "string": lambda v: isinstance(v, str),
+    "boolean": lambda v: isinstance(v, bool),
+    "integer": lambda v: isinstance(v, int) and not isinstance(v, bool),
+}
+
+
+def validate(value, schema, path=()):
+    """Check a value against the subset of JSON schema used here
+
+    Returns a list of (path, message) tuples; path is a tuple of keys and
+    list indexes such as ("categories", 0, "slug").
+    """
+    expected = schema.get("type")
+    if expected and not _TYPES[expected](value):
+        return [(path, f"must be a JSON {expected}")]
+
+    errors = []
+    if expected == "object":
+        for key in schema.get("required", []):
+            if key not in value:
+                errors.append((path + (key,), "is missing"))
+        for key, subschema in schema.get("properties", {}).items():
+            if key in value:
+                errors.extend(validate(value[key], subschema, path + (key,)))
+    elif expected == "array":
+        if len(value) < schema.get("minItems", 0):
+            errors.append((path, f"needs at least {schema['minItems']} item(s)"))
+        for i, item in enumerate(value):
+            errors.extend(validate(item, schema["items"], path + (i,)))
+    elif expected == "string":
+        if "maxLength" in schema and len(value) > schema["maxLength"]:
+            errors.append(
+                (path, f"is {len(value)} characters, maximum is {schema['maxLength']}")
+            )
+        if "pattern" in schema and not re.match(schema["pattern"], value):
+            errors.append((path, f"must match {schema['pattern']}"))
+        if "enum" in schema and value not in schema["enum"]:
+            errors.append((path, f"must be one of {', '.join(schema['enum'])}"))
+    return errors
+
+
+def _has_h1(markdown):
+    return any(heading.level == 1 for heading in parse_headings(markdown))
+
+
+def validate_article(data):
+    """Validate a generated article, returning a list of (path, message)"""
+    # The generated author is replaced with the real one from Strapi anyway
+    errors = [
+        (path, message)
+        for path, message in validate(data, ARTICLE_SCHEMA)
+        if path[:1] != ("author",)
+    ]
+    content = (data.get("article") or {}).get("content")
+    if isinstance(content, str) and _has_h1(content):
+        errors.append((("article", "content"), "must not contain H1 (# ) headings"))
+    return errors
+
+
+def format_path(path):
+    """("categories", 0, "slug") -> "categories.0.slug" """
+    return ".".join(str(part) for part in path)
+
+
+def format_errors(errors):
+    return "; ".join(f"{format_path(path)} {message}" for path, message in errors)
+
+
+def _get_path(data, path):
+    for key in path:
+        try:
+            data = data[key]
+        except (KeyError, IndexError, TypeError):
+            return None
+    return data
+
+
+def _set_path(data, path, value):
+    for key in path[:-1]:
+        if isinstance(data, dict) and not isinstance(data.get(key), (dict, list)):
+            data[key] = {}
+        data = data[key]
+    data[path[-1]] = value
+
+
+def _schema_at(path):
+    schema = ARTICLE_SCHEMA
+    for key in path:
+        schema = schema["items"] if isinstance(key, int) else schema["properties"][key]
+    return schema
+
+
+# Repair
+
+REPAIR_SYSTEM_PROMPT = """
+You fix individual fields of a generated SEO article. You get a list of field
+paths with the problem, the current value and the JSON schema of each field.
+Return a JSON object whose keys are exactly those field paths and whose values
+are the corrected values. Keep everything that is not broken unchanged.
+"""
+
+
+def repair_prompt(data, errors):
+    """Build the user prompt asking for corrected values of the bad fields"""
+    lines = []
+    for path, message in errors:
+        current = _get_path(data, path)
+        lines.append(
+            f"- {format_path(path)}: {message}\n"
+            f"  current value: {json.dumps(current, ensure_ascii=False)}\n"
+            f"  schema: {json.dumps(api_schema(_schema_at(path)))}"
+        )
+    title = _get_path(data, ("article", "title"))
+    return (
+        f"Article title: {title}\n\n"
+        "Fix these fields:\n" + "\n".join(lines) + "\n\nReturn only the JSON object."
+    )
+
+
+def repair_article(client, data, errors, model, max_attempts=REPAIR_ATTEMPTS):
+    """Ask the model to fix only the invalid fields of an article in place
+
+    Returns (data, remaining_errors). Errors left after max_attempts are
+    handled by the usual post-processing (truncation, defaults).
+    """
+    for _ in range(max_attempts):
+        if not errors:
+            break
+        paths = {format_path(path): path for path, _ in errors}
+        rewrites_content = any(path[:2] == ("article", "content") for path, _ in errors)
+
+        text, _ = stream_completion(
+            client,
+            model=model,
+            messages=[
+                {"role": "system", "content": REPAIR_SYSTEM_PROMPT},
+                {"role": "user", "content": repair_prompt(data, errors)},
+            ],
+            response_format={"type": "json_object"},
+            temperature=0,
+            max_tokens=4000 if rewrites_content else 1000,
+        )
+        try:
+            fixes = extract_json(text)
+        except JSONStreamError:
+            continue
+
+        for key, value in fixes.items():
+            if key in paths:
+                _set_path(data, paths[key], value)
+        errors = validate_article(data)
+    return data, errors
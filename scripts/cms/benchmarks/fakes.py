@@ -0,0 +1,678 @@
+#!/usr/bin/env python3
+"""
+Offline stand-ins for Strapi and Azure OpenAI
+
+Two small HTTP servers that speak just enough of each API for
+real_article.py, strapi_async.py and bulk_publisher.py to run against them:
+
+- FakeOpenAIHandler: Azure chat completions (streamed or not). Returns a
+  valid article JSON for article prompts, an outline for outline prompts and
+  markdown for section prompts, with a configurable length and token rate.
+  The markdown links to the first suggested blog post in the prompt and to
+  a made-up one, like a model that half follows the link instructions
+- FakeStrapiHandler: an in-memory Strapi v4 REST API with authors,
+  categories, tags, articles, media uploads and POST /articles/bulk
+
+Both take FakeSettings: a base latency with jitter, and an error rate that
+answers a fraction of requests with 429 (OpenAI) or 503 (Strapi), which the
+clients retry. GET /__stats returns request counts per route.
+
+Run one on its own to point the app or the CLI at it:
+
+    python fakes.py strapi --port 1337 --latency 0.05
+    python fakes.py openai --port 8001 --tokens-per-second 300
+"""
+
+import argparse
+import itertools
+import json
+import random
+import re
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+# Characters per streamed token, roughly what GPT tokenizers average in English
+CHARS_PER_TOKEN = 4
+# Tokens sent per SSE chunk, so slow token rates don't mean thousands of sleeps
+TOKENS_PER_CHUNK = 8
+
+WORDS = (
+    "test automation selenium browser regression flaky suite coverage pipeline "
+    "release quality engineer framework locator assertion report debug team"
+).split()
+
+
+class FakeSettings:
+    """Latency and failure behaviour of a fake server"""
+
+    def __init__(self, latency=0.0, jitter=0.0, error_rate=0.0, seed=None, **options):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+        # Server specific settings, e.g. article_words or seed_entries
+        self.options = options
+
+    def delay(self):
+        seconds = self.latency + self.random.uniform(-self.jitter, self.jitter)
+        if seconds > 0:
+            time.sleep(seconds)
+
+    def should_fail(self):
+        return self.error_rate > 0 and self.random.random() < self.error_rate
+
+
+class _FakeHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    error_status = 503
+
+    def log_message(self, format, *args):
+        pass
+
+    @property
+    def settings(self):
+        return self.server.settings
+
+    def _route(self):
+        """Route name for the stats, with IDs replaced by :id"""
+        path = re.sub(r"/\d+(?=/|$)", "/:id", urlsplit(self.path).path)
+        return f"{self.command} {path}"
+
+    def _count(self, key):
+        with self.server.lock:
+            self.server.stats[key] += 1
+
+    def _read_body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return self.rfile.read(length) if length else b""
+
+    def _send_json(self, body, status=200, headers=None):
+        encoded = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(encoded)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(encoded)
+
+    def _handle(self, dispatch):
+        if urlsplit(self.path).path == "/__stats":
+            with self.server.lock:
+                return self._send_json(dict(self.server.stats))
+
+        body = self._read_body()
+        self._count(self._route())
+        self.settings.delay()
+        if self.settings.should_fail():
+            self._count("errors")
+            return self._send_json(
+                {"error": {"message": "Injected failure"}},
+                status=self.error_status,
+                headers={"Retry-After": "0"},
+            )
+        dispatch(body)
+
+
+# Azure OpenAI
+
+
+def _words(rng, count):
+    return " ".join(rng.choice(WORDS) for _ in range(count))
+
+
+def _paragraphs(rng, words):
+    paragraphs = []
+    while words > 0:
+        size = min(words, 80)
+        paragraphs.append(_words(rng, size).capitalize() + ".")
+        words -= size
+    return "\n\n".join(paragraphs)
+
+
+def _slugify(text):
+    return re.sub(r"[^a-z0-9]+", "-", text.lower()).strip("-")[:60] or "article"
+
+
+def fake_article(topic, number, words, rng, outline=False):
+    """A generated article dict that passes the article schema's rules"""
+    title = f"{topic[:50]} {number}".strip()
+    slug = _slugify(title)
+    summary = f"A practical look at {topic[:80]}."
+    sections = [f"Section {i + 1} on {rng.choice(WORDS)}" for i in range(6)]
+    article = {
+        "title": title,
+        "slug": slug,
+        "summary": summary,
+        "readingTime": max(1, words // 200),
+        "ctas": [
+            {
+                "text": "Try it",
+                "url": "https://bugninja.ai",
+                "type": "primary",
+                "newTab": False,
+                "icon": "",
+            }
+        ],
+        "references": [],
+    }
+    if outline:
+        article["content"] = ""
+        article["outline"] = [
+            {"heading": h, "keyPoints": ["one", "two"], "targetWords": words // 6}
+            for h in sections
+        ]
+    else:
+        article["content"] = "\n\n".join(
+            f"## {h}\n\n{_paragraphs(rng, words // len(sections))}" for h in sections
+        )
+    return {
+        "article": article,
+        "seo": {
+            "metaTitle": title[:60],
+            "metaDescription": summary[:160],
+            "keywords": "test automation, selenium, regression",
+            "metaRobots": "index, follow",
+            "canonicalURL": f"https://bugninja.ai/blog/{slug}",
+            "preventIndexing": False,
+            "structuredData": {
+                "@context": "https://schema.org",
+                "@type": "Article",
+                "headline": title,
+                "description": summary,
+                "image": "",
+                "datePublished": "",
+                "dateModified": "",
+                "author": {"@type": "Person", "name": "Benchmark Author"},
+                "mainEntityOfPage": {
+                    "@type": "WebPage",
+                    "@id": f"https://bugninja.ai/blog/{slug}",
+                },
+            },
+            "metaSocial": [
+                {
+                    "socialNetwork": "Twitter",
+                    "title": title[:60],
+                    "description": summary,
+                    "image": "",
+                }
+            ],
+        },
+        "author": {"name": "Benchmark Author"},
+        # A small shared vocabulary, so categories and tags are mostly reused
+        "categories": [
+            {"name": name.capitalize(), "slug": name, "description": f"All on {name}"}
+            for name in rng.sample(WORDS[:6], 2)
+        ],
+        "tags": [
+            {"name": name.capitalize(), "slug": name, "description": f"All on {name}"}
+            for name in rng.sample(WORDS, 3)
+        ],
+    }
+
+
+class FakeOpenAIHandler(_FakeHandler):
+    """POST /openai/deployments/<deployment>/chat/completions
+
+    Options: article_words (default 1200) and tokens_per_second (0 streams as
+    fast as possible).
+    """
+
+    error_status = 429
+
+    def do_GET(self):
+        self._handle(lambda body: self._send_json({"error": "Not found"}, status=404))
+
+    def do_POST(self):
+        self._handle(self._complete)
+
+    def _internal_links(self, prompt):
+        suggested = re.search(
+            r'^- ".*": (https://bugninja\.ai/blog/\S+)$', prompt, re.M
+        )
+        if not suggested:
+            return ""
+        return (
+            f"\n\nRead [our earlier post]({suggested.group(1)}) and "
+            "[a post that doesn't exist](https://bugninja.ai/blog/made-up-post)."
+        )
+
+    def _completion_text(self, request):
+        prompt = request["messages"][-1]["content"]
+        options = self.settings.options
+        words = options.get("article_words", 1200)
+        with self.server.lock:
+            number = next(self.server.sequence)
+            rng = random.Random(number)
+
+        section = re.search(r'Write ONLY section \d+: "(.*)"', prompt)
+        if section:
+            return (
+                f"## {section.group(1)}\n\n{_paragraphs(rng, words // 6)}"
+                + self._internal_links(prompt)
+            )
+
+        topic = re.search(r"article about '(.*?)'", prompt, re.S)
+        topic = topic.group(1) if topic else "Test automation"
+        article = fake_article(
+            topic, number, words, rng, outline="OUTLINE MODE" in prompt
+        )
+        if article["article"]["content"]:
+            article["article"]["content"] += self._internal_links(prompt)
+        return json.dumps(article)
+
+    def _complete(self, body):
+        request = json.loads(body or b"{}")
+        text = self._completion_text(request)
+        model = request.get("model", "gpt-4")
+        tokens = max(1, len(text) // CHARS_PER_TOKEN)
+        usage = {
+            "prompt_tokens": sum(
+                len(m.get("content") or "") // CHARS_PER_TOKEN
+                for m in request["messages"]
+            ),
+            "completion_tokens": tokens,
+        }
+        usage["total_tokens"] = usage["prompt_tokens"] + tokens
+
+        if not request.get("stream"):
+            return self._send_json(
+                {
+                    "id": "chatcmpl-fake",
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": model,
+                    "choices": [
+                        {
+                            "index": 0,
+                            "message": {"role": "assistant", "content": text},
+                            "finish_reason": "stop",
+                        }
+                    ],
+                    "usage": usage,
+                }
+            )
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+
+        def event(delta, finish_reason=None, **extra):
+            chunk = {
+                "id": "chatcmpl-fake",
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [
+                    {"index": 0, "delta": delta, "finish_reason": finish_reason}
+                ],
+                **extra,
+            }
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+
+        rate = self.settings.options.get("tokens_per_second", 0)
+        step = TOKENS_PER_CHUNK * CHARS_PER_TOKEN
+        for start in range(0, len(text), step):
+            event({"content": text[start : start + step]})
+            self.wfile.flush()
+            if rate:
+                time.sleep(TOKENS_PER_CHUNK / rate)
+        event({}, "stop")
+        if (request.get("stream_options") or {}).get("include_usage"):
+            self.wfile.write(
+                (
+                    "data: "
+                    + json.dumps(
+                        {
+                            "id": "chatcmpl-fake",
+                            "object": "chat.completion.chunk",
+                            "created": int(time.time()),
+                            "model": model,
+                            "choices": [],
+                            "usage": usage,
+                        }
+                    )
+                    + "\n\n"
+                ).encode("utf-8")
+            )
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+
+
+# Strapi
+
+COLLECTIONS = ("authors", "categories", "tags", "articles")
+
+
+def _now():
+    return datetime.now(timezone.utc).isoformat(timespec="milliseconds")
+
+
+class FakeStrapiHandler(_FakeHandler):
+    """In-memory Strapi v4 REST API under /api
+
+    Option: seed_entries (default 100) categories and tags that exist up
+    front, so taxonomy syncs page through a realistic collection. Author 1
+    always exists.
+    """
+
+    def do_GET(self):
+        self._handle(lambda body: self._get())
+
+    def do_POST(self):
+        self._handle(self._post)
+
+    def do_PUT(self):
+        self._handle(self._put)
+
+    def do_DELETE(self):
+        self._handle(lambda body: self._delete())
+
+    def _parts(self):
+        url = urlsplit(self.path)
+        parts = [p for p in url.path.split("/") if p]
+        if parts[:1] == ["api"]:
+            parts = parts[1:]
+        query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        return parts, query
+
+    def _store(self):
+        return self.server.store
+
+    def _entry(self, collection, entry_id):
+        attributes = self._store()[collection].get(entry_id)
+        return {"id": entry_id, "attributes": attributes} if attributes else None
+
+    def _create(self, collection, data):
+        store = self._store()
+        with self.server.lock:
+            entry_id = next(self.server.ids)
+            now = _now()
+            store[collection][entry_id] = {**data, "createdAt": now, "updatedAt": now}
+        return self._entry(collection, entry_id)
+
+    def _get(self):
+        parts, query = self._parts()
+        store = self._store()
+        if parts[:2] == ["upload", "files"] and len(parts) == 3:
+            media = store["media"].get(int(parts[2]))
+            if media is None:
+                return self._send_json({"error": {"status": 404}}, status=404)
+            return self._send_json({"id": int(parts[2]), **media})
+
+        if not parts or parts[0] not in COLLECTIONS:
+            return self._send_json({"error": {"status": 404}}, status=404)
+        collection = parts[0]
+        if parts == ["articles", "content"]:
+            return self._article_content(query)
+        if parts == ["articles", "references"]:
+            return self._article_references(query)
+        if len(parts) == 2:
+            entry = self._entry(collection, int(parts[1]))
+            if entry is None:
+                return self._send_json({"error": {"status": 404}}, status=404)
+            return self._send_json({"data": entry})
+
+        if collection == "articles":
+            page, size = int(query.get("page", 1)), int(query.get("pageSize", 25))
+        else:
+            page = int(query.get("pagination[page]", 1))
+            size = int(query.get("pagination[pageSize]", 25))
+        since = query.get("filters[updatedAt][$gt]")
+        with self.server.lock:
+            entries = [
+                {"id": entry_id, "attributes": attributes}
+                for entry_id, attributes in sorted(store[collection].items())
+                if not since or attributes["updatedAt"] > since
+            ]
+        page_count = max(1, -(-len(entries) // size))
+        self._send_json(
+            {
+                "data": entries[(page - 1) * size : page * size],
+                "meta": {
+                    "pagination": {
+                        "page": page,
+                        "pageSize": size,
+                        "pageCount": page_count,
+                        "total": len(entries),
+                    }
+                },
+            }
+        )
+
+    def _article_references(self, query):
+        # Mirrors findReferences in cms/src/api/article/controllers/article.js
+        fields = {
+            "media": [("articles", "featuredImage"), ("authors", "profilePicture")],
+            "authors": [("articles", "author")],
+            "categories": [("articles", "categories")],
+            "tags": [("articles", "tags")],
+        }.get(query.get("collection"))
+        if not fields or not query.get("id", "").isdigit():
+            return self._send_json({"error": {"status": 400}}, status=400)
+        entity_id = int(query["id"])
+        data = {}
+        with self.server.lock:
+            for collection, field in fields:
+                data.setdefault(collection, 0)
+                for attributes in self._store()[collection].values():
+                    value = attributes.get(field)
+                    if value == entity_id or (
+                        isinstance(value, list) and entity_id in value
+                    ):
+                        data[collection] += 1
+        self._send_json({"data": data})
+
+    def _article_content(self, query):
+        # Mirrors findContent in cms/src/api/article/controllers/article.js
+        page = int(query.get("page", 1))
+        size = min(int(query.get("pageSize", 25)), 100)
+        since = query.get("updatedSince")
+        with self.server.lock:
+            articles = sorted(
+                (
+                    (attributes["updatedAt"], entry_id, attributes)
+                    for entry_id, attributes in self._store()["articles"].items()
+                    if not since or attributes["updatedAt"] > since
+                ),
+                key=lambda article: article[:2],
+            )
+        entries = []
+        for _, entry_id, attributes in articles[(page - 1) * size : page * size]:
+            seo = attributes.get("seo")
+            fields = ("title", "slug", "summary", "content", "updatedAt")
+            entries.append(
+                {
+                    "id": entry_id,
+                    "attributes": {
+                        **{field: attributes.get(field) for field in fields},
+                        "seo": (
+                            {
+                                field: seo.get(field)
+                                for field in (
+                                    "metaTitle",
+                                    "metaDescription",
+                                    "keywords",
+                                )
+                            }
+                            if seo
+                            else None
+                        ),
+                    },
+                }
+            )
+        self._send_json(
+            {
+                "data": entries,
+                "meta": {
+                    "pagination": {
+                        "page": page,
+                        "pageSize": size,
+                        "pageCount": max(1, -(-len(articles) // size)),
+                        "total": len(articles),
+                    }
+                },
+            }
+        )
+
+    def _post(self, body):
+        parts, query = self._parts()
+        if parts == ["upload"]:
+            return self._upload(body, query)
+        if parts == ["articles", "bulk"]:
+            return self._bulk(json.loads(body))
+        if len(parts) != 1 or parts[0] not in COLLECTIONS:
+            return self._send_json({"error": {"status": 404}}, status=404)
+        data = json.loads(body).get("data") or {}
+        self._send_json({"data": self._create(parts[0], data)})
+
+    def _upload(self, body, query):
+        store = self._store()
+        if "id" in query:
+            media_id = int(query["id"])
+            if media_id not in store["media"]:
+                return self._send_json({"error": {"status": 404}}, status=404)
+            return self._send_json({"id": media_id, **store["media"][media_id]})
+        filename = re.search(rb'filename="([^"]*)"', body)
+        name = filename.group(1).decode("utf-8") if filename else "upload"
+        with self.server.lock:
+            media_id = next(self.server.ids)
+            store["media"][media_id] = {"name": name, "size": len(body)}
+        self._send_json([{"id": media_id, "name": name, "size": len(body)}])
+
+    def _bulk(self, request):
+        # Mirrors bulkCreate in cms/src/api/article/services/article.js
+        created = {"categories": [], "tags": []}
+        articles = []
+        store = self._store()
+        for article in request.get("data") or []:
+            data = dict(article)
+            for field in created:
+                ids = []
+                for ref in article.get(field) or []:
+                    if isinstance(ref, int):
+                        ids.append(ref)
+                        continue
+                    with self.server.lock:
+                        match = next(
+                            (
+                                entry_id
+                                for entry_id, attributes in store[field].items()
+                                if attributes["name"].lower() == ref["name"].lower()
+                                # "ci-cd" also matches "ci-cd-1712345678"
+                                or re.sub(r"-\d{10}$", "", attributes["slug"] or "")
+                                == ref.get("slug")
+                            ),
+                            None,
+                        )
+                    if match is None:
+                        match = self._create(field, ref)["id"]
+                        created[field].append(
+                            {"id": match, "name": ref["name"], "slug": ref.get("slug")}
+                        )
+                    ids.append(match)
+                data[field] = ids
+            entry = self._create("articles", data)
+            articles.append({"id": entry["id"], "slug": data.get("slug")})
+        self._send_json({"data": articles, "meta": {"created": created}})
+
+    def _put(self, body):
+        parts, _ = self._parts()
+        if len(parts) != 2 or parts[0] not in COLLECTIONS:
+            return self._send_json({"error": {"status": 404}}, status=404)
+        collection, entry_id = parts[0], int(parts[1])
+        with self.server.lock:
+            attributes = self._store()[collection].get(entry_id)
+            if attributes is not None:
+                attributes.update(json.loads(body).get("data") or {})
+                attributes["updatedAt"] = _now()
+        if attributes is None:
+            return self._send_json({"error": {"status": 404}}, status=404)
+        self._send_json({"data": self._entry(collection, entry_id)})
+
+    def _delete(self):
+        parts, _ = self._parts()
+        if parts[:2] == ["upload", "files"] and len(parts) == 3:
+            collection, entry_id = "media", int(parts[2])
+        elif len(parts) == 2 and parts[0] in COLLECTIONS:
+            collection, entry_id = parts[0], int(parts[1])
+        else:
+            return self._send_json({"error": {"status": 404}}, status=404)
+        with self.server.lock:
+            removed = self._store()[collection].pop(entry_id, None)
+        if removed is None:
+            return self._send_json({"error": {"status": 404}}, status=404)
+        self._send_json({"data": {"id": entry_id}})
+
+
+def make_server(handler, settings, host="127.0.0.1", port=0):
+    """Create (but don't start) a fake server; port 0 picks a free port"""
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    server.settings = settings
+    server.lock = threading.Lock()
+    server.stats = Counter()
+    server.sequence = itertools.count(1)
+    server.ids = itertools.count(1)
+    if handler is FakeStrapiHandler:
+        server.store = {name: {} for name in (*COLLECTIONS, "media")}
+        now = _now()
+        server.store["authors"][next(server.ids)] = {
+            "name": "Benchmark Author",
+            "slug": "benchmark-author",
+            "email": "author@example.com",
+            "bio": "Writes benchmark articles.",
+            "role": "QA Lead",
+            "expertise": "Test automation",
+            "updatedAt": now,
+        }
+        for i in range(settings.options.get("seed_entries", 100)):
+            for collection in ("categories", "tags"):
+                server.store[collection][next(server.ids)] = {
+                    "name": f"Seeded {collection} {i}",
+                    "slug": f"seeded-{collection}-{i}",
+                    "description": "",
+                    "updatedAt": now,
+                }
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("api", choices=["strapi", "openai"])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=0)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--article-words", type=int, default=1200)
+    parser.add_argument("--tokens-per-second", type=float, default=0)
+    parser.add_argument("--seed-entries", type=int, default=100)
+    args = parser.parse_args()
+
+    settings = FakeSettings(
+        args.latency,
+        args.jitter,
+        args.error_rate,
+        article_words=args.article_words,
+        tokens_per_second=args.tokens_per_second,
+        seed_entries=args.seed_entries,
+    )
+    handler = FakeStrapiHandler if args.api == "strapi" else FakeOpenAIHandler
+    server = make_server(handler, settings, args.host, args.port)
+    host, port = server.server_address[:2]
+    print(f"🧪 Fake {args.api} listening on http://{host}:{port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
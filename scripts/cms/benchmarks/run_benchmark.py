@@ -0,0 +1,420 @@
+#!/usr/bin/env python3
+"""
+End-to-end benchmark of the article pipeline, fully offline
+
+Starts the fake Azure OpenAI and Strapi servers from fakes.py in a child
+process and runs real_article.py's batch pipeline against them
+(generate_seo_content → upload_to_strapi, or the --async / --bulk variants).
+Reports:
+
+- Articles per minute (wall clock) and failures
+- p50/p95/max latency per stage: generate, upload and the upload steps
+  (image, taxonomy, article, bulk)
+- Peak RSS of the benchmark process (the fakes run in their own process)
+- Requests each fake served, per route
+- Prompt and completion tokens the API reported. The fake only sends usage
+  when the client asks for it, so the run fails if any completion streamed
+  without usage
+
+Every run uses a fresh cache directory, so indexes, the publish journal and
+the LLM cache start cold. Compare runs with --json to see whether a pooling,
+concurrency or caching change helps:
+
+    python benchmarks/run_benchmark.py --articles 40 --workers 8
+    python benchmarks/run_benchmark.py --articles 40 --workers 8 --async
+    python benchmarks/run_benchmark.py --articles 40 --topics 10 --cache
+"""
+
+import argparse
+import asyncio
+import contextlib
+import functools
+import glob
+import json
+import multiprocessing
+import os
+import resource
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+CMS_DIR = os.path.dirname(BENCHMARK_DIR)
+sys.path.insert(0, CMS_DIR)
+
+from fakes import FakeOpenAIHandler, FakeSettings, FakeStrapiHandler, make_server
+
+# Stages reported in this order; the rest follow alphabetically
+STAGE_ORDER = ["total", "generate", "upload", "image", "taxonomy", "article", "bulk"]
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of a list of numbers"""
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, round(fraction * len(ordered) + 0.5) - 1))
+    return ordered[index]
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+
+class StageTimer:
+    """Collects wall-clock durations per pipeline stage from any thread"""
+
+    def __init__(self):
+        self.samples = defaultdict(list)
+        self._lock = threading.Lock()
+
+    def record(self, stage, seconds):
+        with self._lock:
+            self.samples[stage].append(seconds)
+
+    def wrap(self, stage, func):
+        @functools.wraps(func)
+        def timed(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.record(stage, time.perf_counter() - started)
+
+        return timed
+
+    def wrap_async(self, stage, func):
+        @functools.wraps(func)
+        async def timed(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                self.record(stage, time.perf_counter() - started)
+
+        return timed
+
+    def summary(self):
+        def order(stage):
+            if stage in STAGE_ORDER:
+                return (STAGE_ORDER.index(stage), stage)
+            return (len(STAGE_ORDER), stage)
+
+        return {
+            stage: {
+                "count": len(values),
+                "p50": percentile(values, 0.50),
+                "p95": percentile(values, 0.95),
+                "max": max(values),
+            }
+            for stage, values in sorted(self.samples.items(), key=lambda s: order(s[0]))
+        }
+
+
+def _serve_fakes(openai_settings, strapi_settings, ports):
+    servers = [
+        make_server(FakeOpenAIHandler, openai_settings),
+        make_server(FakeStrapiHandler, strapi_settings),
+    ]
+    for server in servers:
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+    ports.put([server.server_address[1] for server in servers])
+    threading.Event().wait()
+
+
+def start_fakes(openai_settings, strapi_settings):
+    """Run both fakes in a child process; returns (process, openai port, strapi port)"""
+    ports = multiprocessing.Queue()
+    process = multiprocessing.Process(
+        target=_serve_fakes,
+        args=(openai_settings, strapi_settings, ports),
+        daemon=True,
+    )
+    process.start()
+    openai_port, strapi_port = ports.get(timeout=30)
+    return process, openai_port, strapi_port
+
+
+def fetch_stats(port):
+    with urllib.request.urlopen(f"http://127.0.0.1:{port}/__stats", timeout=10) as r:
+        return json.load(r)
+
+
+def instrument(real_article, timer):
+    """Time the pipeline stages by wrapping the functions the batch calls"""
+    import bulk_publisher
+    import strapi_async
+
+    ra = real_article
+    ra.generate_seo_content = timer.wrap("generate", ra.generate_seo_content)
+    ra.process_batch_item = timer.wrap("total", ra.process_batch_item)
+
+    # The sync pipeline runs the same async operations (see strapi_async.py)
+    strapi_async.upload_to_strapi_async = timer.wrap_async(
+        "upload", strapi_async.upload_to_strapi_async
+    )
+    strapi_async._upload_image = timer.wrap_async("image", strapi_async._upload_image)
+    strapi_async._select_or_create = timer.wrap_async(
+        "taxonomy", strapi_async._select_or_create
+    )
+    strapi_async.create_article = timer.wrap_async(
+        "article", strapi_async.create_article
+    )
+    bulk_publisher.BulkPublisher._post = timer.wrap(
+        "bulk", bulk_publisher.BulkPublisher._post
+    )
+
+
+def run_pipeline(real_article, jobs, workers, mode):
+    """Run the batch the way real_article.run_batch() would, returning results"""
+    ra = real_article
+    if mode == "bulk":
+        return ra.process_batch_bulk(jobs, workers)
+    if mode == "async":
+        loop = asyncio.new_event_loop()
+        loop.set_default_executor(ThreadPoolExecutor(max_workers=workers))
+        try:
+            return loop.run_until_complete(ra.process_batch_async(jobs, workers))
+        finally:
+            loop.close()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [
+            executor.submit(ra.process_batch_item, item, author)
+            for item, author in jobs
+        ]
+        return [future.result() for future in futures]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Benchmark article generation and publishing against local fakes"
+    )
+    parser.add_argument("--articles", type=int, default=20, help="Articles to run")
+    parser.add_argument(
+        "--topics",
+        type=int,
+        help="Distinct topics, repeated round-robin (default: one per article)",
+    )
+    parser.add_argument("--workers", type=int, default=4, help="Concurrent workers")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument(
+        "--async",
+        dest="mode",
+        action="store_const",
+        const="async",
+        help="Upload through the asyncio client (real_article.py --async)",
+    )
+    mode.add_argument(
+        "--bulk",
+        dest="mode",
+        action="store_const",
+        const="bulk",
+        help="Publish through /articles/bulk (real_article.py --bulk)",
+    )
+    parser.add_argument("--engine", choices=["single", "outline"], default="single")
+    parser.add_argument(
+        "--cache", action="store_true", help="Enable the LLM response cache"
+    )
+    parser.add_argument(
+        "--openai-latency",
+        type=float,
+        default=0.5,
+        help="Seconds before the first token (default: 0.5)",
+    )
+    parser.add_argument(
+        "--openai-tokens-per-second",
+        type=float,
+        default=400,
+        help="Streaming speed, 0 for no limit (default: 400)",
+    )
+    parser.add_argument("--openai-error-rate", type=float, default=0.0)
+    parser.add_argument(
+        "--article-words",
+        type=int,
+        default=1200,
+        help="Length of a generated article (default: 1200)",
+    )
+    parser.add_argument(
+        "--strapi-latency",
+        type=float,
+        default=0.03,
+        help="Seconds per Strapi request (default: 0.03)",
+    )
+    parser.add_argument("--strapi-error-rate", type=float, default=0.0)
+    parser.add_argument(
+        "--seed-entries",
+        type=int,
+        default=100,
+        help="Categories and tags that exist in the fake Strapi (default: 100)",
+    )
+    parser.add_argument(
+        "--jitter", type=float, default=0.0, help="± seconds of latency"
+    )
+    parser.add_argument("--seed", type=int, default=1, help="Random seed")
+    parser.add_argument("--json", metavar="PATH", help="Also write the report as JSON")
+    parser.add_argument(
+        "--verbose", action="store_true", help="Show the pipeline's own output"
+    )
+    args = parser.parse_args()
+    args.mode = args.mode or "sync"
+    if args.json:
+        # The benchmark runs in a temporary directory
+        args.json = os.path.abspath(args.json)
+    if args.articles < 1 or args.workers < 1:
+        parser.error("--articles and --workers must be at least 1")
+    return args
+
+
+def llm_usage():
+    """Token usage the pipeline recorded, and chunks streamed without usage"""
+    from metrics import LLM_STREAM_CHUNKS, LLM_TOKENS
+
+    return {
+        "input_tokens": LLM_TOKENS.total(type="input"),
+        "output_tokens": LLM_TOKENS.total(type="output"),
+        "chunks_without_usage": LLM_STREAM_CHUNKS.total(),
+    }
+
+
+def print_report(report):
+    print("\n📊 Benchmark results")
+    print(
+        f"  Mode: {report['mode']}, engine: {report['engine']}, "
+        f"workers: {report['workers']}, cache: {'on' if report['cache'] else 'off'}"
+    )
+    print(
+        f"  Articles: {report['succeeded']}/{report['articles']} published "
+        f"in {report['elapsed']:.1f}s → {report['articles_per_minute']:.1f} articles/min"
+    )
+    print(f"  Peak RSS: {report['peak_rss_mb']:.1f} MB")
+    usage = report["llm_usage"]
+    print(
+        f"  LLM usage: {usage['input_tokens']} input, "
+        f"{usage['output_tokens']} output tokens"
+    )
+    if usage["chunks_without_usage"]:
+        print(
+            f"  ⚠️ {usage['chunks_without_usage']} chunks were streamed without "
+            "token usage; token counts and rates are incomplete"
+        )
+    print(f"\n  {'Stage':<10} {'count':>6} {'p50':>9} {'p95':>9} {'max':>9}")
+    for stage, stats in report["stages"].items():
+        print(
+            f"  {stage:<10} {stats['count']:>6} {stats['p50']:>8.3f}s "
+            f"{stats['p95']:>8.3f}s {stats['max']:>8.3f}s"
+        )
+    for name in ("openai", "strapi"):
+        requests = report["requests"][name]
+        total = sum(v for k, v in requests.items() if k != "errors")
+        per_article = total / report["articles"]
+        print(
+            f"\n  {name} requests: {total} ({per_article:.1f} per article, "
+            f"{requests.get('errors', 0)} injected errors)"
+        )
+        for route, count in sorted(requests.items()):
+            if route != "errors":
+                print(f"    {count:>6}  {route}")
+
+
+def main():
+    args = parse_args()
+    openai_settings = FakeSettings(
+        args.openai_latency,
+        args.jitter,
+        args.openai_error_rate,
+        seed=args.seed,
+        article_words=args.article_words,
+        tokens_per_second=args.openai_tokens_per_second,
+    )
+    strapi_settings = FakeSettings(
+        args.strapi_latency,
+        args.jitter,
+        args.strapi_error_rate,
+        seed=args.seed,
+        seed_entries=args.seed_entries,
+    )
+    fakes, openai_port, strapi_port = start_fakes(openai_settings, strapi_settings)
+
+    workdir = tempfile.mkdtemp(prefix="cms-benchmark-")
+    # real_article.py reads its configuration when it is imported
+    os.environ.update(
+        STRAPI_API_URL=f"http://127.0.0.1:{strapi_port}/api",
+        STRAPI_API_TOKEN="benchmark",
+        AZURE_OPENAI_API_KEY="benchmark",
+        AZURE_OPENAI_ENDPOINT=f"http://127.0.0.1:{openai_port}",
+        CMS_CACHE_DIR=os.path.join(workdir, "cache"),
+    )
+    # Failed uploads are saved to the working directory
+    os.chdir(workdir)
+
+    stdout = sys.stdout if args.verbose else open(os.devnull, "w")
+    with contextlib.redirect_stdout(stdout):
+        import real_article
+        from llm_cache import get_response_cache
+
+        real_article.generation_engine = args.engine
+        if args.cache:
+            real_article.response_cache = get_response_cache()
+
+        timer = StageTimer()
+        instrument(real_article, timer)
+
+        images = sorted(glob.glob(os.path.join(CMS_DIR, "images", "*.png")))
+        topics = args.topics or args.articles
+        author = real_article.author_from_entry(
+            real_article.get_authors()[0], "test automation"
+        )
+        jobs = [
+            (
+                {
+                    "topic": f"Benchmark topic {i % topics + 1}",
+                    "image_path": images[i % len(images)],
+                },
+                author,
+            )
+            for i in range(args.articles)
+        ]
+
+        started = time.perf_counter()
+        results = run_pipeline(real_article, jobs, args.workers, args.mode)
+        elapsed = time.perf_counter() - started
+
+    succeeded = sum(1 for r in results if r["success"])
+    report = {
+        "mode": args.mode,
+        "engine": args.engine,
+        "workers": args.workers,
+        "cache": args.cache,
+        "articles": args.articles,
+        "succeeded": succeeded,
+        "elapsed": elapsed,
+        "articles_per_minute": succeeded / elapsed * 60 if elapsed else 0.0,
+        "peak_rss_mb": peak_rss_mb(),
+        "stages": timer.summary(),
+        "llm_usage": llm_usage(),
+        "requests": {
+            "openai": fetch_stats(openai_port),
+            "strapi": fetch_stats(strapi_port),
+        },
+        "settings": {
+            name: value for name, value in vars(args).items() if name != "json"
+        },
+    }
+    fakes.terminate()
+
+    print_report(report)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\n💾 Report written to {args.json}")
+    if succeeded < args.articles or report["llm_usage"]["chunks_without_usage"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Bulk publishing through the CMS's POST /articles/bulk endpoint
+
+Publishing article by article costs an /authors, /categories, /tags and
+/articles request each. BulkPublisher instead collects generated articles
+and sends them in groups, one request per group:
+
+- Categories and tags already in the local taxonomy index are sent as IDs;
+  new ones are sent inline ({name, slug, description}, with the generated
+  slug as is) and the CMS matches or creates them once per request, then
+  reports them back for the index
+- A group is created in one database transaction, so a failure leaves no
+  half-published articles or orphaned categories/tags behind
+- Groups hold at most BULK_SIZE articles and BULK_MAX_BYTES of JSON
+  (Strapi rejects bodies over 1 MB by default)
+
+Featured images are still uploaded one by one (multipart) before an article
+is added; the media index skips files that were uploaded before.
+"""
+
+import json
+import os
+import threading
+
+from article_corpus import get_article_corpus
+from metrics import ARTICLES_PUBLISHED
+from strapi_client import article_payload
+from taxonomy_index import get_taxonomy_index
+from tracing import traced
+
+BULK_SIZE = int(os.getenv("BULK_SIZE", "25"))
+BULK_MAX_BYTES = int(os.getenv("BULK_MAX_BYTES", str(900 * 1024)))
+
+
+def taxonomy_refs(index, generated):
+    """IDs of indexed categories/tags, inline objects for new ones
+
+    Inline slugs don't get unique_slug()'s timestamp, so the CMS can match
+    them against existing entries.
+    """
+    refs = []
+    for entry in generated:
+        entry_id = index.lookup(entry["name"], entry["slug"])
+        if entry_id is None:
+            entry_id = {
+                "name": entry["name"],
+                "slug": entry["slug"],
+                "description": entry["description"],
+            }
+        refs.append(entry_id)
+    return refs
+
+
+def bulk_entry(content, author_id, image_id, category_index, tag_index):
+    """One article of a /articles/bulk request"""
+    return article_payload(
+        content["article"],
+        content["seo"],
+        author_id,
+        taxonomy_refs(category_index, content["categories"]),
+        taxonomy_refs(tag_index, content["tags"]),
+        image_id,
+    )["data"]
+
+
+def group_entries(entries, size=BULK_SIZE, max_bytes=BULK_MAX_BYTES):
+    """Split (key, entry) pairs into groups by count and JSON size
+
+    An entry larger than max_bytes on its own is sent in a group by itself.
+    """
+    group, group_bytes = [], 0
+    for key, entry in entries:
+        entry_bytes = len(json.dumps(entry).encode("utf-8"))
+        if group and (len(group) >= size or group_bytes + entry_bytes > max_bytes):
+            yield group
+            group, group_bytes = [], 0
+        group.append((key, entry))
+        group_bytes += entry_bytes
+    if group:
+        yield group
+
+
+class BulkPublisher:
+    """Collects articles and publishes them in groups
+
+    add() can be called from several threads; a full group is sent by the
+    thread that filled it. Call flush() once everything was added. Results
+    are (key, article ID or None) pairs in the order groups were sent, where
+    key is whatever the caller passed to add() to identify the article.
+    """
+
+    def __init__(self, strapi, size=BULK_SIZE, max_bytes=BULK_MAX_BYTES):
+        self.strapi = strapi
+        self.size = size
+        self.max_bytes = max_bytes
+        self.article_corpus = get_article_corpus()
+        self.category_index = get_taxonomy_index("categories")
+        self.tag_index = get_taxonomy_index("tags")
+        self.results = []
+        self._pending = []
+        self._lock = threading.Lock()
+
+    def add(self, key, content, author_id, image_id):
+        entry = bulk_entry(
+            content, author_id, image_id, self.category_index, self.tag_index
+        )
+        with self._lock:
+            self._pending.append((key, entry))
+            if len(self._pending) < self.size:
+                return
+            batch, self._pending = self._pending, []
+        self._send(batch)
+
+    def flush(self):
+        """Send the articles that don't fill a whole group"""
+        with self._lock:
+            batch, self._pending = self._pending, []
+        if batch:
+            self._send(batch)
+        return self.results
+
+    def _send(self, batch):
+        for group in group_entries(batch, self.size, self.max_bytes):
+            try:
+                ids = self._post(group)
+            except Exception as e:
+                # Keep sending the other groups; these articles count as failed
+                print(f"❌ Bulk publish failed: {e}")
+                ids = [None] * len(group)
+            with self._lock:
+                self.results.extend(zip([key for key, _ in group], ids))
+
+    @traced("bulk_publish")
+    def _post(self, group):
+        print(f"📦 Publishing {len(group)} articles in one request...")
+        try:
+            response = self.strapi.post(
+                "/articles/bulk", json={"data": [entry for _, entry in group]}
+            )
+        except Exception as e:
+            print(f"❌ Bulk publish failed: {e}")
+            ARTICLES_PUBLISHED.inc(len(group), result="failed")
+            return [None] * len(group)
+
+        if response.status_code != 200:
+            print(
+                f"❌ Bulk publish failed, none of the {len(group)} articles were created"
+            )
+            print(f"Status code: {response.status_code}")
+            print(f"Response: {response.text}")
+            ARTICLES_PUBLISHED.inc(len(group), result="failed")
+            return [None] * len(group)
+
+        try:
+            body = response.json()
+            articles = body["data"]
+            # The CMS returns the articles in the order they were sent
+            ids = [article["id"] for article in articles]
+            if len(ids) != len(group):
+                # They were created all the same; match them up by slug
+                print(
+                    f"⚠️ Bulk publish returned {len(ids)} articles for "
+                    f"{len(group)} sent, matching them by slug"
+                )
+                by_slug = {article.get("slug"): article["id"] for article in articles}
+                ids = [by_slug.get(entry["slug"]) for _, entry in group]
+            created = body.get("meta", {}).get("created", {})
+        except (ValueError, KeyError, TypeError) as e:
+            print(f"❌ Unexpected bulk publish response: {e}")
+            print(f"Response: {response.text}")
+            ARTICLES_PUBLISHED.inc(len(group), result="failed")
+            return [None] * len(group)
+
+        published = sum(1 for article_id in ids if article_id)
+        ARTICLES_PUBLISHED.inc(published, result="ok")
+        if published < len(group):
+            print(
+                f"❌ {len(group) - published} of the articles sent weren't in the "
+                "response, check Strapi before publishing them again"
+            )
+            ARTICLES_PUBLISHED.inc(len(group) - published, result="failed")
+        print(
+            f"✅ Published {published} articles "
+            f"({len(created.get('categories', []))} new categories, "
+            f"{len(created.get('tags', []))} new tags)"
+        )
+
+        # The articles exist now; failing to record them locally must not
+        # report them as failed (and get them published twice)
+        try:
+            for collection, index in (
+                ("categories", self.category_index),
+                ("tags", self.tag_index),
+            ):
+                for entry in created.get(collection, []):
+                    index.add(entry["id"], entry["name"], entry["slug"])
+            for (_, entry), article_id in zip(group, ids):
+                if article_id:
+                    self.article_corpus.add(article_id, entry)
+        except Exception as e:
+            print(f"⚠️ Published, but failed to update the local indexes: {e}")
+        return ids
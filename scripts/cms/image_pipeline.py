@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Image preprocessing before upload to Strapi
+
+Editors upload multi-megabyte screenshots straight from their machines. Every
+featured and profile image now goes through prepare_image() before it is
+uploaded:
+
+- Detects the real format from the file contents (not the extension)
+- Applies the EXIF orientation, then strips EXIF/XMP metadata
+- Caps the pixel dimensions (IMAGE_MAX_DIMENSION, default 1920)
+- Re-encodes to WebP (or AVIF / the original format, see IMAGE_FORMAT)
+- Returns the bytes with the matching filename extension and MIME type
+
+Animated images and formats Pillow can't read (e.g. SVG) are uploaded as they
+are, with their real MIME type. Without Pillow installed every image is
+uploaded unchanged.
+"""
+
+import io
+import mimetypes
+import os
+from collections import namedtuple
+
+try:
+    from PIL import Image, ImageOps, UnidentifiedImageError, features
+except ImportError:  # Pillow is optional; images are then uploaded unchanged
+    Image = None
+
+IMAGE_PIPELINE = os.getenv("IMAGE_PIPELINE", "1").lower() in ("1", "true", "yes")
+# "webp", "avif" or "original" (recompress in the format it came in)
+IMAGE_FORMAT = os.getenv("IMAGE_FORMAT", "webp").lower()
+IMAGE_MAX_DIMENSION = int(os.getenv("IMAGE_MAX_DIMENSION", "1920"))
+IMAGE_QUALITY = int(os.getenv("IMAGE_QUALITY", "82"))
+
+MIME_TYPES = {
+    "PNG": "image/png",
+    "JPEG": "image/jpeg",
+    "GIF": "image/gif",
+    "WEBP": "image/webp",
+    "AVIF": "image/avif",
+}
+EXTENSIONS = {
+    "PNG": ".png",
+    "JPEG": ".jpg",
+    "GIF": ".gif",
+    "WEBP": ".webp",
+    "AVIF": ".avif",
+}
+
+# source is the path of a file uploaded as is, or the re-encoded bytes
+PreparedImage = namedtuple(
+    "PreparedImage",
+    ["filename", "source", "mime_type", "original_size", "size", "width", "height"],
+)
+
+
+def pipeline_signature():
+    """The settings that determine what an image is turned into"""
+    if not IMAGE_PIPELINE or Image is None:
+        return "original"
+    return f"{IMAGE_FORMAT}:{IMAGE_MAX_DIMENSION}:{IMAGE_QUALITY}"
+
+
+def _passthrough(image_path, size, mime_type=None):
+    mime_type = (
+        mime_type or mimetypes.guess_type(image_path)[0] or "application/octet-stream"
+    )
+    return PreparedImage(
+        os.path.basename(image_path), image_path, mime_type, size, size, None, None
+    )
+
+
+def _target_format(source_format):
+    if IMAGE_FORMAT == "avif" and features.check("avif"):
+        return "AVIF"
+    if IMAGE_FORMAT in ("webp", "avif") and features.check("webp"):
+        return "WEBP"
+    return source_format if source_format in MIME_TYPES else "PNG"
+
+
+def _encode(image, target_format):
+    if target_format == "JPEG" and image.mode not in ("RGB", "L"):
+        image = image.convert("RGB")
+    elif target_format in ("WEBP", "AVIF") and image.mode not in ("RGB", "RGBA"):
+        has_alpha = "A" in image.mode or "transparency" in image.info
+        image = image.convert("RGBA" if has_alpha else "RGB")
+
+    options = {"optimize": True}
+    if target_format in ("JPEG", "WEBP", "AVIF"):
+        options["quality"] = IMAGE_QUALITY
+    if target_format == "WEBP":
+        options["method"] = 6
+    # Keep the color profile; everything else (EXIF, XMP, comments) is dropped
+    if image.info.get("icc_profile"):
+        options["icc_profile"] = image.info["icc_profile"]
+
+    buffer = io.BytesIO()
+    image.save(buffer, format=target_format, **options)
+    return buffer.getvalue()
+
+
+def prepare_image(image_path):
+    """Shrink and re-encode an image for upload, returning a PreparedImage
+
+    The original file is never read into memory as a whole: Pillow decodes it
+    from disk, and a file uploaded as is stays a path to stream from.
+    """
+    original_size = os.path.getsize(image_path)
+
+    if not IMAGE_PIPELINE or Image is None:
+        return _passthrough(image_path, original_size)
+
+    try:
+        with Image.open(image_path) as source:
+            source_format = source.format
+            if getattr(source, "n_frames", 1) > 1:
+                # Re-encoding animations frame by frame isn't worth it here
+                return _passthrough(
+                    image_path, original_size, MIME_TYPES.get(source_format)
+                )
+            has_metadata = any(
+                key in source.info for key in ("exif", "xmp", "XML:com.adobe.xmp")
+            )
+            # Decodes the pixels and detaches them from the open file
+            image = ImageOps.exif_transpose(source)
+    except (UnidentifiedImageError, OSError):
+        return _passthrough(image_path, original_size)
+
+    resized = max(image.size) > IMAGE_MAX_DIMENSION
+    if resized:
+        image.thumbnail(
+            (IMAGE_MAX_DIMENSION, IMAGE_MAX_DIMENSION), Image.Resampling.LANCZOS
+        )
+
+    target_format = _target_format(source_format)
+    content = _encode(image, target_format)
+
+    # Re-encoding an already small, metadata-free file can make it bigger
+    if (
+        len(content) >= original_size
+        and not resized
+        and not has_metadata
+        and source_format in MIME_TYPES
+    ):
+        return _passthrough(image_path, original_size, MIME_TYPES[source_format])
+
+    stem = os.path.splitext(os.path.basename(image_path))[0]
+    return PreparedImage(
+        stem + EXTENSIONS[target_format],
+        content,
+        MIME_TYPES[target_format],
+        original_size,
+        len(content),
+        image.width,
+        image.height,
+    )
+
+
+def format_size(size):
+    """Human readable byte count, e.g. 1.1 MB"""
+    for unit in ("B", "KB", "MB"):
+        if size < 1024 or unit == "MB":
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+
+
+def describe(image):
+    """One-line summary of what the pipeline did, for logs and the UI"""
+    if image.width is None:
+        return f"{image.filename} uploaded as is ({format_size(image.original_size)})"
+    return (
+        f"{image.filename}: {format_size(image.original_size)} → "
+        f"{format_size(image.size)} ({image.width}x{image.height}, "
+        f"{image.mime_type})"
+    )
@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+"""
+Background jobs for the Streamlit app
+
+Generating and publishing an article used to run in the Streamlit script
+thread, so the session was blocked for the whole LLM call and a browser
+refresh threw the work away. They now run as jobs:
+
+- submit() starts the work on an in-process thread pool and returns a job ID
+- The job function reports progress, log messages and a live preview
+  through the Job handle it receives; nothing in here touches st.*
+- Status, progress and the JSON result are kept in a SQLite table in the
+  cache directory, so the UI can poll a job by ID and pick up its result
+  after a refresh or reconnect
+- Jobs still queued or running when the server stopped are marked failed
+  on the next start; finished jobs are deleted after JOB_RETENTION_DAYS
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from local_store import cache_path
+from metrics import JOBS_FINISHED, JOBS_IN_FLIGHT
+
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+JOB_RETENTION_DAYS = float(os.getenv("JOB_RETENTION_DAYS", "7"))
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINISHED = (DONE, FAILED, CANCELLED)
+
+_COLUMNS = (
+    "id",
+    "kind",
+    "title",
+    "status",
+    "progress",
+    "message",
+    "preview",
+    "events",
+    "result",
+    "error",
+    "pid",
+    "created_at",
+    "updated_at",
+)
+
+
+class JobCancelled(BaseException):
+    """Raised inside a job whose cancellation was requested
+
+    A BaseException (like Streamlit's own rerun exceptions) so the broad
+    `except Exception` handlers in the job functions don't swallow it.
+    """
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        pass
+    return True
+
+
+class Job:
+    """Handle a job function uses to report progress"""
+
+    def __init__(self, queue, job_id, cancel_event):
+        self.id = job_id
+        self._queue = queue
+        self._cancel_event = cancel_event
+        self._events = []
+
+    @property
+    def cancelled(self):
+        return self._cancel_event.is_set()
+
+    def check_cancelled(self):
+        if self.cancelled:
+            raise JobCancelled()
+
+    def update(self, message=None, progress=None, preview=None, title=None):
+        """Set the status message, progress (0-1), live preview markdown
+        and/or title
+
+        Arguments left as None keep their value; preview="" clears it.
+        Raises JobCancelled once the job was cancelled, which also stops a
+        streaming completion that reports through here.
+        """
+        self.check_cancelled()
+        changes = {}
+        if message is not None:
+            changes["message"] = message
+        if progress is not None:
+            changes["progress"] = min(max(progress, 0.0), 1.0)
+        if preview is not None:
+            changes["preview"] = preview
+        if title is not None:
+            changes["title"] = title
+        self._queue._update(self.id, **changes)
+
+    def log(self, level, message):
+        """Add a message shown under the job ("info", "warning" or "error")"""
+        self._events.append({"level": level, "message": message, "at": time.time()})
+        self._queue._update(self.id, events=json.dumps(self._events))
+
+
+class JobQueue:
+    """In-process worker pool with a persistent job table"""
+
+    def __init__(self, path=None, max_workers=JOB_WORKERS):
+        self.path = path or cache_path("jobs.sqlite3")
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="job"
+        )
+        self._futures = {}
+        self._cancel_events = {}
+        self._lock = threading.Lock()
+        with self._connect() as db:
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                "id TEXT PRIMARY KEY, kind TEXT NOT NULL, title TEXT, "
+                "status TEXT NOT NULL, progress REAL NOT NULL DEFAULT 0, "
+                "message TEXT, preview TEXT, events TEXT NOT NULL DEFAULT '[]', "
+                "result TEXT, error TEXT, pid INTEGER, "
+                "created_at REAL NOT NULL, updated_at REAL NOT NULL)"
+            )
+            db.execute("CREATE INDEX IF NOT EXISTS jobs_created ON jobs (created_at)")
+        self._recover()
+
+    @contextmanager
+    def _connect(self):
+        db = sqlite3.connect(self.path, timeout=30)
+        try:
+            with db:
+                yield db
+        finally:
+            db.close()
+
+    def _recover(self):
+        """Fail jobs whose process is gone and drop old finished jobs"""
+        now = time.time()
+        with self._connect() as db:
+            orphaned = [
+                job_id
+                for job_id, pid in db.execute(
+                    "SELECT id, pid FROM jobs WHERE status IN (?, ?)",
+                    (QUEUED, RUNNING),
+                )
+                if pid != os.getpid() and not _pid_alive(pid)
+            ]
+            db.executemany(
+                "UPDATE jobs SET status = ?, error = ?, updated_at = ? WHERE id = ?",
+                [
+                    (FAILED, "Interrupted by a server restart", now, job_id)
+                    for job_id in orphaned
+                ],
+            )
+            db.execute(
+                "DELETE FROM jobs WHERE status IN (?, ?, ?) AND updated_at < ?",
+                (*FINISHED, now - JOB_RETENTION_DAYS * 86400),
+            )
+
+    def _update(self, job_id, **changes):
+        changes["updated_at"] = time.time()
+        assignments = ", ".join(f"{column} = ?" for column in changes)
+        with self._connect() as db:
+            db.execute(
+                f"UPDATE jobs SET {assignments} WHERE id = ?",
+                (*changes.values(), job_id),
+            )
+
+    def submit(self, kind, func, *args, title=None, **kwargs):
+        """Queue func(job, *args, **kwargs) and return the new job's ID
+
+        The function's return value must be JSON-serializable; it becomes
+        the job's result. An exception fails the job with its message.
+        """
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with self._connect() as db:
+            db.execute(
+                "INSERT INTO jobs (id, kind, title, status, pid, created_at, "
+                "updated_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (job_id, kind, title, QUEUED, os.getpid(), now, now),
+            )
+        with self._lock:
+            self._cancel_events[job_id] = threading.Event()
+            self._futures[job_id] = self._executor.submit(
+                self._run, job_id, kind, func, args, kwargs
+            )
+        return job_id
+
+    def _run(self, job_id, kind, func, args, kwargs):
+        with self._lock:
+            cancel_event = self._cancel_events[job_id]
+        job = Job(self, job_id, cancel_event)
+        status = FAILED
+        JOBS_IN_FLIGHT.inc(kind=kind)
+        try:
+            if cancel_event.is_set():
+                raise JobCancelled()
+            self._update(job_id, status=RUNNING)
+            result = func(job, *args, **kwargs)
+            self._update(job_id, status=DONE, progress=1.0, result=json.dumps(result))
+            status = DONE
+        except JobCancelled:
+            self._update(job_id, status=CANCELLED, message="Cancelled")
+            status = CANCELLED
+        except Exception as e:
+            traceback.print_exc()
+            self._update(job_id, status=FAILED, error=str(e) or type(e).__name__)
+        finally:
+            JOBS_IN_FLIGHT.dec(kind=kind)
+            JOBS_FINISHED.inc(kind=kind, status=status)
+            with self._lock:
+                self._futures.pop(job_id, None)
+                self._cancel_events.pop(job_id, None)
+
+    def cancel(self, job_id):
+        """Ask a queued or running job to stop"""
+        with self._lock:
+            cancel_event = self._cancel_events.get(job_id)
+            future = self._futures.get(job_id)
+        if cancel_event is None:
+            return False
+        cancel_event.set()
+        if future is not None and future.cancel():
+            # It never started, so _run won't record the cancellation
+            self._update(job_id, status=CANCELLED, message="Cancelled")
+            with self._lock:
+                self._futures.pop(job_id, None)
+                self._cancel_events.pop(job_id, None)
+        return True
+
+    def _row(self, row):
+        job = dict(zip(_COLUMNS, row))
+        job["events"] = json.loads(job["events"] or "[]")
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        return job
+
+    def get(self, job_id):
+        """Return a job as a dict, or None if it doesn't exist"""
+        with self._connect() as db:
+            row = db.execute(
+                f"SELECT {', '.join(_COLUMNS)} FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+        return self._row(row) if row else None
+
+    def recent(self, limit=20):
+        """The most recently submitted jobs, newest first, without their
+        preview, log or result"""
+        columns = ("id", "kind", "title", "status", "progress", "created_at")
+        with self._connect() as db:
+            rows = db.execute(
+                f"SELECT {', '.join(columns)} FROM jobs "
+                "ORDER BY created_at DESC LIMIT ?",
+                (limit,),
+            ).fetchall()
+        return [dict(zip(columns, row)) for row in rows]
+
+
+_queue = None
+_queue_lock = threading.Lock()
+
+
+def get_job_queue():
+    """Return the process-wide job queue"""
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            _queue = JobQueue()
+        return _queue
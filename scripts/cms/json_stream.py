@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+"""
+Incremental JSON extractor for streamed LLM responses
+
+Consumes a model response chunk by chunk in a single pass and builds the JSON
+object as the data arrives:
+
+- Any text before the first "{" (prose, a ```json fence) is skipped
+- Parsing stops at the matching closing "}", so trailing text and backticks
+  inside string values (e.g. markdown code in "content") don't matter
+- Completed fields are reported as soon as they close (title, slug, ...)
+- The value of a string that is still streaming can be read at any time
+"""
+
+import json
+import re
+import time
+
+from local_store import cache_path
+
+# Inside a string only a quote or a backslash changes the state
+_STRING_SPECIAL = re.compile(r'["\\]')
+_LITERAL_CHARS = frozenset("-+.0123456789eEtruefalsn")
+_WHITESPACE = frozenset(" \t\r\n")
+
+# What the parser expects next
+_KEY_OR_END = "key or }"
+_COLON = ":"
+_VALUE = "value"
+_VALUE_OR_END = "value or ]"
+_COMMA_OR_END = ", or closing bracket"
+
+
+class JSONStreamError(ValueError):
+    """The streamed text is not valid JSON (or ended before the object closed)"""
+
+    def __init__(self, message, position):
+        super().__init__(f"{message} (at character {position})")
+        self.position = position
+
+
+class IncrementalJSONExtractor:
+    """Single-pass, chunk-fed parser for the first JSON object in a text"""
+
+    def __init__(self, on_value=None):
+        # on_value(path, value) is called whenever a value is complete; path is
+        # a tuple of keys/indexes such as ("article", "title")
+        self.on_value = on_value
+        self.root = None
+        self.done = False
+        self.position = 0
+        self._started = False
+        # [container, key] frames; a list's key is the index of the element
+        # being parsed
+        self._stack = []
+        self._expect = _VALUE
+        self._string = None  # raw (still escaped) pieces of the current string
+        self._string_is_key = False
+        self._escape_pending = False
+        self._literal = None
+        self.error = None
+
+    # Public API
+
+    def feed(self, text):
+        """Consume the next chunk of the response
+
+        Never raises: after a syntax error the rest of the stream is ignored
+        and the error is raised by result().
+        """
+        if self.error is not None or self.done:
+            self.position += len(text)
+            return
+        try:
+            self._feed(text)
+        except JSONStreamError as e:
+            self.error = e
+        self.position += len(text)
+
+    def _feed(self, text):
+        i = 0
+        n = len(text)
+
+        if not self._started:
+            i = text.find("{")
+            if i == -1:
+                return
+            self._started = True
+
+        while i < n and not self.done:
+            if self._string is not None:
+                i = self._consume_string(text, i)
+                continue
+
+            char = text[i]
+
+            if self._literal is not None:
+                if char in _LITERAL_CHARS:
+                    self._literal.append(char)
+                    i += 1
+                    continue
+                self._finish_literal(i)
+
+            if char in _WHITESPACE:
+                i += 1
+                continue
+
+            self._consume_token(char, i)
+            i += 1
+
+    def result(self):
+        """Return the parsed object, raising JSONStreamError if it is incomplete"""
+        if self.error is not None:
+            raise self.error
+        if not self.done:
+            if not self._started:
+                raise JSONStreamError("No JSON object found", self.position)
+            raise JSONStreamError(
+                f"Response ended before the JSON object was complete "
+                f"(expecting {self._expect})",
+                self.position,
+            )
+        return self.root
+
+    def value_at(self, path):
+        """Return the (possibly still streaming) value at path, or None"""
+        path = tuple(path)
+        if self._string is not None and self._current_path() == path:
+            if self._string_is_key:
+                return None
+            return _decode_partial("".join(self._string))
+
+        value = self.root
+        for key in path:
+            try:
+                value = value[key]
+            except (KeyError, IndexError, TypeError):
+                return None
+        return value
+
+    # Parsing
+
+    def _consume_token(self, char, position):
+        expect = self._expect
+
+        if char == "{" and expect in (_VALUE, _VALUE_OR_END):
+            self._open_container({}, _KEY_OR_END)
+        elif char == "[" and expect in (_VALUE, _VALUE_OR_END):
+            self._open_container([], _VALUE_OR_END)
+        elif char == "}" and expect in (_KEY_OR_END, _COMMA_OR_END) and self._in(dict):
+            self._close_container()
+        elif (
+            char == "]" and expect in (_VALUE_OR_END, _COMMA_OR_END) and self._in(list)
+        ):
+            self._close_container()
+        elif char == '"' and expect in (_KEY_OR_END, _VALUE, _VALUE_OR_END):
+            self._string = []
+            self._string_is_key = expect == _KEY_OR_END
+        elif char == ":" and expect == _COLON:
+            self._expect = _VALUE
+        elif char == "," and expect == _COMMA_OR_END:
+            if self._in(dict):
+                self._expect = _KEY_OR_END
+            else:
+                self._stack[-1][1] += 1
+                self._expect = _VALUE
+        elif char in _LITERAL_CHARS and expect in (_VALUE, _VALUE_OR_END):
+            self._literal = [char]
+        else:
+            raise JSONStreamError(
+                f"Unexpected {char!r}, expecting {expect}", self.position + position
+            )
+
+    def _consume_string(self, text, i):
+        """Consume string content from text[i:], returning the next index"""
+        if self._escape_pending:
+            # The backslash was the last character of the previous chunk
+            self._string.append(text[i])
+            self._escape_pending = False
+            i += 1
+
+        while True:
+            match = _STRING_SPECIAL.search(text, i)
+            if match is None:
+                self._string.append(text[i:])
+                return len(text)
+
+            j = match.start()
+            if text[j] == '"':
+                self._string.append(text[i:j])
+                self._finish_string(j)
+                return j + 1
+
+            # Backslash: keep the escape sequence raw, decode it at the end
+            if j + 1 >= len(text):
+                self._string.append(text[i:])
+                self._escape_pending = True
+                return len(text)
+            self._string.append(text[i : j + 2])
+            i = j + 2
+
+    def _finish_string(self, position):
+        raw = "".join(self._string)
+        self._string = None
+        try:
+            value = json.loads(f'"{raw}"', strict=False)
+        except ValueError as e:
+            raise JSONStreamError(f"Invalid string: {e}", self.position + position)
+
+        if self._string_is_key:
+            self._stack[-1][1] = value
+            self._expect = _COLON
+        else:
+            self._add_value(value)
+
+    def _finish_literal(self, position):
+        literal = "".join(self._literal)
+        self._literal = None
+        try:
+            value = json.loads(literal)
+        except ValueError:
+            raise JSONStreamError(
+                f"Invalid literal {literal!r}", self.position + position
+            )
+        self._add_value(value)
+
+    def _open_container(self, container, expect):
+        if self._stack:
+            self._attach(container)
+        else:
+            self.root = container
+        self._stack.append([container, None if isinstance(container, dict) else 0])
+        self._expect = expect
+
+    def _close_container(self):
+        path = self._current_path()[:-1]
+        container, _ = self._stack.pop()
+        if self._stack:
+            self._after_value(path, container)
+        else:
+            self.done = True
+            if self.on_value:
+                self.on_value((), container)
+
+    def _add_value(self, value):
+        path = self._current_path()
+        self._attach(value)
+        self._after_value(path, value)
+
+    def _attach(self, value):
+        container, key = self._stack[-1]
+        if isinstance(container, dict):
+            container[key] = value
+        else:
+            container.append(value)
+
+    def _after_value(self, path, value):
+        self._expect = _COMMA_OR_END
+        if self.on_value:
+            self.on_value(path, value)
+
+    def _in(self, container_type):
+        return bool(self._stack) and isinstance(self._stack[-1][0], container_type)
+
+    def _current_path(self):
+        """Path of the value currently being parsed"""
+        return tuple(key for _, key in self._stack)
+
+
+def _decode_partial(raw):
+    """Decode a string that may end in the middle of an escape sequence"""
+    cut = raw.rfind("\\")
+    if cut != -1 and cut >= len(raw) - 6:
+        # Drop a trailing incomplete escape such as "\" or "\u00"
+        tail = raw[cut:]
+        backslashes = len(raw[:cut]) - len(raw[:cut].rstrip("\\"))
+        if backslashes % 2 == 0 and (
+            len(tail) == 1 or (tail[1] == "u" and len(tail) < 6)
+        ):
+            raw = raw[:cut]
+    try:
+        return json.loads(f'"{raw}"', strict=False)
+    except ValueError:
+        return raw
+
+
+def extract_json(text, on_value=None):
+    """Extract the first complete JSON object from a full response text"""
+    extractor = IncrementalJSONExtractor(on_value)
+    extractor.feed(text)
+    return extractor.result()
+
+
+def save_unparsed_response(text):
+    """Keep a response that could not be parsed so the generation isn't lost"""
+    path = cache_path("failed_generations", f"{int(time.time() * 1000)}.txt")
+    with open(path, "w") as f:
+        f.write(text)
+    return path
@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+"""
+Internal link suggestions from the published articles
+
+SEO_SYSTEM_PROMPT asks for internal links, but the model doesn't know what
+is on the blog, so it invents URLs or leaves links out. LinkIndex is an
+inverted index (normalized word -> articles) over the title, SEO keywords
+and H2/H3 headings of every article in the local corpus
+(article_corpus.py):
+
+- suggest_links() ranks articles by the idf-weighted words they share with
+  a topic (a title word counts 3x, a keyword 2x, a heading 1x), only
+  visiting the postings of the topic's own words
+- links_prompt() turns the top suggestions into prompt instructions with
+  the exact https://bugninja.ai/blog/<slug> URLs to use
+- fix_links() removes links to blog pages that don't exist from generated
+  markdown, keeping the link text. With no articles indexed (nothing synced
+  yet, or the sync failed) links are kept unchecked.
+
+The index is updated from the corpus' changes, like near_duplicates.py.
+
+    python link_index.py "Visual regression testing in CI"
+"""
+
+import argparse
+import heapq
+import math
+import os
+import re
+import sys
+import threading
+from collections import namedtuple
+
+from article_corpus import BLOG_URL, article_url, get_article_corpus
+from metrics import INTERNAL_LINKS
+from near_duplicates import title_terms
+from seo_rules import parse_headings, parse_keywords
+
+# Articles suggested per generated article
+LINK_SUGGESTIONS = int(os.getenv("LINK_SUGGESTIONS", "5"))
+
+FIELD_WEIGHTS = {"title": 3.0, "keywords": 2.0, "headings": 1.0}
+
+# Markdown links to blog posts: [text](https://bugninja.ai/blog/slug)
+_BLOG_LINK = re.compile(
+    r"\[([^\]]*)\]\(\s*<?" + re.escape(BLOG_URL) + r"/([^)\s>#?/]+)/?[^)\s>]*>?"
+    r'(?:\s+"[^"]*")?\s*\)'
+)
+
+Suggestion = namedtuple("Suggestion", ["id", "slug", "title", "score"])
+
+
+def article_terms(title, keywords, content):
+    """Term -> field weight for one article"""
+    weights = {}
+    fields = {
+        "title": title_terms(title),
+        "keywords": title_terms(" ".join(parse_keywords(keywords))),
+        "headings": title_terms(
+            " ".join(h.text for h in parse_headings(content or "") if h.level <= 3)
+        ),
+    }
+    for field, terms in fields.items():
+        for term in terms:
+            weights[term] = weights.get(term, 0.0) + FIELD_WEIGHTS[field]
+    return weights
+
+
+class LinkIndex:
+    """Inverted index over the article corpus, kept in memory"""
+
+    def __init__(self, corpus=None):
+        self.corpus = corpus or get_article_corpus()
+        self._lock = threading.Lock()
+        self._postings = {}
+        self._articles = {}
+        self._slugs = {}
+        self._generation = None
+        self._seq = 0
+
+    def __len__(self):
+        return len(self._articles)
+
+    def _remove(self, article_id):
+        previous = self._articles.pop(article_id, None)
+        if previous is None:
+            return
+        slug, _, terms = previous
+        if self._slugs.get(slug) == article_id:
+            del self._slugs[slug]
+        for term in terms:
+            posting = self._postings[term]
+            del posting[article_id]
+            if not posting:
+                del self._postings[term]
+
+    def _add(self, article):
+        self._remove(article["id"])
+        terms = article_terms(article["title"], article["keywords"], article["content"])
+        self._articles[article["id"]] = (article["slug"], article["title"], terms)
+        self._slugs[article["slug"]] = article["id"]
+        for term, weight in terms.items():
+            self._postings.setdefault(term, {})[article["id"]] = weight
+
+    def refresh(self):
+        """Index articles added to the corpus since the last refresh
+
+        After a full corpus sync the index is rebuilt. Returns the number of
+        articles indexed.
+        """
+        with self._lock:
+            generation = self.corpus.generation
+            rebuild = generation != self._generation
+            changed = self.corpus.changed_since(0 if rebuild else self._seq)
+            if rebuild:
+                self._postings.clear()
+                self._articles.clear()
+                self._slugs.clear()
+            for article in changed:
+                self._add(article)
+            self._generation = generation
+            if changed:
+                self._seq = changed[-1]["seq"]
+            return len(changed)
+
+    def suggest(self, text, limit=LINK_SUGGESTIONS, exclude=()):
+        """The articles sharing the most (and rarest) words with text"""
+        with self._lock:
+            total = len(self._articles)
+            scores = {}
+            for term in title_terms(text):
+                posting = self._postings.get(term)
+                if not posting:
+                    continue
+                idf = math.log(1 + total / len(posting))
+                for article_id, weight in posting.items():
+                    scores[article_id] = scores.get(article_id, 0.0) + idf * weight
+            best = heapq.nlargest(
+                limit,
+                (item for item in scores.items() if item[0] not in exclude),
+                key=lambda item: item[1],
+            )
+            return [
+                Suggestion(
+                    article_id,
+                    self._articles[article_id][0],
+                    self._articles[article_id][1],
+                    score,
+                )
+                for article_id, score in best
+            ]
+
+    def has_slug(self, slug):
+        return slug in self._slugs
+
+
+def links_prompt(suggestions):
+    """Prompt instructions listing the articles to link to, or "" """
+    if not suggestions:
+        return ""
+    lines = "\n".join(
+        f'- "{suggestion.title}": {article_url(suggestion.slug)}'
+        for suggestion in suggestions
+    )
+    return (
+        "\n\nINTERNAL LINKS: link to the published articles below where they are "
+        "relevant, with descriptive anchor text in the article content. Use these "
+        f"exact URLs and don't link to any other {BLOG_URL} page:\n{lines}\n"
+    )
+
+
+def fix_links(content, index):
+    """Unlink blog links whose slug isn't published
+
+    Returns (content, linked slugs, removed slugs, unchecked slugs). An
+    empty index can't tell what is published, so then every link is kept
+    and unchecked.
+    """
+    linked = []
+    removed = []
+    unchecked = []
+    checkable = len(index) > 0
+
+    def replace(match):
+        text, slug = match.groups()
+        if not checkable:
+            unchecked.append(slug)
+            return match.group(0)
+        if index.has_slug(slug):
+            linked.append(slug)
+            return match.group(0)
+        removed.append(slug)
+        return text
+
+    content = _BLOG_LINK.sub(replace, content or "")
+    return content, linked, removed, unchecked
+
+
+def fix_article_links(article):
+    """fix_links() on a generated article's content, in place
+
+    Returns (linked slugs, removed slugs, unchecked slugs).
+    """
+    article["content"], linked, removed, unchecked = fix_links(
+        article.get("content"), get_link_index()
+    )
+    INTERNAL_LINKS.inc(len(linked), result="kept")
+    INTERNAL_LINKS.inc(len(removed), result="removed")
+    INTERNAL_LINKS.inc(len(unchecked), result="unchecked")
+    return linked, removed, unchecked
+
+
+def suggest_links(strapi, topic, limit=LINK_SUGGESTIONS):
+    """Link suggestions for a topic, syncing the corpus first if it's stale"""
+    index = get_link_index()
+    index.corpus.sync_if_stale(strapi)
+    index.refresh()
+    return index.suggest(topic, limit)
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_link_index():
+    """Return the process-wide link index"""
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = LinkIndex()
+        return _index
+
+
+def main():
+    from dotenv import load_dotenv
+    from strapi_client import StrapiClient
+
+    parser = argparse.ArgumentParser(
+        description="Suggest published articles to link to from a topic"
+    )
+    parser.add_argument("topics", nargs="+", help="Topics to look up")
+    parser.add_argument("--limit", type=int, default=LINK_SUGGESTIONS)
+    args = parser.parse_args()
+
+    load_dotenv()
+    strapi = StrapiClient(os.getenv("STRAPI_API_URL"), os.getenv("STRAPI_API_TOKEN"))
+    index = get_link_index()
+    if index.corpus.sync(strapi) is None:
+        sys.exit(1)
+    index.refresh()
+    print(f"📚 {len(index)} articles indexed")
+    for topic in args.topics:
+        suggestions = index.suggest(topic, args.limit)
+        print(f"\n{topic}: {len(suggestions) or 'no'} suggestion(s)")
+        for suggestion in suggestions:
+            print(
+                f"  🔗 {suggestion.score:5.1f}  {suggestion.title}  {article_url(suggestion.slug)}"
+            )
+
+
+if __name__ == "__main__":
+    main()
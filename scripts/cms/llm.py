@@ -0,0 +1,316 @@
+#!/usr/bin/env python3
+"""
+Shared Azure OpenAI helpers
+
+Every chat completion made by real_article.py and article_generator_app.py
+goes through this module, so streaming and progress reporting behave the same
+in the CLI and the Streamlit app.
+"""
+
+import os
+import time
+
+import openai
+
+from llm_cache import request_fingerprint
+from metrics import (
+    LLM_DURATION,
+    LLM_RETRIES,
+    LLM_STREAM_CHUNKS,
+    LLM_TIME_TO_FIRST_TOKEN,
+    LLM_TOKENS,
+)
+from rate_limiter import estimate_tokens, get_rate_limiter
+from tracing import span
+
+# Attempts after a 429, 5xx or connection error before giving up
+MAX_RETRIES = int(os.getenv("AZURE_OPENAI_MAX_RETRIES", "4"))
+BACKOFF_FACTOR = float(os.getenv("AZURE_OPENAI_BACKOFF_FACTOR", "2"))
+RETRYABLE_ERRORS = (
+    openai.RateLimitError,
+    openai.InternalServerError,
+    openai.APIConnectionError,
+)
+
+# Size of the pieces a cached response is replayed in through on_delta
+REPLAY_CHUNK_SIZE = 64
+
+# Ask for token usage in the last chunk; Azure API versions before
+# 2024-09-01-preview reject stream_options, and then this is switched off
+_include_usage = True
+
+
+class CompletionStats:
+    """Token counts and timings of one (streamed) completion
+
+    Until the API reports usage (in the last chunk), or if it never does,
+    completion_tokens counts streamed content chunks instead and
+    usage_reported is False.
+    """
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.first_token_at = None
+        self.finished_at = None
+        self.completion_tokens = 0
+        self.prompt_tokens = None
+        self.usage_reported = False
+        self.finish_reason = None
+        self.cached = False
+        self.cache_key = None
+        self.queued = 0.0
+        self.retries = 0
+
+    @property
+    def elapsed(self):
+        return (self.finished_at or time.monotonic()) - self.started
+
+    @property
+    def time_to_first_token(self):
+        if self.first_token_at is None:
+            return None
+        return self.first_token_at - self.started
+
+    @property
+    def unit(self):
+        """What completion_tokens counts: "tokens" or "chunks" """
+        return "tokens" if self.usage_reported else "chunks"
+
+    @property
+    def tokens_per_second(self):
+        if self.first_token_at is None:
+            return 0.0
+        generating = (self.finished_at or time.monotonic()) - self.first_token_at
+        return self.completion_tokens / generating if generating > 0 else 0.0
+
+    def summary(self):
+        ttft = self.time_to_first_token
+        ttft_text = f"{ttft:.1f}s" if ttft is not None else "n/a"
+        if self.cached:
+            return f"{self.completion_tokens} {self.unit} from cache"
+        prompt = f"{self.prompt_tokens} prompt tokens, " if self.prompt_tokens else ""
+        return (
+            f"{prompt}{self.completion_tokens} {self.unit} in {self.elapsed:.1f}s "
+            f"({self.tokens_per_second:.1f} {self.unit}/s, "
+            f"first token after {ttft_text})"
+        )
+
+
+def stream_completion(client, on_delta=None, cache=None, on_wait=None, **create_kwargs):
+    """Stream a chat completion and return (text, CompletionStats)
+
+    on_delta(delta, stats) is called for every piece of content as it arrives.
+    Token counts are taken from the usage data the API sends at the end of
+    the stream (requested with stream_options); without it only streamed
+    content chunks are counted (see CompletionStats). Closing the
+    stream early (an exception in on_delta, Ctrl+C, a Streamlit rerun) cancels
+    the generation on the server.
+
+    With a ResponseCache, an identical earlier request is replayed through
+    on_delta without calling the API, and completed responses are stored.
+
+    Requests wait for RPM/TPM budget in the shared rate limiter and are
+    retried on 429 (honoring retry-after), 5xx and connection errors.
+    on_wait(seconds, reason) is called before every wait.
+
+    Each call is traced as an llm.completion span; its token counts are added
+    to the enclosing spans too.
+    """
+    stats = CompletionStats()
+    with span(
+        "llm.completion", {"gen_ai.request.model": create_kwargs.get("model")}
+    ) as current:
+        result = "error"
+        try:
+            text = _stream_completion(
+                client, on_delta, cache, on_wait, stats, create_kwargs
+            )
+            result = "cached" if stats.cached else "ok"
+            return text, stats
+        finally:
+            _record_stats(current, stats, create_kwargs.get("model"), result)
+
+
+def _record_stats(current, stats, model, result):
+    """Report a finished completion on its span and in the metrics"""
+    LLM_DURATION.observe(stats.elapsed, model=model, result=result)
+    if not stats.cached:
+        if stats.time_to_first_token is not None:
+            LLM_TIME_TO_FIRST_TOKEN.observe(stats.time_to_first_token, model=model)
+        if stats.usage_reported:
+            LLM_TOKENS.inc(stats.completion_tokens, model=model, type="output")
+        else:
+            LLM_STREAM_CHUNKS.inc(stats.completion_tokens, model=model)
+        if stats.prompt_tokens is not None:
+            LLM_TOKENS.inc(stats.prompt_tokens, model=model, type="input")
+    if stats.retries:
+        LLM_RETRIES.inc(stats.retries, model=model)
+
+    current.set(
+        {
+            "gen_ai.response.finish_reasons": stats.finish_reason,
+            "llm.cached": stats.cached,
+            "llm.retries": stats.retries,
+            "llm.queued_seconds": round(stats.queued, 3),
+            "llm.time_to_first_token": (
+                round(stats.time_to_first_token, 3)
+                if stats.time_to_first_token is not None
+                else None
+            ),
+        }
+    )
+    if stats.usage_reported:
+        current.add(
+            "gen_ai.usage.output_tokens", stats.completion_tokens, propagate=True
+        )
+    else:
+        # No usage data, so this is not a token count (see CompletionStats)
+        current.add("llm.stream_chunks", stats.completion_tokens, propagate=True)
+    if stats.prompt_tokens is not None:
+        current.add("gen_ai.usage.input_tokens", stats.prompt_tokens, propagate=True)
+
+
+def _stream_completion(client, on_delta, cache, on_wait, stats, create_kwargs):
+    parts = []
+
+    if cache is not None:
+        stats.cache_key = request_fingerprint(
+            create_kwargs.get("model"),
+            create_kwargs.get("messages", []),
+            create_kwargs.get("temperature"),
+            create_kwargs.get("max_tokens"),
+        )
+        hit = cache.get(stats.cache_key)
+        if hit is not None:
+            return _replay(hit, stats, on_delta)
+
+    stream = _open_stream(client, create_kwargs, stats, on_wait)
+    try:
+        for chunk in stream:
+            usage = getattr(chunk, "usage", None)
+            if usage:
+                stats.prompt_tokens = usage.prompt_tokens
+                stats.completion_tokens = usage.completion_tokens
+                stats.usage_reported = True
+
+            # Azure sends a first chunk with only content filter results
+            if not chunk.choices:
+                continue
+
+            choice = chunk.choices[0]
+            if choice.finish_reason:
+                stats.finish_reason = choice.finish_reason
+
+            delta = choice.delta.content if choice.delta else None
+            if not delta:
+                continue
+
+            if stats.first_token_at is None:
+                stats.first_token_at = time.monotonic()
+            if not stats.usage_reported:
+                stats.completion_tokens += 1
+            parts.append(delta)
+
+            if on_delta:
+                on_delta(delta, stats)
+    finally:
+        stats.finished_at = time.monotonic()
+        stream.close()
+
+    text = "".join(parts)
+    # Truncated or filtered responses are not worth replaying
+    if cache is not None and stats.finish_reason == "stop":
+        cache.put(
+            stats.cache_key,
+            text,
+            stats.completion_tokens if stats.usage_reported else None,
+            stats.prompt_tokens,
+        )
+    return text
+
+
+def _retry_after(error):
+    """Seconds the server asked us to wait, if it said so"""
+    response = getattr(error, "response", None)
+    if response is None:
+        return None
+    for header, scale in (("retry-after-ms", 0.001), ("retry-after", 1.0)):
+        try:
+            return float(response.headers[header]) * scale
+        except (KeyError, TypeError, ValueError):
+            continue
+    return None
+
+
+def _open_stream(client, create_kwargs, stats, on_wait):
+    """Wait for quota, then start the stream, retrying transient errors"""
+    limiter = get_rate_limiter()
+    deployment = create_kwargs.get("model")
+    tokens = estimate_tokens(
+        create_kwargs.get("messages", []), create_kwargs.get("max_tokens")
+    )
+    # The SDK's own retries would bypass the shared limiter
+    client = client.with_options(max_retries=0)
+
+    for attempt in range(MAX_RETRIES + 1):
+        queued_at = time.monotonic()
+        limiter.acquire(
+            deployment,
+            tokens,
+            on_wait=on_wait and (lambda seconds: on_wait(seconds, "quota")),
+        )
+        stats.queued += time.monotonic() - queued_at
+
+        try:
+            stream = _create_stream(client, create_kwargs)
+        except RETRYABLE_ERRORS as e:
+            if attempt == MAX_RETRIES:
+                raise
+            delay = _retry_after(e) or BACKOFF_FACTOR * (2**attempt)
+            if isinstance(e, openai.RateLimitError):
+                # Everyone sharing the deployment is over quota, not just us
+                limiter.pause(deployment, delay)
+            stats.retries += 1
+            if on_wait:
+                on_wait(delay, type(e).__name__)
+            time.sleep(delay)
+            continue
+
+        # Time to first token is measured from when the request was sent
+        stats.started = time.monotonic()
+        return stream
+
+
+def _create_stream(client, create_kwargs):
+    """Start a streamed completion, asking for usage if the API supports it"""
+    global _include_usage
+    if _include_usage:
+        try:
+            return client.chat.completions.create(
+                stream=True, stream_options={"include_usage": True}, **create_kwargs
+            )
+        except openai.BadRequestError as e:
+            if "stream_options" not in str(e):
+                raise
+            # Counted as chunks from now on (see CompletionStats)
+            _include_usage = False
+    return client.chat.completions.create(stream=True, **create_kwargs)
+
+
+def _replay(hit, stats, on_delta):
+    """Feed a cached response through on_delta as if it were streamed"""
+    text = hit["text"]
+    stats.cached = True
+    stats.first_token_at = time.monotonic()
+    stats.prompt_tokens = hit["prompt_tokens"]
+    stats.finish_reason = "stop"
+
+    if on_delta:
+        for start in range(0, len(text), REPLAY_CHUNK_SIZE):
+            stats.completion_tokens += 1
+            on_delta(text[start : start + REPLAY_CHUNK_SIZE], stats)
+    if hit["completion_tokens"]:
+        stats.completion_tokens = hit["completion_tokens"]
+        stats.usage_reported = True
+    stats.finished_at = time.monotonic()
+    return text
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Disk-backed cache of LLM responses
+
+Stores completed chat completions in a small SQLite database under the cache
+directory, keyed by a fingerprint of the request (model, system prompt, user
+prompt, temperature, max_tokens). Rerunning the CLI with the same topic, or
+retrying after a failed upload, replays the stored article instead of paying
+for the same generation again.
+
+- Off by default: fresh content is usually what you want
+  (enable with --cache, LLM_CACHE=1 or the checkbox in the Streamlit app)
+- Entries expire after LLM_CACHE_TTL seconds (default: 7 days)
+- Least recently used entries are evicted above LLM_CACHE_MAX_MB (default: 50)
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+from local_store import cache_path
+
+CACHE_ENABLED = os.getenv("LLM_CACHE", "0").lower() in ("1", "true", "yes", "on")
+CACHE_TTL = float(os.getenv("LLM_CACHE_TTL", str(7 * 24 * 3600)))
+CACHE_MAX_BYTES = int(float(os.getenv("LLM_CACHE_MAX_MB", "50")) * 1024 * 1024)
+
+
+def request_fingerprint(model, messages, temperature=None, max_tokens=None):
+    """Return a stable SHA-256 key for a chat completion request"""
+
+    def prompt(role):
+        return "\n".join(m["content"] for m in messages if m["role"] == role)
+
+    key = json.dumps(
+        {
+            "model": model,
+            "system": prompt("system"),
+            "user": prompt("user"),
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+        },
+        sort_keys=True,
+    )
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """Size-bounded LRU cache of completion texts with a TTL"""
+
+    def __init__(self, path=None, ttl=CACHE_TTL, max_bytes=CACHE_MAX_BYTES):
+        self.path = path or cache_path("llm_responses.sqlite3")
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        with self._connect() as db:
+            db.execute(
+                """
+                CREATE TABLE IF NOT EXISTS responses (
+                    key TEXT PRIMARY KEY,
+                    text TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    completion_tokens INTEGER,
+                    prompt_tokens INTEGER,
+                    created_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL
+                )
+                """
+            )
+            db.execute(
+                "CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed_at)"
+            )
+
+    @contextmanager
+    def _connect(self):
+        # One short-lived connection per operation keeps this usable from the
+        # batch worker threads and from several processes at once
+        db = sqlite3.connect(self.path, timeout=30)
+        try:
+            db.execute("PRAGMA journal_mode=WAL")
+            with db:
+                yield db
+        finally:
+            db.close()
+
+    def get(self, key):
+        """Return the cached entry as a dict, or None if missing or expired"""
+        now = time.time()
+        with self._lock, self._connect() as db:
+            row = db.execute(
+                "SELECT text, completion_tokens, prompt_tokens, created_at "
+                "FROM responses WHERE key = ?",
+                (key,),
+            ).fetchone()
+            if row is None:
+                return None
+            if now - row[3] > self.ttl:
+                db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                return None
+            db.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+        return {"text": row[0], "completion_tokens": row[1], "prompt_tokens": row[2]}
+
+    def put(self, key, text, completion_tokens=None, prompt_tokens=None):
+        """Store a response and evict expired and least recently used entries"""
+        now = time.time()
+        size = len(text.encode("utf-8"))
+        with self._lock, self._connect() as db:
+            db.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, text, size, completion_tokens, prompt_tokens, now, now),
+            )
+            db.execute("DELETE FROM responses WHERE created_at < ?", (now - self.ttl,))
+            self._evict(db)
+
+    def _evict(self, db):
+        total = db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, size in db.execute(
+            "SELECT key, size FROM responses ORDER BY accessed_at ASC"
+        ).fetchall():
+            db.execute("DELETE FROM responses WHERE key = ?", (key,))
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    def discard(self, key):
+        """Drop an entry, e.g. a response that turned out to be unusable"""
+        with self._lock, self._connect() as db:
+            db.execute("DELETE FROM responses WHERE key = ?", (key,))
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_response_cache():
+    """Return the process-wide response cache"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ResponseCache()
+        return _cache
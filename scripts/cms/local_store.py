@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""
+Local on-disk storage helpers
+
+Small JSON files under scripts/cms/.cache (or $CMS_CACHE_DIR) used to keep
+indexes of CMS data between runs of both scripts.
+"""
+
+import json
+import os
+import tempfile
+
+CACHE_DIR = os.getenv(
+    "CMS_CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache")
+)
+
+
+def cache_path(*parts):
+    """Return a path inside the cache directory, creating parent directories"""
+    path = os.path.join(CACHE_DIR, *parts)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    return path
+
+
+def load_json(path, default=None):
+    """Load a JSON file, returning default if it is missing or corrupt"""
+    try:
+        with open(path, "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return default
+
+
+def save_json(path, data):
+    """Atomically write a JSON file so readers never see a partial file"""
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
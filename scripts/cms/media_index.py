@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Content-addressed index of uploaded media
+
+Maps the SHA-256 digest of an image file to the ID of the Strapi media entry
+it was uploaded as, so the same featured image or author profile picture is
+uploaded once and reused afterwards instead of creating a new media entry on
+every article.
+
+- The digest covers the file bytes and the image pipeline settings, so
+  changing IMAGE_FORMAT or IMAGE_MAX_DIMENSION uploads a fresh variant
+- Before reuse the entry is checked with GET /upload/files/:id; media
+  deleted in Strapi is dropped from the index and uploaded again
+- Persisted in the cache directory; strapi_async.py does the lookups and
+  uploads for both real_article.py and article_generator_app.py
+"""
+
+import hashlib
+import threading
+
+from image_pipeline import pipeline_signature
+from local_store import cache_path, load_json, save_json
+
+CHUNK_SIZE = 1024 * 1024
+
+
+def file_digest(path):
+    """SHA-256 of a file's bytes and the settings it will be processed with"""
+    digest = hashlib.sha256(pipeline_signature().encode("utf-8"))
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def info_changed(entry, name, alt_text):
+    """Whether the recorded name/alt text differ from the requested ones"""
+    return (name and entry.get("name") != name) or (
+        alt_text and entry.get("alternativeText") != alt_text
+    )
+
+
+class MediaIndex:
+    """Persistent file digest -> Strapi media ID index"""
+
+    def __init__(self, path=None):
+        self.path = path or cache_path("media_index.json")
+        self._lock = threading.RLock()
+        self._entries = load_json(self.path, {}) or {}
+
+    def _save(self):
+        with self._lock:
+            # Merge with what other processes may have written since we loaded
+            on_disk = load_json(self.path, {}) or {}
+            for digest, entry in on_disk.items():
+                self._entries.setdefault(digest, entry)
+            save_json(self.path, self._entries)
+
+    def lookup(self, digest):
+        with self._lock:
+            return self._entries.get(digest)
+
+    def add(self, digest, media_id, name=None, alt_text=None):
+        with self._lock:
+            self._entries[digest] = {
+                "id": media_id,
+                "name": name,
+                "alternativeText": alt_text,
+            }
+            self._save()
+
+    def remove(self, digest):
+        with self._lock:
+            self._entries.pop(digest, None)
+            on_disk = load_json(self.path, {}) or {}
+            on_disk.pop(digest, None)
+            save_json(self.path, {**on_disk, **self._entries})
+
+    def remove_media(self, media_id):
+        """Forget every file that was uploaded as media_id"""
+        with self._lock:
+            on_disk = load_json(self.path, {}) or {}
+            for digest, entry in list({**on_disk, **self._entries}.items()):
+                if entry["id"] == media_id:
+                    self.remove(digest)
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_media_index():
+    """Return the process-wide media index"""
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = MediaIndex()
+        return _index
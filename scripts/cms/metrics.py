@@ -0,0 +1,351 @@
+#!/usr/bin/env python3
+"""
+Prometheus metrics for long-running generator processes
+
+Counters, gauges and histograms for the Streamlit app and real_article.py
+batches, served in the Prometheus text format on METRICS_PORT:
+
+- cms_articles_generated_total / cms_articles_published_total by result
+- cms_llm_request_duration_seconds by model and result (ok, cached, error),
+  cms_llm_time_to_first_token_seconds, cms_llm_tokens_total (input/output),
+  cms_llm_retries_total and cms_llm_parse_failures_total
+- cms_seo_violations_total by rule
+- cms_duplicates_flagged_total by check (topic, title, content)
+- cms_internal_links_total by result (kept, removed)
+- cms_strapi_request_duration_seconds by method, endpoint (with IDs replaced
+  by {id}) and status code ("error" when no response came back)
+- cms_jobs_in_flight and cms_jobs_finished_total by job kind
+
+Recording a value is a dict update under a lock, so metrics are always
+collected; only the HTTP server is optional. Start it with METRICS_PORT (or
+real_article.py --metrics-port) and scrape http://<host>:<port>/metrics.
+"""
+
+import functools
+import inspect
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))
+METRICS_ADDR = os.getenv("METRICS_ADDR", "0.0.0.0")
+
+# Seconds; Strapi requests are usually well under a second
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+# Seconds; a full article completion can take minutes
+LLM_BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120, 300)
+
+_registry = []
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names, values, extra=None):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+        if not self.labelnames:
+            # Unlabeled metrics are exported from the start, as 0
+            self._values[()] = self._empty()
+        _registry.append(self)
+
+    def _empty(self):
+        return 0
+
+    def _key(self, labels):
+        if len(labels) != len(self.labelnames):
+            raise ValueError(f"{self.name} takes labels {self.labelnames}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _samples(self):
+        with self._lock:
+            return [(key, value) for key, value in sorted(self._values.items())]
+
+    def render(self):
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}",
+        ]
+        for key, value in self._samples():
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}{labels} {_format_value(value)}")
+        return lines
+
+
+class Counter(_Metric):
+    """A value that only goes up"""
+
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def total(self, **labels):
+        """Sum of the values whose labels match the given ones"""
+        wanted = [(self.labelnames.index(name), str(v)) for name, v in labels.items()]
+        with self._lock:
+            return sum(
+                value
+                for key, value in self._values.items()
+                if all(key[i] == v for i, v in wanted)
+            )
+
+
+class Gauge(_Metric):
+    """A value that goes up and down"""
+
+    kind = "gauge"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    @contextmanager
+    def track(self, **labels):
+        """Count the block (or decorated function) as in progress"""
+        self.inc(**labels)
+        try:
+            yield
+        finally:
+            self.dec(**labels)
+
+
+class Histogram(_Metric):
+    """Observations counted into cumulative buckets, with their sum"""
+
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames)
+
+    def _empty(self):
+        # Per-bucket counts (the last one is +Inf) and the sum
+        return [[0] * (len(self.buckets) + 1), 0.0]
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = self._empty()
+            entry[0][index] += 1
+            entry[1] += value
+
+    @contextmanager
+    def time(self, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def _samples(self):
+        with self._lock:
+            return [
+                (key, (list(counts), total))
+                for key, (counts, total) in sorted(self._values.items())
+            ]
+
+    def render(self):
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} histogram",
+        ]
+        for key, (counts, total) in self._samples():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                labels = _format_labels(
+                    self.labelnames, key, f'le="{_format_value(bound)}"'
+                )
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+ARTICLES_GENERATED = Counter(
+    "cms_articles_generated_total", "Article generations by result", ["result"]
+)
+ARTICLES_PUBLISHED = Counter(
+    "cms_articles_published_total", "Article uploads to Strapi by result", ["result"]
+)
+LLM_DURATION = Histogram(
+    "cms_llm_request_duration_seconds",
+    "Chat completion duration, including rate limit waits and retries",
+    ["model", "result"],
+    buckets=LLM_BUCKETS,
+)
+LLM_TIME_TO_FIRST_TOKEN = Histogram(
+    "cms_llm_time_to_first_token_seconds",
+    "Time until the first streamed token",
+    ["model"],
+    buckets=LLM_BUCKETS,
+)
+LLM_TOKENS = Counter(
+    "cms_llm_tokens_total",
+    "Prompt and completion tokens reported by the API",
+    ["model", "type"],
+)
+LLM_STREAM_CHUNKS = Counter(
+    "cms_llm_stream_chunks_total",
+    "Streamed content chunks of completions the API reported no usage for",
+    ["model"],
+)
+LLM_RETRIES = Counter(
+    "cms_llm_retries_total", "Chat completion requests retried", ["model"]
+)
+LLM_PARSE_FAILURES = Counter(
+    "cms_llm_parse_failures_total", "Responses that were not valid article JSON"
+)
+SEO_VIOLATIONS = Counter(
+    "cms_seo_violations_total",
+    "SEO rule violations in generated articles (see seo_rules.py)",
+    ["rule"],
+)
+DUPLICATES_FLAGGED = Counter(
+    "cms_duplicates_flagged_total",
+    "Topics and articles similar to a published article (see near_duplicates.py)",
+    ["check"],
+)
+INTERNAL_LINKS = Counter(
+    "cms_internal_links_total",
+    "Links to blog posts in generated articles: kept, removed as unpublished, or unchecked",
+    ["result"],
+)
+STRAPI_DURATION = Histogram(
+    "cms_strapi_request_duration_seconds",
+    "Strapi request duration, including retries",
+    ["method", "endpoint", "status"],
+)
+JOBS_IN_FLIGHT = Gauge(
+    "cms_jobs_in_flight", "Jobs and batch items currently running", ["kind"]
+)
+JOBS_FINISHED = Counter(
+    "cms_jobs_finished_total", "Finished jobs by final status", ["kind", "status"]
+)
+
+
+def counted(counter):
+    """Decorator counting calls (or coroutine calls) by result: "ok" for a
+    truthy return value, "failed" for a falsy one or an exception"""
+
+    def decorate(func):
+        if inspect.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                result = None
+                try:
+                    result = await func(*args, **kwargs)
+                    return result
+                finally:
+                    counter.inc(result="ok" if result else "failed")
+
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            result = None
+            try:
+                result = func(*args, **kwargs)
+                return result
+            finally:
+                counter.inc(result="ok" if result else "failed")
+
+        return wrapper
+
+    return decorate
+
+
+def observe_request(method, endpoint, started, response):
+    """Record a Strapi request that started at time.perf_counter() started"""
+    status = response.status_code if response is not None else "error"
+    STRAPI_DURATION.observe(
+        time.perf_counter() - started, method=method, endpoint=endpoint, status=status
+    )
+
+
+def render():
+    """Every metric in the Prometheus text exposition format"""
+    lines = []
+    for metric in _registry:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+_server = None
+_server_lock = threading.Lock()
+
+
+def start_server(port=METRICS_PORT, addr=METRICS_ADDR):
+    """Serve /metrics on a daemon thread, once per process
+
+    Does nothing without a port. Returns the server, or None.
+    """
+    global _server
+    if not port:
+        return None
+    with _server_lock:
+        if _server is None:
+            try:
+                _server = ThreadingHTTPServer((addr, port), _MetricsHandler)
+            except OSError as e:
+                print(f"⚠️ Failed to serve metrics on {addr}:{port}: {e}")
+                return None
+            _server.daemon_threads = True
+            threading.Thread(
+                target=_server.serve_forever, name="metrics", daemon=True
+            ).start()
+            print(f"📊 Serving metrics on http://{addr}:{port}/metrics")
+        return _server
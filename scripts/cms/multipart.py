@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Streaming multipart/form-data request bodies
+
+requests and httpx build a multipart body for files=... as one bytes object
+in memory, and an open() passed as a file is never closed. MultipartBody is
+a file-like body that reads its parts in chunks when the request is sent:
+
+- A part is a str/bytes value, a path on disk or a binary file object
+  (e.g. a Streamlit UploadedFile), so images are never held in memory twice
+- Files given as paths are opened one at a time and closed as soon as they
+  have been read, or when the body is closed
+- The length is known up front, so Content-Length is sent instead of
+  chunked encoding, and seek()/tell() let urllib3 rewind the body to retry
+- Works as requests' data=body and as httpx.AsyncClient's content=body
+"""
+
+import bisect
+import io
+import os
+import uuid
+
+CHUNK_SIZE = 64 * 1024
+
+
+def _quote(value):
+    return value.replace("\\", "\\\\").replace('"', '\\"')
+
+
+class MultipartBody:
+    """multipart/form-data body streamed from strings, bytes, paths and files
+
+    fields maps form field names to str values; files maps field names to
+    (filename, source, content_type) tuples where source is bytes, a path or
+    a binary file object positioned at the start of its content.
+    """
+
+    def __init__(self, fields=None, files=None, chunk_size=CHUNK_SIZE):
+        self.boundary = uuid.uuid4().hex
+        self.chunk_size = chunk_size
+        self._parts = []
+        for name, value in (fields or {}).items():
+            self._add(self._header(name), value.encode("utf-8"))
+        for name, (filename, source, content_type) in (files or {}).items():
+            self._add(self._header(name, filename, content_type), source)
+        self._parts.append(f"--{self.boundary}--\r\n".encode("ascii"))
+
+        # Start offset of every part, so a read can start anywhere in the body
+        self._lengths = [self._part_length(part) for part in self._parts]
+        self._offsets = []
+        offset = 0
+        for length in self._lengths:
+            self._offsets.append(offset)
+            offset += length
+        self._length = offset
+        self._position = 0
+        self._open_path = None
+        self._open_file = None
+
+    def _header(self, name, filename=None, content_type=None):
+        disposition = f'form-data; name="{_quote(name)}"'
+        if filename is not None:
+            disposition += f'; filename="{_quote(filename)}"'
+        header = f"--{self.boundary}\r\nContent-Disposition: {disposition}\r\n"
+        if content_type:
+            header += f"Content-Type: {content_type}\r\n"
+        return (header + "\r\n").encode("utf-8")
+
+    def _add(self, header, source):
+        if isinstance(source, (str, os.PathLike)):
+            source = os.fspath(source)
+        elif not isinstance(source, bytes):
+            # Remember where the file object's content starts
+            source = (source, source.tell())
+        self._parts.extend([header, source, b"\r\n"])
+
+    def _part_length(self, part):
+        if isinstance(part, bytes):
+            return len(part)
+        if isinstance(part, str):
+            return os.path.getsize(part)
+        fileobj, start = part
+        end = fileobj.seek(0, io.SEEK_END)
+        fileobj.seek(start)
+        return end - start
+
+    @property
+    def content_type(self):
+        return f"multipart/form-data; boundary={self.boundary}"
+
+    @property
+    def headers(self):
+        """Headers to send with the body"""
+        return {"Content-Type": self.content_type, "Content-Length": str(self._length)}
+
+    def __len__(self):
+        return self._length
+
+    def tell(self):
+        return self._position
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            offset += self._position
+        elif whence == io.SEEK_END:
+            offset += self._length
+        self._position = min(max(offset, 0), self._length)
+        return self._position
+
+    def _read_part(self, part, offset, size):
+        if isinstance(part, bytes):
+            return part[offset : offset + size]
+        if isinstance(part, str):
+            if self._open_path != part:
+                self._close_file()
+                self._open_file = open(part, "rb")
+                self._open_path = part
+            fileobj, start = self._open_file, 0
+        else:
+            fileobj, start = part
+        fileobj.seek(start + offset)
+        return fileobj.read(size)
+
+    def read(self, size=-1):
+        if size is None or size < 0:
+            size = self._length - self._position
+        chunks = []
+        while size > 0 and self._position < self._length:
+            index = bisect.bisect_right(self._offsets, self._position) - 1
+            part = self._parts[index]
+            offset = self._position - self._offsets[index]
+            chunk = self._read_part(part, offset, size)
+            if not chunk:
+                raise OSError("File changed size while it was being uploaded")
+            if isinstance(part, str) and offset + len(chunk) >= self._lengths[index]:
+                # Done with this file, don't hold its handle until close()
+                self._close_file()
+            chunks.append(chunk)
+            self._position += len(chunk)
+            size -= len(chunk)
+        return b"".join(chunks)
+
+    async def __aiter__(self):
+        # Each iteration starts over, so httpx can send the body again on retry
+        self.seek(0)
+        while True:
+            chunk = self.read(self.chunk_size)
+            if not chunk:
+                return
+            yield chunk
+
+    def _close_file(self):
+        if self._open_file is not None:
+            self._open_file.close()
+        self._open_file = None
+        self._open_path = None
+
+    def close(self):
+        self._close_file()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
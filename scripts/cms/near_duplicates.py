@@ -0,0 +1,460 @@
+#!/usr/bin/env python3
+"""
+Near-duplicate detection against the published articles
+
+Generating an article that already exists wastes a GPT-4 call, and
+publishing it makes two of our pages compete for the same searches. This
+module indexes every article in the local corpus (article_corpus.py):
+
+- Titles, as sets of normalized words: similar_topics() scores every title
+  sharing a word with a requested topic (or a generated title) by how much
+  of the title the topic covers. A topic is often a whole brief, so the
+  overlap is measured against the title and not against both sets.
+- Contents, as MinHash signatures of their 3-word shingles with LSH buckets
+  over them: similar_articles() compares a generated article with every
+  article body
+
+A query only looks at the titles sharing one of its words and the
+signatures in the buckets it falls into, so it takes well under a
+millisecond with thousands of articles. Signatures are stored in the cache
+directory and updated from the corpus' changes, so only new and edited
+articles are hashed again.
+
+    python near_duplicates.py "Playwright vs Selenium"   # similar titles
+    python near_duplicates.py                            # duplicate pairs
+"""
+
+import argparse
+import os
+import re
+import sqlite3
+import sys
+import threading
+from array import array
+from collections import namedtuple
+from contextlib import contextmanager
+from hashlib import blake2b
+
+from article_corpus import article_url, get_article_corpus
+from local_store import cache_path
+from metrics import DUPLICATES_FLAGGED
+
+# "warn" only reports similar articles, "skip" also stops generating them
+ON_DUPLICATE = os.getenv("ON_DUPLICATE", "warn")
+POLICIES = ("warn", "skip")
+
+# Flag a topic containing at least this fraction of an existing title's words
+TOPIC_THRESHOLD = float(os.getenv("DUPLICATE_TOPIC_THRESHOLD", "0.5"))
+# Flag an article sharing at least this fraction of its 3-word shingles
+CONTENT_THRESHOLD = float(os.getenv("DUPLICATE_CONTENT_THRESHOLD", "0.4"))
+
+# Signature size, and LSH bands x rows per band for contents
+NUM_HASHES = 128
+CONTENT_BANDS = 32
+SHINGLE_SIZE = 3
+
+_EMPTY = (1 << 64) - 1
+_BIN_BITS = NUM_HASHES.bit_length() - 1
+
+_WORD = re.compile(r"\w+")
+
+# Words that say nothing about what an article covers
+STOPWORDS = frozenset(
+    """a an and are as at be best by can complete comprehensive do does for
+    from guide how in into is it its of on or our the their this to top
+    ultimate using vs versus way ways what when which who why will with you
+    your""".split()
+)
+
+Match = namedtuple("Match", ["id", "slug", "title", "similarity"])
+
+
+def _stem(word):
+    # "tests", "testing" and "test" are the same topic
+    if len(word) > 5 and word.endswith("ing"):
+        return word[:-3]
+    if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+        return word[:-1]
+    return word
+
+
+def title_terms(text):
+    """Normalized words of a title or topic, without stopwords"""
+    return frozenset(
+        _stem(word)
+        for word in _WORD.findall((text or "").lower())
+        if (len(word) > 1 or word.isdigit()) and word not in STOPWORDS
+    )
+
+
+def content_shingles(text):
+    """Every run of SHINGLE_SIZE consecutive words"""
+    words = _WORD.findall((text or "").lower())
+    return {
+        " ".join(words[i : i + SHINGLE_SIZE])
+        for i in range(len(words) - SHINGLE_SIZE + 1)
+    }
+
+
+def _hash(token):
+    return int.from_bytes(blake2b(token.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+def signature(tokens):
+    """MinHash signature of a set of strings, or None for an empty set
+
+    One-permutation hashing: every token is hashed once into one of
+    NUM_HASHES bins, keeping the minimum per bin. Empty bins borrow the next
+    filled bin's value (offset by the distance), so small sets still get
+    comparable signatures.
+    """
+    bins = [_EMPTY] * NUM_HASHES
+    for token in tokens:
+        h = _hash(token)
+        index = h & (NUM_HASHES - 1)
+        value = h >> _BIN_BITS
+        if value < bins[index]:
+            bins[index] = value
+    filled = [i for i, value in enumerate(bins) if value != _EMPTY]
+    if not filled:
+        return None
+    if len(filled) < NUM_HASHES:
+        source = filled[0] + NUM_HASHES
+        for i in range(NUM_HASHES - 1, -1, -1):
+            if bins[i] != _EMPTY:
+                source = i
+            else:
+                distance = source - i
+                bins[i] = (bins[source % NUM_HASHES] + distance) | (1 << 60)
+    return array("Q", bins)
+
+
+def similarity(a, b):
+    """Estimated Jaccard similarity of the sets behind two signatures"""
+    return sum(x == y for x, y in zip(a, b)) / NUM_HASHES
+
+
+def containment(title, topic):
+    """Fraction of a title's terms that also appear in topic's"""
+    if not title:
+        return 0.0
+    return len(title & topic) / len(title)
+
+
+class _LSH:
+    """Buckets of signatures that agree on at least one band"""
+
+    def __init__(self, bands):
+        self.bands = bands
+        self.rows = NUM_HASHES // bands
+        self._buckets = {}
+
+    def _keys(self, sig):
+        rows = self.rows
+        return [
+            (band, tuple(sig[band * rows : (band + 1) * rows]))
+            for band in range(self.bands)
+        ]
+
+    def add(self, key, sig):
+        for band_key in self._keys(sig):
+            self._buckets.setdefault(band_key, set()).add(key)
+
+    def remove(self, key, sig):
+        for band_key in self._keys(sig):
+            bucket = self._buckets.get(band_key)
+            if bucket is not None:
+                bucket.discard(key)
+                if not bucket:
+                    del self._buckets[band_key]
+
+    def candidates(self, sig):
+        found = set()
+        for band_key in self._keys(sig):
+            found.update(self._buckets.get(band_key, ()))
+        return found
+
+    def groups(self):
+        return (bucket for bucket in self._buckets.values() if len(bucket) > 1)
+
+
+class NearDuplicateIndex:
+    """MinHash/LSH index over the article corpus, kept in memory"""
+
+    def __init__(self, corpus=None, path=None):
+        self.corpus = corpus or get_article_corpus()
+        self.path = path or cache_path("near_duplicates.sqlite3")
+        self._lock = threading.Lock()
+        self._articles = {}
+        self._titles = {}
+        self._contents = _LSH(CONTENT_BANDS)
+        self._generation = None
+        self._seq = 0
+        with self._connect() as db:
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)"
+            )
+            if db.execute(
+                "SELECT 1 FROM sqlite_master WHERE name = 'signatures'"
+            ).fetchone():
+                # Written before titles were indexed by word: rebuild
+                db.execute("DROP TABLE signatures")
+                db.execute("DELETE FROM meta")
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS content_signatures "
+                "(id INTEGER PRIMARY KEY, slug TEXT, title TEXT, content_sig BLOB)"
+            )
+            meta = dict(db.execute("SELECT key, value FROM meta").fetchall())
+            self._generation = int(meta.get("generation", -1))
+            self._seq = int(meta.get("seq", 0))
+            for row in db.execute("SELECT * FROM content_signatures").fetchall():
+                self._index(*row[:3], _unpack(row[3]))
+
+    @contextmanager
+    def _connect(self):
+        db = sqlite3.connect(self.path, timeout=30)
+        try:
+            with db:
+                yield db
+        finally:
+            db.close()
+
+    def __len__(self):
+        return len(self._articles)
+
+    def _index(self, article_id, slug, title, content_sig):
+        self._unindex(article_id)
+        terms = title_terms(title)
+        self._articles[article_id] = (slug, title, terms, content_sig)
+        for term in terms:
+            self._titles.setdefault(term, set()).add(article_id)
+        if content_sig is not None:
+            self._contents.add(article_id, content_sig)
+
+    def _unindex(self, article_id):
+        previous = self._articles.pop(article_id, None)
+        if previous is None:
+            return
+        for term in previous[2]:
+            ids = self._titles[term]
+            ids.discard(article_id)
+            if not ids:
+                del self._titles[term]
+        if previous[3] is not None:
+            self._contents.remove(article_id, previous[3])
+
+    def refresh(self):
+        """Hash articles added to the corpus since the last refresh
+
+        After a full corpus sync (articles may have been deleted) the whole
+        index is rebuilt. Returns the number of articles hashed.
+        """
+        with self._lock:
+            generation = self.corpus.generation
+            rebuild = generation != self._generation
+            changed = self.corpus.changed_since(0 if rebuild else self._seq)
+            if not changed and not rebuild:
+                return 0
+
+            if rebuild:
+                self._articles.clear()
+                self._titles = {}
+                self._contents = _LSH(CONTENT_BANDS)
+            rows = []
+            for article in changed:
+                content_sig = signature(content_shingles(article["content"]))
+                self._index(
+                    article["id"], article["slug"], article["title"], content_sig
+                )
+                rows.append(
+                    (
+                        article["id"],
+                        article["slug"],
+                        article["title"],
+                        _pack(content_sig),
+                    )
+                )
+
+            with self._connect() as db:
+                if rebuild:
+                    db.execute("DELETE FROM content_signatures")
+                db.executemany(
+                    "INSERT OR REPLACE INTO content_signatures VALUES (?, ?, ?, ?)",
+                    rows,
+                )
+                self._generation = generation
+                if changed:
+                    self._seq = changed[-1]["seq"]
+                db.executemany(
+                    "INSERT OR REPLACE INTO meta VALUES (?, ?)",
+                    [("generation", self._generation), ("seq", self._seq)],
+                )
+            return len(changed)
+
+    def _matches(self, scored, threshold, limit):
+        found = [
+            Match(
+                article_id,
+                self._articles[article_id][0],
+                self._articles[article_id][1],
+                score,
+            )
+            for article_id, score in scored
+            if score >= threshold
+        ]
+        found.sort(key=lambda match: -match.similarity)
+        return found[:limit]
+
+    def similar_topics(self, topic, threshold=TOPIC_THRESHOLD, limit=3, exclude=None):
+        """Articles whose title words mostly appear in topic
+
+        topic may be a one-line title or a whole brief.
+        """
+        terms = title_terms(topic)
+        with self._lock:
+            candidates = set()
+            for term in terms:
+                candidates.update(self._titles.get(term, ()))
+            candidates.discard(exclude)
+            scored = [
+                (article_id, containment(self._articles[article_id][2], terms))
+                for article_id in candidates
+            ]
+            return self._matches(scored, threshold, limit)
+
+    def similar_articles(
+        self, content, threshold=CONTENT_THRESHOLD, limit=3, exclude=None
+    ):
+        """Articles whose bodies share many 3-word shingles with content"""
+        sig = signature(content_shingles(content))
+        if sig is None:
+            return []
+        with self._lock:
+            scored = [
+                (article_id, similarity(sig, self._articles[article_id][3]))
+                for article_id in self._contents.candidates(sig)
+                if article_id != exclude
+            ]
+            return self._matches(scored, threshold, limit)
+
+    def duplicate_pairs(self, threshold=CONTENT_THRESHOLD):
+        """(Match, Match) pairs of indexed articles with similar bodies"""
+        with self._lock:
+            pairs = {}
+            for bucket in self._contents.groups():
+                ordered = sorted(bucket)
+                for i, a in enumerate(ordered):
+                    for b in ordered[i + 1 :]:
+                        if (a, b) not in pairs:
+                            pairs[a, b] = similarity(
+                                self._articles[a][3], self._articles[b][3]
+                            )
+            found = []
+            for (a, b), score in sorted(pairs.items(), key=lambda item: -item[1]):
+                if score >= threshold:
+                    found.append(
+                        tuple(
+                            Match(
+                                key,
+                                self._articles[key][0],
+                                self._articles[key][1],
+                                score,
+                            )
+                            for key in (a, b)
+                        )
+                    )
+            return found
+
+
+def _pack(sig):
+    return sig.tobytes() if sig is not None else None
+
+
+def _unpack(blob):
+    return array("Q", blob) if blob is not None else None
+
+
+def format_match(match, check=None):
+    """e.g. Title 62% similar to "Title" (https://bugninja.ai/blog/slug)"""
+    label = f"{check.capitalize()} " if check else ""
+    return (
+        f'{label}{match.similarity:.0%} similar to "{match.title}" '
+        f"({article_url(match.slug)})"
+    )
+
+
+def find_duplicates(strapi, topic=None, article=None):
+    """(check, Match) pairs for a requested topic and/or a generated article
+
+    check is "topic", "title" or "content". The corpus is synced first
+    unless it was synced less than CORPUS_SYNC_INTERVAL seconds ago.
+    """
+    index = get_near_duplicate_index()
+    index.corpus.sync_if_stale(strapi)
+    index.refresh()
+
+    found = []
+    if topic:
+        found += [("topic", match) for match in index.similar_topics(topic)]
+    if article:
+        found += [("title", match) for match in index.similar_topics(article["title"])]
+        found += [
+            ("content", match) for match in index.similar_articles(article["content"])
+        ]
+    for check in {check for check, _ in found}:
+        DUPLICATES_FLAGGED.inc(check=check)
+    return found
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_near_duplicate_index():
+    """Return the process-wide near-duplicate index"""
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = NearDuplicateIndex()
+        return _index
+
+
+def main():
+    from dotenv import load_dotenv
+    from strapi_client import StrapiClient
+
+    parser = argparse.ArgumentParser(
+        description="Find published articles similar to a topic, or near-duplicate pairs"
+    )
+    parser.add_argument("topics", nargs="*", help="Topics to look up")
+    parser.add_argument(
+        "--full",
+        action="store_true",
+        help="Download every article again instead of only the changed ones",
+    )
+    args = parser.parse_args()
+
+    load_dotenv()
+    strapi = StrapiClient(os.getenv("STRAPI_API_URL"), os.getenv("STRAPI_API_TOKEN"))
+    index = get_near_duplicate_index()
+    if index.corpus.sync(strapi, full=args.full) is None:
+        sys.exit(1)
+    hashed = index.refresh()
+    print(f"📚 {len(index)} articles indexed ({hashed} updated)")
+
+    if args.topics:
+        for topic in args.topics:
+            matches = index.similar_topics(topic)
+            print(f"\n{topic}: {len(matches) or 'no'} similar article(s)")
+            for match in matches:
+                print(f"  ⚠️ {format_match(match)}")
+        return
+
+    pairs = index.duplicate_pairs()
+    print(f"\n{len(pairs) or 'No'} near-duplicate pair(s)")
+    for a, b in pairs:
+        print(f"  ⚠️ {a.similarity:.0%}: {article_url(a.slug)} ~ {article_url(b.slug)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Outline-then-sections generation engine
+
+The default engine writes the whole article, SEO block, categories and tags
+in one completion, so the article is capped by max_tokens and the wait grows
+with its length. This engine splits the work:
+
+1. One completion returns the usual article JSON, with an "outline" (H2
+   headings, key points, target length) in place of the markdown "content"
+2. Every H2 section is written by its own completion, all in parallel
+3. The sections are stitched into article.content, giving the same article
+   dict as the single-call engine
+
+Wall-clock time is roughly the outline plus the slowest section, and the
+article length is no longer limited by a single call's max_tokens.
+"""
+
+import contextvars
+import copy
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from article_schema import ARTICLE_SCHEMA, api_schema
+from llm import stream_completion
+
+ENGINES = ("single", "outline")
+DEFAULT_ENGINE = os.getenv("GENERATION_ENGINE", "single")
+
+# Parallel section completions (each still waits for the shared rate limiter)
+SECTION_WORKERS = int(os.getenv("OUTLINE_SECTION_WORKERS", "6"))
+OUTLINE_MAX_TOKENS = int(os.getenv("OUTLINE_MAX_TOKENS", "2500"))
+SECTION_MAX_TOKENS = int(os.getenv("OUTLINE_SECTION_MAX_TOKENS", "2000"))
+
+OUTLINE_INSTRUCTIONS = """
+
+OUTLINE MODE (overrides the format above for the article body only):
+- Do NOT write the article body. Set "article.content" to an empty string.
+- Add "article.outline": a list of 4-8 sections, each
+  {"heading": "H2 heading in sentence case", "keyPoints": ["point", ...], "targetWords": 300}
+- The sections will be written separately from this outline, so make the key
+  points specific enough to write each section without seeing the others.
+- Fill in every other field (summary, SEO, categories, tags) for the full article.
+"""
+
+SECTION_PROMPT = """Write one section of the article "{title}".
+
+Article summary: {summary}
+Keywords to use naturally: {keywords}
+
+Full outline of the article (other sections are written separately):
+{outline}
+
+Write ONLY section {number}: "{heading}"
+Cover these points:
+{points}
+
+Requirements:
+- Start with the line "## {heading}" and use ### for subsections (NEVER #)
+- About {words} words of substantial paragraphs, not a list of headings
+- Don't repeat what the other sections cover and don't add a CTA or references
+- Return only the markdown of this section, no JSON and no code fence around it
+{links}"""
+
+
+def outline_prompt(prompt):
+    """Turn a single-call article prompt into an outline request"""
+    return prompt + OUTLINE_INSTRUCTIONS
+
+
+def outline_response_format():
+    """Structured output format of the outline: the article schema with the
+    markdown content replaced by the outline"""
+    schema = copy.deepcopy(api_schema(ARTICLE_SCHEMA))
+    article = schema["properties"]["article"]
+    del article["properties"]["content"]
+    article["properties"]["outline"] = {
+        "type": "array",
+        "items": {
+            "type": "object",
+            "properties": {
+                "heading": {"type": "string"},
+                "keyPoints": {"type": "array", "items": {"type": "string"}},
+                "targetWords": {"type": "integer"},
+            },
+            "required": ["heading", "keyPoints", "targetWords"],
+            "additionalProperties": False,
+        },
+    }
+    article["required"] = list(article["properties"])
+    return {
+        "type": "json_schema",
+        "json_schema": {
+            "name": "seo_article_outline",
+            "strict": True,
+            "schema": schema,
+        },
+    }
+
+
+def _section_prompt(seo_data, index, link_instructions=""):
+    article = seo_data["article"]
+    outline = article["outline"]
+    section = outline[index]
+    return SECTION_PROMPT.format(
+        title=article.get("title", ""),
+        summary=article.get("summary", ""),
+        keywords=seo_data.get("seo", {}).get("keywords", ""),
+        outline="\n".join(f"{i + 1}. {s['heading']}" for i, s in enumerate(outline)),
+        number=index + 1,
+        heading=section["heading"],
+        points="\n".join(f"- {p}" for p in section.get("keyPoints", [])),
+        words=section.get("targetWords") or 300,
+        links=link_instructions,
+    )
+
+
+def _clean_section(markdown, heading):
+    """Strip a stray code fence and make sure the section starts with its H2"""
+    markdown = markdown.strip()
+    fence = re.match(r"^```(?:markdown|md)?\n(.*)\n```$", markdown, re.S)
+    if fence:
+        markdown = fence.group(1).strip()
+    if not markdown.startswith("## "):
+        markdown = f"## {heading}\n\n{markdown}"
+    return markdown
+
+
+def write_sections(
+    client,
+    model,
+    system_prompt,
+    seo_data,
+    cache=None,
+    max_workers=SECTION_WORKERS,
+    on_section=None,
+    link_instructions="",
+):
+    """Write every outlined section in parallel and stitch article.content
+
+    on_section(index, markdown, done, total) is called in the caller's thread
+    as each section finishes. link_instructions (see link_index.links_prompt())
+    is added to every section prompt. Returns seo_data with "content" filled in and
+    the "outline" removed.
+    """
+    article = seo_data["article"]
+    outline = article.get("outline") or []
+    if not outline:
+        # The model ignored outline mode and wrote the whole article
+        if article.get("content"):
+            article.pop("outline", None)
+            return seo_data
+        raise ValueError("The outline response has no sections")
+
+    def write(index):
+        text, stats = stream_completion(
+            client,
+            cache=cache,
+            model=model,
+            messages=[
+                {"role": "system", "content": system_prompt},
+                {
+                    "role": "user",
+                    "content": _section_prompt(seo_data, index, link_instructions),
+                },
+            ],
+            temperature=0.7,
+            max_tokens=SECTION_MAX_TOKENS,
+        )
+        return _clean_section(text, outline[index]["heading"])
+
+    sections = [None] * len(outline)
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(outline))) as pool:
+        # Each section runs in a copy of this context to stay in the same trace
+        futures = {
+            pool.submit(contextvars.copy_context().run, write, i): i
+            for i in range(len(outline))
+        }
+        for done, future in enumerate(as_completed(futures), start=1):
+            index = futures[future]
+            sections[index] = future.result()
+            if on_section:
+                on_section(index, sections[index], done, len(outline))
+
+    article["content"] = "\n\n".join(sections)
+    article["readingTime"] = max(1, len(article["content"].split()) // 200)
+    del article["outline"]
+    return seo_data
@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+"""
+Resumable publish journal
+
+Publishing an article takes several Strapi requests: featured image, author
+(and its profile picture), categories, tags and finally the article. If a
+later step fails, the earlier entities were left orphaned in Strapi and a
+retry created them all again.
+
+Every publish now runs under an idempotency key derived from the content
+(publish_key()). Each completed step is recorded with its Strapi ID and
+whether this run created the entity:
+
+- A retry with the same content resumes: recorded steps are skipped and
+  their IDs reused, and an already created article isn't created twice
+- rollback() deletes what an unfinished run created, newest first, and
+  drops it from the local taxonomy and media indexes. Entities another
+  journaled run also uses are kept and handed over to that run
+- Bulk publishing and edits in the Strapi admin aren't journaled, so before
+  deleting media, an author, a category or a tag rollback() asks Strapi
+  (GET /articles/references) whether an article or author uses it, and
+  keeps it if one does
+
+The journal is a SQLite file in the cache directory, shared by every process.
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+import requests
+
+from local_store import cache_path
+from media_index import get_media_index
+from taxonomy_index import get_taxonomy_index
+
+IN_PROGRESS = "in_progress"
+PUBLISHED = "published"
+ROLLED_BACK = "rolled_back"
+
+# Strapi endpoint that deletes an entity of each journaled collection
+DELETE_PATHS = {
+    "media": "/upload/files/{id}",
+    "authors": "/authors/{id}",
+    "categories": "/categories/{id}",
+    "tags": "/tags/{id}",
+    "articles": "/articles/{id}",
+}
+
+# Collections whose entries published content can use after the run
+REFERENCED_COLLECTIONS = ("media", "authors", "categories", "tags")
+
+
+def publish_key(content, author, image_digest=None):
+    """Idempotency key of publishing one generated article
+
+    Covers what the upload steps read and leave unchanged: the article, its
+    categories and tags, the author and the featured image (by digest).
+    """
+    identity = {
+        "article": content["article"],
+        "categories": content.get("categories", []),
+        "tags": content.get("tags", []),
+        "author": author.get("id") or author.get("slug") or author.get("name"),
+        "image": image_digest,
+    }
+    encoded = json.dumps(identity, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+class PublishRun:
+    """The journal entries of one publish, under one idempotency key"""
+
+    def __init__(self, journal, key):
+        self.journal = journal
+        self.key = key
+
+    @property
+    def status(self):
+        return self.journal.run_status(self.key)
+
+    def get(self, step):
+        """Return the Strapi ID recorded for a step, or None"""
+        with self.journal._connect() as db:
+            row = db.execute(
+                "SELECT entity_id FROM steps WHERE key = ? AND step = ?",
+                (self.key, step),
+            ).fetchone()
+        return row[0] if row else None
+
+    def record(self, step, collection, entity_id, created):
+        """Record a completed step"""
+        with self.journal._connect() as db:
+            db.execute(
+                "INSERT OR REPLACE INTO steps VALUES (?, ?, ?, ?, ?, ?)",
+                (self.key, step, collection, entity_id, int(created), time.time()),
+            )
+
+    def step(self, step, collection, func):
+        """Run func() unless the step is already recorded, returning the ID
+
+        func returns (entity_id, created); a falsy ID isn't recorded, so the
+        step runs again on the next attempt.
+        """
+        entity_id = self.get(step)
+        if entity_id is not None:
+            print(f"↩️ Resuming: {step} already done (ID: {entity_id})")
+            return entity_id
+        entity_id, created = func()
+        if entity_id:
+            self.record(step, collection, entity_id, created)
+        return entity_id
+
+    def finish(self):
+        """Mark the run published"""
+        self.journal._set_status(self.key, PUBLISHED)
+
+
+class PublishJournal:
+    """SQLite journal of publish runs and their completed steps"""
+
+    def __init__(self, path=None):
+        self.path = path or cache_path("publish_journal.sqlite3")
+        with self._connect() as db:
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS runs (key TEXT PRIMARY KEY, "
+                "title TEXT, status TEXT NOT NULL, started_at REAL NOT NULL, "
+                "updated_at REAL NOT NULL)"
+            )
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS steps (key TEXT NOT NULL, "
+                "step TEXT NOT NULL, collection TEXT NOT NULL, "
+                "entity_id INTEGER NOT NULL, created INTEGER NOT NULL, "
+                "recorded_at REAL NOT NULL, PRIMARY KEY (key, step))"
+            )
+            db.execute(
+                "CREATE INDEX IF NOT EXISTS steps_entity ON steps (collection, entity_id)"
+            )
+
+    @contextmanager
+    def _connect(self):
+        db = sqlite3.connect(self.path, timeout=30)
+        try:
+            with db:
+                yield db
+        finally:
+            db.close()
+
+    def start(self, key, title=None):
+        """Open the run for a key, or resume it if it didn't finish"""
+        now = time.time()
+        with self._connect() as db:
+            db.execute(
+                "INSERT INTO runs VALUES (?, ?, ?, ?, ?) ON CONFLICT(key) "
+                "DO UPDATE SET status = CASE WHEN status = ? THEN status "
+                "ELSE excluded.status END, updated_at = excluded.updated_at",
+                (key, title, IN_PROGRESS, now, now, PUBLISHED),
+            )
+        return PublishRun(self, key)
+
+    def _set_status(self, key, status):
+        with self._connect() as db:
+            db.execute(
+                "UPDATE runs SET status = ?, updated_at = ? WHERE key = ?",
+                (status, time.time(), key),
+            )
+
+    def run_status(self, key):
+        with self._connect() as db:
+            row = db.execute("SELECT status FROM runs WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def runs(self, status=None):
+        """List runs as dicts, newest first, optionally only one status"""
+        query = "SELECT key, title, status, started_at, updated_at FROM runs"
+        params = ()
+        if status:
+            query += " WHERE status = ?"
+            params = (status,)
+        with self._connect() as db:
+            rows = db.execute(query + " ORDER BY updated_at DESC", params).fetchall()
+        columns = ("key", "title", "status", "started_at", "updated_at")
+        return [dict(zip(columns, row)) for row in rows]
+
+    def find(self, prefix):
+        """Return the full key of the run whose key starts with prefix"""
+        with self._connect() as db:
+            rows = db.execute(
+                "SELECT key FROM runs WHERE key LIKE ?", (prefix + "%",)
+            ).fetchall()
+        if len(rows) != 1:
+            raise KeyError(
+                f"{'No' if not rows else 'More than one'} publish run matches {prefix}"
+            )
+        return rows[0][0]
+
+    def _created_entities(self, key):
+        with self._connect() as db:
+            return db.execute(
+                "SELECT step, collection, entity_id, "
+                "EXISTS (SELECT 1 FROM steps AS other WHERE other.key != steps.key "
+                "AND other.collection = steps.collection "
+                "AND other.entity_id = steps.entity_id) "
+                "FROM steps WHERE key = ? AND created = 1 ORDER BY recorded_at DESC",
+                (key,),
+            ).fetchall()
+
+    def rollback(self, key, strapi):
+        """Delete the entities an unfinished run created, newest first
+
+        Returns True if everything was removed; failed deletes stay in the
+        journal so the rollback can be retried.
+        """
+        if self.run_status(key) == PUBLISHED:
+            raise ValueError("The article was published; delete it in Strapi instead")
+
+        complete = True
+        for step, collection, entity_id, shared in self._created_entities(key):
+            if shared:
+                # Hand it over, so rolling back the other run deletes it
+                print(f"↪️ Keeping {step} (ID: {entity_id}), another run uses it")
+                with self._connect() as db:
+                    db.execute(
+                        "UPDATE steps SET created = 1 WHERE key != ? "
+                        "AND collection = ? AND entity_id = ?",
+                        (key, collection, entity_id),
+                    )
+                continue
+            if collection in REFERENCED_COLLECTIONS:
+                try:
+                    used_by = references(strapi, collection, entity_id)
+                except (requests.RequestException, KeyError, ValueError) as e:
+                    print(
+                        f"❌ Can't tell whether {step} (ID: {entity_id}) is in use: {e}"
+                    )
+                    complete = False
+                    continue
+                if used_by:
+                    print(f"↪️ Keeping {step} (ID: {entity_id}), used by {used_by}")
+                    if complete:
+                        # Published content owns it now, not this run
+                        with self._connect() as db:
+                            db.execute(
+                                "DELETE FROM steps WHERE key = ? AND step = ?",
+                                (key, step),
+                            )
+                    continue
+            path = DELETE_PATHS[collection].format(id=entity_id)
+            response = strapi.delete(path)
+            if response.status_code not in (200, 204, 404):
+                print(f"❌ Failed to delete {step} (ID: {entity_id})")
+                print(f"Status code: {response.status_code}")
+                print(f"Response: {response.text}")
+                complete = False
+                continue
+            print(f"🗑️ Deleted {step} (ID: {entity_id})")
+            _forget(collection, entity_id)
+            with self._connect() as db:
+                db.execute("DELETE FROM steps WHERE key = ? AND step = ?", (key, step))
+
+        if complete:
+            # Entities it reused no longer count as used by this run
+            with self._connect() as db:
+                db.execute("DELETE FROM steps WHERE key = ?", (key,))
+            self._set_status(key, ROLLED_BACK)
+        return complete
+
+
+def references(strapi, collection, entity_id):
+    """What uses an entity in Strapi, e.g. "articles: 2", or "" if nothing
+
+    Drafts count. Raises requests.HTTPError if Strapi can't tell.
+    """
+    response = strapi.get(
+        "/articles/references", params={"collection": collection, "id": entity_id}
+    )
+    response.raise_for_status()
+    counts = response.json()["data"]
+    return ", ".join(f"{name}: {count}" for name, count in counts.items() if count)
+
+
+def _forget(collection, entity_id):
+    """Drop a deleted entity from the local indexes"""
+    if collection == "media":
+        get_media_index().remove_media(entity_id)
+    elif collection in ("categories", "tags"):
+        get_taxonomy_index(collection).remove(entity_id)
+
+
+_journal = None
+_journal_lock = threading.Lock()
+
+
+def get_publish_journal():
+    """Return the process-wide publish journal"""
+    global _journal
+    with _journal_lock:
+        if _journal is None:
+            _journal = PublishJournal()
+        return _journal
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Requests- and tokens-per-minute limiter for Azure OpenAI
+
+Azure enforces RPM and TPM quotas per deployment and counts a request's TPM
+cost when it arrives: the estimated prompt tokens plus max_tokens. This
+module does the same accounting on our side and delays a request until it
+fits, so several Streamlit editors and a batch job sharing one deployment
+queue up instead of burning requests on 429 errors.
+
+- Limits come from AZURE_OPENAI_RPM / AZURE_OPENAI_TPM (unset = no limit)
+- The one-minute window is kept in a SQLite file in the cache directory,
+  so every process on the machine shares the same budget
+- A 429 pauses all callers for the deployment until its retry-after
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+from local_store import cache_path
+
+RPM_LIMIT = int(os.getenv("AZURE_OPENAI_RPM", "0"))
+TPM_LIMIT = int(os.getenv("AZURE_OPENAI_TPM", "0"))
+
+WINDOW_SECONDS = 60.0
+
+# Rough token count of text for English prose
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(messages, max_tokens=None):
+    """Estimate a request's quota cost the way Azure does: prompt + max_tokens"""
+    prompt_chars = sum(len(m.get("content") or "") for m in messages)
+    return prompt_chars // CHARS_PER_TOKEN + len(messages) * 4 + (max_tokens or 0)
+
+
+class RateLimiter:
+    """Sliding-window RPM/TPM budget shared through a SQLite file"""
+
+    def __init__(self, rpm=RPM_LIMIT, tpm=TPM_LIMIT, path=None):
+        self.rpm = rpm
+        self.tpm = tpm
+        self.path = path or cache_path("rate_limiter.sqlite3")
+        self._lock = threading.Lock()
+        with self._connect() as db:
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS requests "
+                "(deployment TEXT NOT NULL, sent_at REAL NOT NULL, tokens INTEGER NOT NULL)"
+            )
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS pauses "
+                "(deployment TEXT PRIMARY KEY, until REAL NOT NULL)"
+            )
+
+    @contextmanager
+    def _connect(self):
+        db = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        try:
+            # Take the write lock up front so check-and-reserve is atomic
+            # across processes
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                yield db
+                db.execute("COMMIT")
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+        finally:
+            db.close()
+
+    def acquire(self, deployment, tokens, on_wait=None):
+        """Block until a request of `tokens` fits the budget, then reserve it
+
+        on_wait(seconds) is called before each wait so callers can show that
+        the request is queued.
+        """
+        while True:
+            with self._lock, self._connect() as db:
+                wait = self._reserve(db, deployment, tokens)
+            if wait <= 0:
+                return
+            if on_wait:
+                on_wait(wait)
+            time.sleep(wait)
+
+    def _reserve(self, db, deployment, tokens):
+        """Record the request and return 0, or return the seconds to wait"""
+        now = time.time()
+        db.execute("DELETE FROM requests WHERE sent_at <= ?", (now - WINDOW_SECONDS,))
+
+        pause = db.execute(
+            "SELECT until FROM pauses WHERE deployment = ?", (deployment,)
+        ).fetchone()
+        if pause and pause[0] > now:
+            return pause[0] - now
+
+        window = db.execute(
+            "SELECT sent_at, tokens FROM requests WHERE deployment = ? "
+            "ORDER BY sent_at",
+            (deployment,),
+        ).fetchall()
+
+        wait = 0.0
+        if self.rpm and len(window) >= self.rpm:
+            # Wait for enough requests to leave the window
+            wait = window[len(window) - self.rpm][0] + WINDOW_SECONDS - now
+
+        used = sum(t for _, t in window)
+        # A request larger than the whole budget runs alone in an empty window
+        if self.tpm and window and used + tokens > self.tpm:
+            for sent_at, request_tokens in window:
+                used -= request_tokens
+                if used + tokens <= self.tpm:
+                    break
+            wait = max(wait, sent_at + WINDOW_SECONDS - now)
+
+        if wait > 0:
+            return wait
+        db.execute("INSERT INTO requests VALUES (?, ?, ?)", (deployment, now, tokens))
+        return 0
+
+    def pause(self, deployment, seconds):
+        """Hold back every caller of a deployment, e.g. after a 429"""
+        until = time.time() + seconds
+        with self._lock, self._connect() as db:
+            db.execute(
+                "INSERT INTO pauses VALUES (?, ?) ON CONFLICT(deployment) "
+                "DO UPDATE SET until = MAX(until, excluded.until)",
+                (deployment, until),
+            )
+
+
+_limiter = None
+_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter():
+    """Return the process-wide limiter (it is still shared with other processes)"""
+    global _limiter
+    with _limiter_lock:
+        if _limiter is None:
+            _limiter = RateLimiter()
+        return _limiter
@@ -7,6 +7,9 @@ This script:
 2. Uses Azure OpenAI to generate a complete SEO-optimized article with all metadata
 3. Displays the generated content for review
 4. Uploads the approved content to Strapi CMS
+
+Batch mode (--batch manifest.json) skips the prompts and generates/uploads every
+article listed in the manifest using a pool of concurrent workers.
 """
 
 import os
@@ -14,10 +17,44 @@ import sys
 import json
 import time
 import argparse
-import requests
-from datetime import datetime
+import asyncio
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from dotenv import load_dotenv
 from openai import AzureOpenAI
+from strapi_client import StrapiClient
+from article_postprocess import postprocess_article
+from article_schema import STRUCTURED_OUTPUT, article_response_format
+from bulk_publisher import BulkPublisher
+from json_stream import (
+    IncrementalJSONExtractor,
+    JSONStreamError,
+    save_unparsed_response,
+)
+from link_index import links_prompt, suggest_links
+from llm import stream_completion
+import metrics
+from metrics import (
+    ARTICLES_GENERATED,
+    JOBS_IN_FLIGHT,
+    LLM_PARSE_FAILURES,
+    counted,
+)
+from llm_cache import CACHE_ENABLED, get_response_cache
+from near_duplicates import ON_DUPLICATE, POLICIES, find_duplicates, format_match
+from outline_engine import (
+    DEFAULT_ENGINE,
+    ENGINES,
+    OUTLINE_MAX_TOKENS,
+    outline_prompt,
+    outline_response_format,
+)
+from media_index import file_digest
+from publish_journal import IN_PROGRESS, PUBLISHED, get_publish_journal, publish_key
+import strapi_async
+from strapi_async import get_sync_runner
+from taxonomy_index import get_taxonomy_index
+import tracing
+from tracing import current_span, span, traced
 
 # Load environment variables
 load_dotenv()
@@ -27,23 +64,39 @@ STRAPI_API_URL = os.getenv("STRAPI_API_URL")
 STRAPI_API_TOKEN = os.getenv("STRAPI_API_TOKEN")
 AZURE_OPENAI_API_KEY = os.getenv("AZURE_OPENAI_API_KEY")
 AZURE_OPENAI_ENDPOINT = os.getenv("AZURE_OPENAI_ENDPOINT")
+# Structured output mode needs API version 2024-08-01-preview or later
+AZURE_OPENAI_API_VERSION = os.getenv("AZURE_OPENAI_API_VERSION", "2024-07-01-preview")
+AZURE_OPENAI_DEPLOYMENT = os.getenv("AZURE_OPENAI_DEPLOYMENT", "gpt-4")
 
-# Headers for API requests
-headers = {
-    "Content-Type": "application/json",
-    "Authorization": f"Bearer {STRAPI_API_TOKEN}",
-}
+# Pooled Strapi client (keep-alive connections, timeouts and retries)
+strapi = StrapiClient(STRAPI_API_URL, STRAPI_API_TOKEN)
+
+# Local category/tag indexes shared with the Streamlit app
+category_index = get_taxonomy_index("categories")
+tag_index = get_taxonomy_index("tags")
 
-# Auth header without Content-Type (for file uploads)
-auth_header = {"Authorization": f"Bearer {STRAPI_API_TOKEN}"}
+# Completed publish steps, for resuming and rolling back failed uploads
+publish_journal = get_publish_journal()
 
 # Initialize Azure OpenAI client
 client = AzureOpenAI(
     api_key=AZURE_OPENAI_API_KEY,
-    api_version="2024-07-01-preview",
+    api_version=AZURE_OPENAI_API_VERSION,
     azure_endpoint=AZURE_OPENAI_ENDPOINT,
 )
 
+# Disk cache of generated responses, enabled with --cache (see llm_cache.py)
+response_cache = None
+
+# Enforce the article schema through the API, set with --structured
+structured_output = STRUCTURED_OUTPUT
+
+# "single" completion or "outline" then parallel sections, set with --engine
+generation_engine = DEFAULT_ENGINE
+
+# "warn" or "skip" topics/articles similar to published ones, set with --on-duplicate
+on_duplicate = ON_DUPLICATE
+
 # System prompt for SEO content generation
 SEO_SYSTEM_PROMPT = """
 You are an expert SEO content writer with deep knowledge of creating high-traffic, engaging articles.
@@ -192,11 +245,25 @@ JSON_STRUCTURE = """
 """
 
 
-def generate_seo_content(topic, author):
-    """Generate SEO-optimized content using Azure OpenAI"""
+@traced()
+@counted(ARTICLES_GENERATED)
+def generate_seo_content(topic, author, show_progress=True):
+    """Generate SEO-optimized content using Azure OpenAI
+
+    The completion is streamed; with show_progress the token count and
+    throughput are updated live on one line (Ctrl+C cancels the generation).
+    """
     print(f"🧠 Generating SEO-optimized content for topic: {topic}...")
+    current_span().set({"article.topic": topic, "generation.engine": generation_engine})
 
     try:
+        # Checked before the completion is paid for (see near_duplicates.py)
+        if report_duplicates(find_duplicates(strapi, topic=topic)):
+            return None
+
+        # Real blog URLs for the internal links the system prompt asks for
+        link_instructions = links_prompt(suggest_links(strapi, topic))
+
         # Create a modified JSON structure with the real author information
         author_json = json.dumps(
             {
@@ -211,146 +278,94 @@ def generate_seo_content(topic, author):
             indent=2,
         )
 
-        response = client.chat.completions.create(
-            model="gpt-4",  # Use your deployed model name on Azure
+        def report_field(path, value):
+            # Title and slug close long before the article body finishes
+            if show_progress and path in (("article", "title"), ("article", "slug")):
+                print(f"\r📌 {path[1].capitalize()}: {value}")
+
+        extractor = IncrementalJSONExtractor(on_value=report_field)
+
+        def report_progress(delta, stats):
+            extractor.feed(delta)
+            if show_progress and stats.completion_tokens % 25 == 0:
+                print(
+                    f"\r✍️ {stats.completion_tokens} {stats.unit} "
+                    f"({stats.tokens_per_second:.1f}/s)",
+                    end="",
+                    flush=True,
+                )
+
+        prompt = f"Create a complete SEO-optimized article about '{topic}'. Use the following REAL author information - this is important for SEO:\n\n{author_json}\n\nInclude all metadata, categories, and tags. Make sure to include structured data for SEO."
+        completion_options = {}
+        outlined = generation_engine == "outline"
+        if structured_output:
+            # The API enforces the schema, so the JSON template can be left out
+            completion_options["response_format"] = (
+                outline_response_format() if outlined else article_response_format()
+            )
+        else:
+            prompt += f" Follow this JSON structure: {JSON_STRUCTURE}"
+        prompt += link_instructions
+        if outlined:
+            # Outline and metadata first, the sections are written afterwards
+            prompt = outline_prompt(prompt)
+
+        def report_wait(seconds, reason):
+            print(f"\r⏳ Waiting {seconds:.1f}s for Azure OpenAI ({reason})...")
+
+        content, stats = stream_completion(
+            client,
+            on_delta=report_progress,
+            cache=response_cache,
+            on_wait=report_wait,
+            model=AZURE_OPENAI_DEPLOYMENT,
             messages=[
                 {"role": "system", "content": SEO_SYSTEM_PROMPT},
-                {
-                    "role": "user",
-                    "content": f"Create a complete SEO-optimized article about '{topic}'. Use the following REAL author information - this is important for SEO:\n\n{author_json}\n\nInclude all metadata, categories, and tags. Make sure to include structured data for SEO. Follow this JSON structure: {JSON_STRUCTURE}",
-                },
+                {"role": "user", "content": prompt},
             ],
             temperature=0.7,
-            max_tokens=4000,
+            max_tokens=OUTLINE_MAX_TOKENS if outlined else 4000,
+            **completion_options,
         )
+        if show_progress:
+            print()
+        print(f"✅ Generated {'outline: ' if outlined else ''}{stats.summary()}")
 
-        # Extract the JSON content from the response
-        content = response.choices[0].message.content
-
-        # Find JSON content between triple backticks if present
-        if "```json" in content and "```" in content.split("```json", 1)[1]:
-            json_str = content.split("```json", 1)[1].split("```", 1)[0].strip()
-        elif "```" in content and "```" in content.split("```", 1)[1]:
-            json_str = content.split("```", 1)[1].split("```", 1)[0].strip()
-        else:
-            json_str = content
-
-        # Clean up any non-JSON text
-        json_str = json_str.strip()
-        if not json_str.startswith("{"):
-            json_str = json_str[json_str.find("{") :]
-        if not json_str.endswith("}"):
-            json_str = json_str[: json_str.rfind("}") + 1]
-
-        # Parse the JSON
+        # The extractor already skipped any text or ```json fence around the object
         try:
-            seo_data = json.loads(json_str)
-
-            # Ensure the author data is correct (replace with our real author data if needed)
-            if "author" in seo_data:
-                # Check if the author name matches our real author
-                if seo_data["author"]["name"] != author["name"]:
-                    print(
-                        f"⚠️ Replacing generated author with real author: {author['name']}"
-                    )
-                    seo_data["author"] = author
-            else:
-                print(f"⚠️ Adding missing author information: {author['name']}")
-                seo_data["author"] = author
-
-            # Validate and truncate SEO fields that exceed character limits
-            if "seo" in seo_data:
-                # Meta title should be max 60 characters
-                if len(seo_data["seo"].get("metaTitle", "")) > 60:
-                    original_title = seo_data["seo"]["metaTitle"]
-                    seo_data["seo"]["metaTitle"] = original_title[:57] + "..."
-                    print(
-                        f"⚠️ Meta title truncated from {len(original_title)} to 60 characters"
-                    )
-
-                # Meta description should be max 160 characters
-                if len(seo_data["seo"].get("metaDescription", "")) > 160:
-                    original_desc = seo_data["seo"]["metaDescription"]
-                    seo_data["seo"]["metaDescription"] = original_desc[:157] + "..."
-                    print(
-                        f"⚠️ Meta description truncated from {len(original_desc)} to 160 characters"
-                    )
-
-                # Slug should be under 75 characters
-                if (
-                    "article" in seo_data
-                    and len(seo_data["article"].get("slug", "")) > 75
-                ):
-                    original_slug = seo_data["article"]["slug"]
-                    seo_data["article"]["slug"] = original_slug[:72] + "..."
-                    print(
-                        f"⚠️ Slug truncated from {len(original_slug)} to 75 characters"
-                    )
-
-                # Ensure metaSocial entries have image placeholders
-                if "metaSocial" in seo_data["seo"]:
-                    for social in seo_data["seo"]["metaSocial"]:
-                        if "image" not in social:
-                            social["image"] = (
-                                "placeholder-will-be-replaced-with-featured-image"
-                            )
-                else:
-                    # Create default metaSocial entries if missing
-                    seo_data["seo"]["metaSocial"] = [
-                        {
-                            "socialNetwork": "Facebook",
-                            "title": seo_data["seo"].get(
-                                "metaTitle", seo_data["article"]["title"]
-                            ),
-                            "description": seo_data["seo"].get(
-                                "metaDescription", seo_data["article"]["summary"]
-                            ),
-                            "image": "placeholder-will-be-replaced-with-featured-image",
-                        },
-                        {
-                            "socialNetwork": "Twitter",
-                            "title": seo_data["seo"].get(
-                                "metaTitle", seo_data["article"]["title"]
-                            ),
-                            "description": seo_data["seo"].get(
-                                "metaDescription", seo_data["article"]["summary"]
-                            ),
-                            "image": "placeholder-will-be-replaced-with-featured-image",
-                        },
-                    ]
-
-            # Ensure structured data exists in SEO
-            if "seo" in seo_data and not seo_data["seo"].get("structuredData"):
-                print("⚠️ Adding missing structured data to SEO...")
-                seo_data["seo"]["structuredData"] = {
-                    "@context": "https://schema.org",
-                    "@type": "Article",
-                    "headline": seo_data["article"]["title"],
-                    "description": seo_data["article"]["summary"],
-                    "datePublished": datetime.now().isoformat(),
-                    "dateModified": datetime.now().isoformat(),
-                    "author": {"@type": "Person", "name": author["name"]},
-                    "mainEntityOfPage": {
-                        "@type": "WebPage",
-                        "@id": f"https://yourwebsite.com/blog/{seo_data['article']['slug']}",
-                    },
-                }
-            elif "structuredData" in seo_data["seo"]:
-                # Ensure the author in structured data matches our real author
-                if (
-                    seo_data["seo"]["structuredData"].get("author", {}).get("name")
-                    != author["name"]
-                ):
-                    print(f"⚠️ Updating author in structured data to: {author['name']}")
-                    seo_data["seo"]["structuredData"]["author"] = {
-                        "@type": "Person",
-                        "name": author["name"],
-                    }
+            with span("parse_seo_content"):
+                seo_data = extractor.result()
+
+            sections = seo_data["article"].get("outline") or []
+
+            def report_section(index, markdown, done, total):
+                if show_progress:
+                    print(f"  [{done}/{total}] {sections[index]['heading']}")
+
+            # Shared with the Streamlit app (see article_postprocess.py)
+            seo_data, duplicates = postprocess_article(
+                seo_data,
+                author,
+                client,
+                AZURE_OPENAI_DEPLOYMENT,
+                strapi,
+                SEO_SYSTEM_PROMPT,
+                outlined=outlined,
+                structured=structured_output,
+                cache=response_cache,
+                link_instructions=link_instructions,
+                on_section=report_section,
+            )
+            if report_duplicates(duplicates):
+                return None
 
             return seo_data
-        except json.JSONDecodeError as e:
+        except JSONStreamError as e:
+            LLM_PARSE_FAILURES.inc()
             print(f"❌ Error parsing JSON: {e}")
-            print(f"Raw content: {json_str}")
+            print(f"💾 Raw response saved to {save_unparsed_response(content)}")
+            if response_cache and stats.cache_key:
+                response_cache.discard(stats.cache_key)
             return None
 
     except Exception as e:
@@ -358,61 +373,35 @@ def generate_seo_content(topic, author):
         return None
 
 
-def upload_image(image_path, name=None, alt_text=None):
-    """Upload an image to Strapi media library with alternative text"""
-    print(f"📤 Uploading image: {image_path}")
+def report_duplicates(duplicates):
+    """Print near-duplicates of published articles
 
-    # Prepare the file for upload
-    files = {
-        "files": (os.path.basename(image_path), open(image_path, "rb"), "image/png")
-    }
+    Returns True if generation should stop because of them (--on-duplicate skip).
+    """
+    for check, match in duplicates:
+        print(f"⚠️ {format_match(match, check)}")
+    if duplicates and on_duplicate == "skip":
+        print("⏭️ Skipping, a similar article is already published")
+        return True
+    return False
 
-    # Add name and alternative text if provided
-    data = {}
-    if name or alt_text:
-        file_info = {}
-        if name:
-            file_info["name"] = name
-        if alt_text:
-            file_info["alternativeText"] = alt_text
-        data = {"fileInfo": json.dumps(file_info)}
-
-    # Send the request
-    response = requests.post(
-        f"{STRAPI_API_URL}/upload", headers=auth_header, files=files, data=data
-    )
 
-    # Check if the request was successful
-    if response.status_code == 200:
-        uploaded_file = response.json()[0]
-        print(f"✅ Uploaded image: {uploaded_file['name']} (ID: {uploaded_file['id']})")
-        return uploaded_file["id"]
-    else:
-        print(f"❌ Failed to upload image: {image_path}")
-        print(f"Status code: {response.status_code}")
-        print(f"Response: {response.text}")
-        return None
+def strapi_call(func, *args):
+    """Run one of the async Strapi operations (see strapi_async.py) and wait"""
+    return get_sync_runner(STRAPI_API_URL, STRAPI_API_TOKEN).run(func, *args)
 
 
-def get_authors():
-    """Get all authors from Strapi"""
-    print("📚 Fetching existing authors from Strapi...")
+def upload_image(image_path, name=None, alt_text=None):
+    """Upload an image to Strapi media library with alternative text
 
-    response = requests.get(f"{STRAPI_API_URL}/authors?populate=*", headers=headers)
+    A file that was uploaded before is reused instead (see media_index.py).
+    """
+    return strapi_call(strapi_async.upload_image, image_path, name, alt_text)
 
-    if response.status_code == 200:
-        authors = response.json()
-        if authors.get("data") and len(authors["data"]) > 0:
-            print(f"✅ Found {len(authors['data'])} existing authors")
-            return authors["data"]
-        else:
-            print("⚠️ No existing authors found")
-            return []
-    else:
-        print(f"❌ Failed to fetch authors")
-        print(f"Status code: {response.status_code}")
-        print(f"Response: {response.text}")
-        return []
+
+def get_authors():
+    """Get all authors from Strapi"""
+    return strapi_call(strapi_async.get_authors)
 
 
 def select_author(generated_author, existing_authors):
@@ -471,304 +460,83 @@ def select_author(generated_author, existing_authors):
 
 def create_author(author_data, profile_image_id=None):
     """Create an author in Strapi"""
-    # Add timestamp to make slug unique
-    timestamp = int(time.time())
-    unique_slug = f"{author_data['slug']}-{timestamp}"
-
-    # Prepare the author data
-    payload = {
-        "data": {
-            "name": author_data["name"],
-            "slug": unique_slug,
-            "email": author_data["email"],
-            "bio": author_data["bio"],
-            "role": author_data["role"],
-            "expertise": author_data["expertise"],
-            "socialLinks": author_data.get("socialLinks", []),
-        }
-    }
-
-    # Add profile picture if provided
-    if profile_image_id:
-        payload["data"]["profilePicture"] = profile_image_id
-
-    # Send the request
-    response = requests.post(f"{STRAPI_API_URL}/authors", headers=headers, json=payload)
-
-    # Check if the request was successful
-    if response.status_code == 200:
-        author = response.json()
-        print(f"✅ Created author: {author_data['name']} (ID: {author['data']['id']})")
-        return author["data"]["id"]
-    else:
-        print(f"❌ Failed to create author: {author_data['name']}")
-        print(f"Status code: {response.status_code}")
-        print(f"Response: {response.text}")
-        return None
+    return strapi_call(strapi_async.create_author, author_data, profile_image_id)
 
 
 def get_categories():
     """Get all categories from Strapi"""
-    print("📚 Fetching existing categories from Strapi...")
-
-    response = requests.get(f"{STRAPI_API_URL}/categories?populate=*", headers=headers)
-
-    if response.status_code == 200:
-        categories = response.json()
-        if categories.get("data") and len(categories["data"]) > 0:
-            print(f"✅ Found {len(categories['data'])} existing categories")
-            return categories["data"]
-        else:
-            print("⚠️ No existing categories found")
-            return []
-    else:
-        print(f"❌ Failed to fetch categories")
-        print(f"Status code: {response.status_code}")
-        print(f"Response: {response.text}")
-        return []
+    return strapi_call(strapi_async.get_categories)
 
 
-def select_or_create_categories(generated_categories, existing_categories):
+def select_or_create_categories(generated_categories, existing_categories=None):
     """Select from existing categories or create new ones"""
-    selected_category_ids = []
-
-    if not existing_categories:
-        print("No existing categories found. Creating new categories.")
-        for category in generated_categories:
-            category_id = create_category(category)
-            if category_id:
-                selected_category_ids.append(category_id)
-        return selected_category_ids
-
-    # Map existing categories by name (case insensitive) for easy lookup
-    existing_category_map = {
-        c["attributes"]["name"].lower(): c for c in existing_categories
-    }
+    # Fold any freshly fetched categories into the local index
+    if existing_categories:
+        category_index.apply_entries(existing_categories)
 
+    selected_category_ids = []
     for category in generated_categories:
-        category_name = category["name"]
-        category_name_lower = category_name.lower()
-
-        # Check if a similar category already exists
-        if category_name_lower in existing_category_map:
-            existing_category = existing_category_map[category_name_lower]
-            print(
-                f"✅ Using existing category: {existing_category['attributes']['name']} (ID: {existing_category['id']})"
-            )
-            selected_category_ids.append(existing_category["id"])
-        else:
-            # Create new category
-            print(f"Creating new category: {category_name}")
-            category_id = create_category(category)
-            if category_id:
-                selected_category_ids.append(category_id)
+        category_id = select_or_create_category(category)
+        if category_id:
+            selected_category_ids.append(category_id)
 
     return selected_category_ids
 
 
-def create_category(category_data):
-    """Create a category in Strapi"""
-    # Add timestamp to make slug unique
-    timestamp = int(time.time())
-    unique_slug = f"{category_data['slug']}-{timestamp}"
-
-    # Prepare the category data
-    payload = {
-        "data": {
-            "name": category_data["name"],
-            "slug": unique_slug,
-            "description": category_data["description"],
-        }
-    }
+def select_or_create_category(category):
+    """Return the ID of a matching existing category, or create a new one"""
+    return strapi_call(strapi_async.select_or_create_category, category)
 
-    # Send the request
-    response = requests.post(
-        f"{STRAPI_API_URL}/categories", headers=headers, json=payload
-    )
 
-    # Check if the request was successful
-    if response.status_code == 200:
-        category = response.json()
-        print(
-            f"✅ Created category: {category_data['name']} (ID: {category['data']['id']})"
-        )
-        return category["data"]["id"]
-    else:
-        print(f"❌ Failed to create category: {category_data['name']}")
-        print(f"Status code: {response.status_code}")
-        print(f"Response: {response.text}")
-        return None
+def create_category(category_data):
+    """Create a category in Strapi"""
+    return strapi_call(strapi_async.create_category, category_data)
 
 
 def get_tags():
     """Get all tags from Strapi"""
-    print("📚 Fetching existing tags from Strapi...")
+    return strapi_call(strapi_async.get_tags)
 
-    response = requests.get(f"{STRAPI_API_URL}/tags?populate=*", headers=headers)
 
-    if response.status_code == 200:
-        tags = response.json()
-        if tags.get("data") and len(tags["data"]) > 0:
-            print(f"✅ Found {len(tags['data'])} existing tags")
-            return tags["data"]
-        else:
-            print("⚠️ No existing tags found")
-            return []
-    else:
-        print(f"❌ Failed to fetch tags")
-        print(f"Status code: {response.status_code}")
-        print(f"Response: {response.text}")
-        return []
-
-
-def select_or_create_tags(generated_tags, existing_tags):
+def select_or_create_tags(generated_tags, existing_tags=None):
     """Select from existing tags or create new ones"""
-    selected_tag_ids = []
-
-    if not existing_tags:
-        print("No existing tags found. Creating new tags.")
-        for tag in generated_tags:
-            tag_id = create_tag(tag)
-            if tag_id:
-                selected_tag_ids.append(tag_id)
-        return selected_tag_ids
-
-    # Map existing tags by name (case insensitive) for easy lookup
-    existing_tag_map = {t["attributes"]["name"].lower(): t for t in existing_tags}
+    # Fold any freshly fetched tags into the local index
+    if existing_tags:
+        tag_index.apply_entries(existing_tags)
 
+    selected_tag_ids = []
     for tag in generated_tags:
-        tag_name = tag["name"]
-        tag_name_lower = tag_name.lower()
-
-        # Check if a similar tag already exists
-        if tag_name_lower in existing_tag_map:
-            existing_tag = existing_tag_map[tag_name_lower]
-            print(
-                f"✅ Using existing tag: {existing_tag['attributes']['name']} (ID: {existing_tag['id']})"
-            )
-            selected_tag_ids.append(existing_tag["id"])
-        else:
-            # Create new tag
-            print(f"Creating new tag: {tag_name}")
-            tag_id = create_tag(tag)
-            if tag_id:
-                selected_tag_ids.append(tag_id)
+        tag_id = select_or_create_tag(tag)
+        if tag_id:
+            selected_tag_ids.append(tag_id)
 
     return selected_tag_ids
 
 
-def create_tag(tag_data):
-    """Create a tag in Strapi"""
-    # Add timestamp to make slug unique
-    timestamp = int(time.time())
-    unique_slug = f"{tag_data['slug']}-{timestamp}"
-
-    # Prepare the tag data
-    payload = {
-        "data": {
-            "name": tag_data["name"],
-            "slug": unique_slug,
-            "description": tag_data["description"],
-        }
-    }
+def select_or_create_tag(tag):
+    """Return the ID of a matching existing tag, or create a new one"""
+    return strapi_call(strapi_async.select_or_create_tag, tag)
 
-    # Send the request
-    response = requests.post(f"{STRAPI_API_URL}/tags", headers=headers, json=payload)
 
-    # Check if the request was successful
-    if response.status_code == 200:
-        tag = response.json()
-        print(f"✅ Created tag: {tag_data['name']} (ID: {tag['data']['id']})")
-        return tag["data"]["id"]
-    else:
-        print(f"❌ Failed to create tag: {tag_data['name']}")
-        print(f"Status code: {response.status_code}")
-        print(f"Response: {response.text}")
-        return None
+def create_tag(tag_data):
+    """Create a tag in Strapi"""
+    return strapi_call(strapi_async.create_tag, tag_data)
 
 
 def create_article(
     article_data, seo_data, author_id, category_ids, tag_ids, image_id=None
 ):
     """Create an article in Strapi with all fields including SEO and CTAs"""
-    # Add timestamp to make slug unique
-    timestamp = int(time.time())
-    unique_slug = f"{article_data['slug']}-{timestamp}"
-
-    # Current date in ISO format
-    current_date = datetime.now().isoformat()
-
-    # Update structured data with dynamic values if it exists
-    if "structuredData" in seo_data:
-        # Update dates
-        seo_data["structuredData"]["datePublished"] = current_date
-        seo_data["structuredData"]["dateModified"] = current_date
-
-        # Update headline and description
-        seo_data["structuredData"]["headline"] = article_data["title"]
-        seo_data["structuredData"]["description"] = article_data["summary"]
-
-        # TODO: Update mainEntityOfPage
-        # # Update mainEntityOfPage
-        # seo_data["structuredData"]["mainEntityOfPage"][
-        #     "@id"
-        # ] = f"https://yourwebsite.com/blog/{unique_slug}"
-
-        # Image will be updated in the upload_to_strapi function
-
-    # Ensure metaSocial entries have the correct image ID
-    if "metaSocial" in seo_data and image_id:
-        for social in seo_data["metaSocial"]:
-            social["image"] = image_id
-
-    # Prepare the article data
-    payload = {
-        "data": {
-            "title": article_data["title"],
-            "slug": unique_slug,
-            "summary": article_data["summary"],
-            "content": article_data["content"],
-            "author": author_id,
-            "categories": category_ids,
-            "tags": tag_ids,
-            "readingTime": article_data.get(
-                "readingTime", len(article_data["content"].split()) // 200 + 1
-            ),
-            "publishDate": current_date,
-            "updateDate": current_date,
-            "featured": True,
-            "seo": seo_data,
-            "cta": article_data.get("ctas", []),
-            "references": article_data.get("references", []),
-        }
-    }
-
-    # Add featured image if provided
-    if image_id:
-        payload["data"]["featuredImage"] = image_id
-    else:
-        print(
-            "⚠️ Warning: No featured image provided. Article may not display correctly."
-        )
-
-    # Send the request
-    response = requests.post(
-        f"{STRAPI_API_URL}/articles", headers=headers, json=payload
+    return strapi_call(
+        strapi_async.create_article,
+        article_data,
+        seo_data,
+        author_id,
+        category_ids,
+        tag_ids,
+        image_id,
     )
 
-    # Check if the request was successful
-    if response.status_code == 200:
-        article = response.json()
-        print(
-            f"✅ Created article: {article_data['title']} (ID: {article['data']['id']})"
-        )
-        return article["data"]["id"]
-    else:
-        print(f"❌ Failed to create article: {article_data['title']}")
-        print(f"Status code: {response.status_code}")
-        print(f"Response: {response.text}")
-        return None
-
 
 def display_content(content):
     """Display the generated content in a readable format"""
@@ -895,97 +663,526 @@ def select_image():
 
 
 def upload_to_strapi(content, selected_author, image_path=None):
-    """Upload the generated content to Strapi"""
-    print("\n🚀 Starting upload to Strapi...\n")
+    """Upload the generated content to Strapi
+
+    Asks for the images that weren't given, then runs upload_to_strapi_async()
+    (see strapi_async.py): the image upload, author and taxonomy requests run
+    concurrently and only the article POST waits for their IDs.
 
+    Every step is recorded in the publish journal (see publish_journal.py):
+    running it again for the same content resumes after the last completed
+    step instead of creating everything twice.
+    """
     # If no image path provided, prompt user to select one
     if not image_path:
         print("📸 A featured image is required for the article.")
         image_path = select_image()
 
-    # Upload featured image
-    image_id = upload_image(
+    # Ask for the author's profile picture before any work starts in parallel
+    profile_image_path = None
+    if "id" in selected_author:
+        print(
+            f"✅ Using pre-selected author: {selected_author['name']} (ID: {selected_author['id']})"
+        )
+    else:
+        print(f"📸 A profile picture is required for author: {selected_author['name']}")
+        profile_image_path = select_image()
+
+    return strapi_call(
+        strapi_async.upload_to_strapi_async,
+        content,
+        selected_author,
         image_path,
-        f"{content['article']['slug']}_featured",
-        f"Featured image for article: {content['article']['title']}",
+        profile_image_path,
     )
 
-    if not image_id:
-        print("❌ Failed to upload image. Exiting.")
-        return False
 
-    # TODO: Update structured data with image URL (placeholder, will be replaced in frontend)
-    # # Update structured data with image URL (placeholder, will be replaced in frontend)
-    # if "structuredData" in content["seo"]:
-    #     content["seo"]["structuredData"][
-    #         "image"
-    #     ] = f"https://example.com/uploads/image-{image_id}.png"
-
-    # Update metaSocial entries with the image ID
-    if "metaSocial" in content["seo"]:
-        for social in content["seo"]["metaSocial"]:
-            social["image"] = image_id
-            print(
-                f"✅ Updated {social['socialNetwork']} social image with ID: {image_id}"
-            )
+def rollback_runs(key):
+    """Roll back one unfinished publish by key (prefix), or all of them"""
+    if key == "all":
+        keys = [r["key"] for r in publish_journal.runs(status=IN_PROGRESS)]
+    else:
+        try:
+            keys = [publish_journal.find(key)]
+        except KeyError as e:
+            print(f"❌ {e.args[0]}")
+            return False
+
+    if not keys:
+        print("✅ No unfinished publishes to roll back")
+    complete = True
+    for run_key in keys:
+        print(f"\n⏪ Rolling back {run_key[:12]}...")
+        try:
+            complete = publish_journal.rollback(run_key, strapi) and complete
+        except ValueError as e:
+            print(f"❌ {e}")
+            complete = False
+    return complete
+
+
+def author_from_entry(author_entry, topic):
+    """Convert a Strapi author entry into the author dict used by the generator"""
+    author_attrs = author_entry["attributes"]
+    return {
+        "id": author_entry["id"],
+        "name": author_attrs["name"],
+        "slug": author_attrs["slug"],
+        "email": author_attrs.get(
+            "email",
+            f"{author_attrs['name'].lower().replace(' ', '.')}@example.com",
+        ),
+        "bio": author_attrs.get("bio", f"Expert in {topic}"),
+        "role": author_attrs.get("role", "Content Writer"),
+        "expertise": author_attrs.get("expertise", topic.title()),
+    }
 
-    # Handle author - use the pre-selected author
-    author_id = None
 
-    # If the author has an ID, it's an existing author
-    if "id" in selected_author:
-        author_id = selected_author["id"]
-        print(
-            f"✅ Using pre-selected author: {selected_author['name']} (ID: {author_id})"
+def load_manifest(manifest_path):
+    """Load a batch manifest and resolve topic files and image paths
+
+    The manifest is a JSON list of objects with the keys:
+    - "topic" or "topic_file": the topic text, or a file containing it
+    - "author_id": ID of an existing Strapi author
+    - "image_path": featured image for the article
+    Relative paths are resolved against the manifest's directory.
+    """
+    manifest_dir = os.path.dirname(os.path.abspath(manifest_path))
+
+    with open(manifest_path, "r") as f:
+        entries = json.load(f)
+
+    if not isinstance(entries, list):
+        raise ValueError("Manifest must be a JSON list of article entries")
+
+    items = []
+    for i, entry in enumerate(entries):
+        topic = entry.get("topic")
+        if not topic and entry.get("topic_file"):
+            with open(os.path.join(manifest_dir, entry["topic_file"]), "r") as f:
+                topic = f.read()
+        topic = (topic or "").strip()
+        if not topic:
+            raise ValueError(f"Manifest entry {i+1} has no topic or topic_file")
+
+        if "author_id" not in entry:
+            raise ValueError(f"Manifest entry {i+1} has no author_id")
+
+        if not entry.get("image_path"):
+            raise ValueError(f"Manifest entry {i+1} has no image_path")
+        image_path = os.path.join(manifest_dir, entry["image_path"])
+        if not os.path.isfile(image_path):
+            raise ValueError(f"Manifest entry {i+1} image not found: {image_path}")
+
+        items.append(
+            {
+                "topic": topic,
+                "author_id": entry["author_id"],
+                "image_path": image_path,
+            }
         )
+
+    return items
+
+
+def batch_label(item):
+    """Short label for a manifest item, used in batch progress output"""
+    return item["topic"].splitlines()[0][:60]
+
+
+def save_content(content, author, image_path=None):
+    """Save generated content with the author and image to publish it with
+
+    --publish uploads the file again. With the same author and image the
+    upload has the same publish journal key, so it resumes a failed one.
+    """
+    stamp = int(time.time() * 1000)
+    # Failed bulk groups save several articles within the same millisecond
+    while os.path.exists(f"seo_article_{stamp}.json"):
+        stamp += 1
+    filename = f"seo_article_{stamp}.json"
+    saved = dict(content)
+    saved["upload"] = {
+        "author": author,
+        "image_path": os.path.abspath(image_path) if image_path else None,
+    }
+    with open(filename, "w") as f:
+        json.dump(saved, f, indent=2)
+    return filename
+
+
+def save_failed_upload(label, content, author, image_path=None):
+    """Keep the generated content so a failed upload doesn't waste the generation"""
+    filename = save_content(content, author, image_path)
+    print(f"❌ [{label}] Upload failed, content saved to {filename}")
+    print(f"   Publish it with: python real_article.py --publish {filename}")
+    return filename
+
+
+def publish_saved(path):
+    """Upload content saved by save_content() again (--publish)"""
+    try:
+        with open(path, "r") as f:
+            content = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"❌ Can't read {path}: {e}")
+        return False
+
+    upload = content.pop("upload", None) or {}
+    if not upload.get("author"):
+        print(f"❌ {path} doesn't say which author to publish it as")
+        return False
+    image_path = upload.get("image_path")
+    if image_path and not os.path.isfile(image_path):
+        print(f"⚠️ Saved featured image not found: {image_path}")
+        image_path = None
+
+    print(f"📤 Publishing {content['article']['title']} from {path}")
+    return upload_to_strapi(content, upload["author"], image_path)
+
+
+@traced("batch_item")
+@JOBS_IN_FLIGHT.track(kind="batch")
+def process_batch_item(item, author):
+    """Generate and upload a single manifest item, returning a result dict"""
+    label = batch_label(item)
+    result = {"topic": label, "success": False, "saved_to": None}
+
+    content = generate_seo_content(item["topic"], author, show_progress=False)
+    if not content:
+        print(f"❌ [{label}] Failed to generate content")
+        return result
+
+    if upload_to_strapi(content, author, item["image_path"]):
+        result["success"] = True
     else:
-        # Need to create the author with a profile picture
-        print(f"📸 Uploading profile picture for author: {selected_author['name']}")
-        profile_image_path = select_image()
-        profile_image_id = upload_image(
-            profile_image_path,
-            f"{selected_author['name']}_profile",
-            f"Profile picture of {selected_author['name']}, {selected_author['role']}",
+        result["saved_to"] = save_failed_upload(
+            label, content, author, item["image_path"]
         )
+    return result
 
-        author_id = create_author(selected_author, profile_image_id)
-        if not author_id:
-            print("❌ Failed to create author. Exiting.")
-            return False
 
-        print(f"✅ Created author: {selected_author['name']} (ID: {author_id})")
+@traced("batch_item")
+@JOBS_IN_FLIGHT.track(kind="batch")
+def prepare_bulk_item(key, item, author, publisher, queued_runs):
+    """Generate a manifest item and queue it for bulk publishing
 
-    # Get existing categories and select or create new ones
-    existing_categories = get_categories()
-    category_ids = select_or_create_categories(
-        content["categories"], existing_categories
-    )
+    Returns (result, content, run key); content is None unless the article
+    was queued, in which case its result comes from the publisher. Articles
+    the publish journal has as published are not sent again. queued_runs
+    maps the publish keys queued so far to their item keys, so the same
+    article generated twice in a batch is sent once.
+    """
+    label = batch_label(item)
+    result = {"topic": label, "success": False, "saved_to": None}
 
-    # Get existing tags and select or create new ones
-    existing_tags = get_tags()
-    tag_ids = select_or_create_tags(content["tags"], existing_tags)
+    content = generate_seo_content(item["topic"], author, show_progress=False)
+    if not content:
+        print(f"❌ [{label}] Failed to generate content")
+        return result, None, None
+
+    run_key = publish_key(content, author, file_digest(item["image_path"]))
+    if publish_journal.run_status(run_key) == PUBLISHED:
+        print(f"✅ [{label}] Already published: {content['article']['title']}")
+        result["success"] = True
+        return result, None, None
+    first = queued_runs.setdefault(run_key, key)
+    if first != key:
+        print(f"⏭️ [{label}] Same article as another item of this batch")
+        result["same_as"] = first
+        return result, None, None
 
-    # Create article
-    print("📝 Creating article...")
-    article_id = create_article(
-        content["article"], content["seo"], author_id, category_ids, tag_ids, image_id
+    image_id = upload_image(
+        item["image_path"],
+        f"{content['article']['slug']}_featured",
+        f"Featured image for article: {content['article']['title']}",
     )
+    if not image_id:
+        result["saved_to"] = save_failed_upload(
+            label, content, author, item["image_path"]
+        )
+        return result, None, None
+
+    publisher.add(key, content, author["id"], image_id)
+    return result, content, run_key
+
+
+def process_batch_bulk(jobs, workers):
+    """Generate with concurrent workers and publish in groups (see bulk_publisher.py)"""
+    category_index.sync_if_stale(strapi)
+    tag_index.sync_if_stale(strapi)
+    publisher = BulkPublisher(strapi)
+
+    results = []
+    queued = {}
+    queued_runs = {}
+    same = []
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(
+                prepare_bulk_item, key, item, author, publisher, queued_runs
+            ): key
+            for key, (item, author) in enumerate(jobs)
+        }
+        for future in as_completed(futures):
+            try:
+                result, content, run_key = future.result()
+            except Exception as e:
+                print(f"❌ Batch item failed: {e}")
+                result = {"topic": None, "success": False, "saved_to": None}
+                content = None
+            if content:
+                queued[futures[future]] = (result, content, run_key)
+            elif "same_as" in result:
+                same.append(result)
+            else:
+                results.append(result)
+
+    # A queued article without an ID (or without any result) wasn't published
+    published = dict(publisher.flush())
+    for key, (result, content, run_key) in queued.items():
+        article_id = published.get(key)
+        if article_id:
+            result["success"] = True
+            # Journaled like any upload, so running the batch again skips it
+            run = publish_journal.start(run_key, content["article"]["title"])
+            run.record("article", "articles", article_id, created=True)
+            run.finish()
+        else:
+            item, author = jobs[key]
+            result["saved_to"] = save_failed_upload(
+                result["topic"], content, author, item["image_path"]
+            )
+        results.append(result)
+    for result in same:
+        result["success"] = bool(published.get(result.pop("same_as")))
+        results.append(result)
+    return results
+
+
+async def process_batch_async(jobs, workers):
+    """Run a batch on one event loop, uploading through the async Strapi client
+
+    Generation still uses the blocking OpenAI client, so at most `workers`
+    generations run in threads at once; uploads don't hold a worker slot and
+    share one async connection pool.
+    """
+    generation_slots = asyncio.Semaphore(workers)
+
+    async with strapi_async.AsyncStrapiClient(
+        STRAPI_API_URL, STRAPI_API_TOKEN
+    ) as async_strapi:
+
+        async def process(item, author):
+            label = batch_label(item)
+            result = {"topic": label, "success": False, "saved_to": None}
+
+            with span("batch_item"), JOBS_IN_FLIGHT.track(kind="batch"):
+                async with generation_slots:
+                    content = await asyncio.to_thread(
+                        generate_seo_content, item["topic"], author, False
+                    )
+                if not content:
+                    print(f"❌ [{label}] Failed to generate content")
+                    return result
 
-    if article_id:
-        print("\n✨ Content upload complete!")
-        print(f"✅ Created article: {content['article']['title']}")
-        print(f"✅ Used author: {selected_author['name']} (ID: {author_id})")
-        print(f"✅ Used {len(category_ids)} categories")
-        print(f"✅ Used {len(tag_ids)} tags")
-        print(f"✅ Featured image: ID {image_id}")
-        return True
+                if await strapi_async.upload_to_strapi_async(
+                    async_strapi, content, author, item["image_path"]
+                ):
+                    result["success"] = True
+                else:
+                    result["saved_to"] = save_failed_upload(
+                        label, content, author, item["image_path"]
+                    )
+                return result
+
+        outcomes = await asyncio.gather(
+            *(process(item, author) for item, author in jobs), return_exceptions=True
+        )
+
+    results = []
+    for outcome in outcomes:
+        if isinstance(outcome, Exception):
+            print(f"❌ Batch item failed: {outcome}")
+            outcome = {"topic": None, "success": False, "saved_to": None}
+        results.append(outcome)
+    return results
+
+
+def run_batch(manifest_path, workers, use_async=False, bulk=False):
+    """Generate and upload every article in a manifest with concurrent workers"""
+    try:
+        items = load_manifest(manifest_path)
+    except (OSError, ValueError) as e:
+        print(f"❌ Error loading manifest {manifest_path}: {e}")
+        sys.exit(1)
+
+    if not items:
+        print("⚠️ Manifest is empty, nothing to do.")
+        return
+
+    # Resolve authors once up front instead of once per article
+    authors_by_id = {a["id"]: a for a in get_authors()}
+    jobs = []
+    for item in items:
+        if item["author_id"] not in authors_by_id:
+            print(f"❌ Author ID {item['author_id']} not found in Strapi. Exiting.")
+            sys.exit(1)
+        author = author_from_entry(authors_by_id[item["author_id"]], item["topic"])
+        jobs.append((item, author))
+
+    print(f"🚚 Processing {len(jobs)} articles with {workers} workers...")
+    started = time.time()
+
+    results = []
+    if bulk:
+        results = process_batch_bulk(jobs, workers)
+    elif use_async:
+        # asyncio.to_thread uses the loop's default executor, size it for the workers
+        loop = asyncio.new_event_loop()
+        loop.set_default_executor(ThreadPoolExecutor(max_workers=workers))
+        try:
+            results = loop.run_until_complete(process_batch_async(jobs, workers))
+        finally:
+            loop.close()
     else:
-        print("❌ Failed to create article.")
-        return False
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(process_batch_item, item, author)
+                for item, author in jobs
+            ]
+            for future in as_completed(futures):
+                try:
+                    results.append(future.result())
+                except Exception as e:
+                    print(f"❌ Batch item failed: {e}")
+                    results.append({"topic": None, "success": False, "saved_to": None})
+
+    succeeded = sum(1 for r in results if r["success"])
+    print("\n" + "=" * 80)
+    print(
+        f"📦 Batch complete: {succeeded}/{len(results)} articles uploaded "
+        f"in {time.time() - started:.1f}s"
+    )
+    for r in results:
+        if not r["success"]:
+            saved = f" (saved to {r['saved_to']})" if r["saved_to"] else ""
+            print(f"  ❌ {r['topic']}{saved}")
+
+    if succeeded < len(results):
+        sys.exit(1)
+
+
+def parse_args():
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(
+        description="Generate SEO-optimized articles and upload them to Strapi CMS"
+    )
+    parser.add_argument(
+        "--batch",
+        metavar="MANIFEST",
+        help="Run non-interactively for every article in a JSON manifest",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=int(os.getenv("BATCH_WORKERS", "4")),
+        help="Number of concurrent workers in batch mode (default: 4)",
+    )
+    parser.add_argument(
+        "--async",
+        dest="use_async",
+        action="store_true",
+        help="In batch mode, upload through the asyncio Strapi client on one event loop",
+    )
+    parser.add_argument(
+        "--bulk",
+        action="store_true",
+        help="In batch mode, publish articles in groups through the CMS's /articles/bulk endpoint",
+    )
+    parser.add_argument(
+        "--cache",
+        action=argparse.BooleanOptionalAction,
+        default=CACHE_ENABLED,
+        help="Reuse cached responses for identical prompts (default: $LLM_CACHE or off)",
+    )
+    parser.add_argument(
+        "--structured",
+        action=argparse.BooleanOptionalAction,
+        default=STRUCTURED_OUTPUT,
+        help="Enforce the article JSON schema with structured outputs (default: $STRUCTURED_OUTPUT or off)",
+    )
+    parser.add_argument(
+        "--engine",
+        choices=ENGINES,
+        default=DEFAULT_ENGINE,
+        help="'single' writes the article in one completion, 'outline' writes an outline and then every section in parallel (default: $GENERATION_ENGINE or single)",
+    )
+    parser.add_argument(
+        "--on-duplicate",
+        choices=POLICIES,
+        default=ON_DUPLICATE,
+        help="'warn' about topics and articles similar to published ones, or 'skip' generating/publishing them (default: $ON_DUPLICATE or warn)",
+    )
+    parser.add_argument(
+        "--rollback",
+        metavar="KEY",
+        help="Delete what an unfinished upload created, by publish journal key (prefix), or 'all' for every unfinished upload",
+    )
+    parser.add_argument(
+        "--publish",
+        metavar="JSON",
+        help="Upload a saved seo_article_*.json again, resuming its unfinished upload",
+    )
+    parser.add_argument(
+        "--trace",
+        metavar="EXPORTERS",
+        default=tracing.TRACE_EXPORT,
+        help="Record timing spans: 'jsonl', 'otlp' or 'jsonl,otlp' (default: $TRACE_EXPORT or off)",
+    )
+    parser.add_argument(
+        "--metrics-port",
+        type=int,
+        default=metrics.METRICS_PORT,
+        help="Serve Prometheus metrics on this port while running (default: $METRICS_PORT or off)",
+    )
+    args = parser.parse_args()
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+    if args.bulk and args.use_async:
+        parser.error("--bulk and --async can't be combined")
+    if sum(map(bool, (args.batch, args.rollback, args.publish))) > 1:
+        parser.error("--batch, --rollback and --publish can't be combined")
+    for name in filter(None, args.trace.split(",")):
+        if name.strip().lower() not in tracing.EXPORTERS:
+            parser.error(f"--trace: unknown exporter {name!r}")
+    return args
 
 
 def main():
     """Main function to generate and upload SEO content"""
+    global response_cache, structured_output, generation_engine, on_duplicate
+    args = parse_args()
+    structured_output = args.structured
+    generation_engine = args.engine
+    on_duplicate = args.on_duplicate
+    if args.trace != tracing.TRACE_EXPORT:
+        tracing.configure(args.trace)
+    metrics.start_server(args.metrics_port)
+    if args.cache:
+        response_cache = get_response_cache()
+        print(f"🗄️ Using cached responses from {response_cache.path}")
+
+    if args.rollback:
+        sys.exit(0 if rollback_runs(args.rollback) else 1)
+
+    if args.publish:
+        sys.exit(0 if publish_saved(args.publish) else 1)
+
+    if args.batch:
+        run_batch(args.batch, args.workers, args.use_async, args.bulk)
+        return
+
     # Read topic from SEO_INSTRUCT.md
     script_dir = os.path.dirname(os.path.abspath(__file__))
     input_file = os.path.join(script_dir, "SELENIUM_VS_BUGNINJA.md")
@@ -1032,19 +1229,9 @@ def main():
                     selected_index = int(choice) - 1
 
                 if 0 <= selected_index < len(existing_authors):
-                    author_attrs = existing_authors[selected_index]["attributes"]
-                    selected_author = {
-                        "id": existing_authors[selected_index]["id"],
-                        "name": author_attrs["name"],
-                        "slug": author_attrs["slug"],
-                        "email": author_attrs.get(
-                            "email",
-                            f"{author_attrs['name'].lower().replace(' ', '.')}@example.com",
-                        ),
-                        "bio": author_attrs.get("bio", f"Expert in {topic}"),
-                        "role": author_attrs.get("role", "Content Writer"),
-                        "expertise": author_attrs.get("expertise", topic.title()),
-                    }
+                    selected_author = author_from_entry(
+                        existing_authors[selected_index], topic
+                    )
                     print(f"✅ Selected author: {selected_author['name']}")
                     break
                 elif selected_index == len(existing_authors):
@@ -1134,6 +1321,9 @@ def main():
             print("\n🎉 Article successfully uploaded to Strapi CMS!")
         else:
             print("\n❌ There was an issue uploading to Strapi.")
+            save_failed_upload(
+                content["article"]["title"][:60], content, selected_author
+            )
     else:
         print("\n✋ Upload cancelled.")
         # Save to file option
@@ -1141,10 +1331,11 @@ def main():
             "Would you like to save the generated content to a file instead? (y/n): "
         ).lower()
         if save_option in ["y", "yes"]:
-            filename = f"seo_article_{int(time.time())}.json"
-            with open(filename, "w") as f:
-                json.dump(content, f, indent=2)
+            filename = save_content(content, selected_author)
             print(f"✅ Content saved to {filename}")
+            print(
+                f"   Publish it later with: python real_article.py --publish {filename}"
+            )
 
 
 if __name__ == "__main__":
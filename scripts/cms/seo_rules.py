@@ -0,0 +1,508 @@
+#!/usr/bin/env python3
+"""
+SEO rule checks for generated article markdown
+
+SEO_SYSTEM_PROMPT asks for rules the API can't enforce: every keyword used at
+least twice, headings under 70 characters, no H1. ContentChecker checks them
+in a single pass over article["content"], and reports every violation with
+its character position and line:
+
+- All keywords are counted at once with an Aho-Corasick automaton
+  (case-insensitive, whole words only), so the cost doesn't grow with the
+  number of keywords
+- ATX headings (## Heading) are parsed line by line, skipping fenced code
+- The checker is fed chunk by chunk, so it can follow a streaming response;
+  keywords can be set late (they are generated after the content) and the
+  text seen so far is scanned then
+
+Check a saved article or audit every published one:
+
+    python seo_rules.py check failed_uploads/article.json
+    python seo_rules.py audit            # only articles changed since last time
+    python seo_rules.py audit --full --json audit.json
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+from collections import deque, namedtuple
+
+from dotenv import load_dotenv
+
+from local_store import cache_path, load_json, save_json
+from strapi_client import StrapiClient
+
+MIN_KEYWORD_OCCURRENCES = int(os.getenv("SEO_MIN_KEYWORD_OCCURRENCES", "2"))
+# Percent of the content's words; more than this reads as keyword stuffing
+MAX_KEYWORD_DENSITY = float(os.getenv("SEO_MAX_KEYWORD_DENSITY", "3"))
+MAX_HEADING_LENGTH = 70
+KEYWORD_COUNT_RANGE = (3, 5)
+
+ERROR = "error"
+WARNING = "warning"
+
+# position is a character offset into the content, line is 1-based; both
+# are None for rules about the whole article
+Violation = namedtuple("Violation", "rule severity message position line")
+Heading = namedtuple("Heading", "level text position line")
+
+_HEADING = re.compile(r" {0,3}(#{1,6})(?:[ \t]+(.*?))?(?:[ \t]+#+)?[ \t]*$")
+_FENCE = re.compile(r" {0,3}(```|~~~)")
+_WORD = re.compile(r"\w+")
+
+
+def parse_keywords(keywords):
+    """The distinct keywords of a comma-separated string (or list)"""
+    if isinstance(keywords, str):
+        keywords = keywords.split(",")
+    seen = set()
+    parsed = []
+    for keyword in keywords or []:
+        keyword = " ".join(str(keyword).split())
+        if keyword and keyword.lower() not in seen:
+            seen.add(keyword.lower())
+            parsed.append(keyword)
+    return parsed
+
+
+class KeywordMatcher:
+    """Aho-Corasick automaton over lowercased keywords"""
+
+    def __init__(self, keywords):
+        self.keywords = list(keywords)
+        self._goto = [{}]
+        self._fail = [0]
+        # (keyword index, length) of every keyword ending in a state
+        self._out = [()]
+
+        for index, keyword in enumerate(self.keywords):
+            pattern = keyword.lower()
+            state = 0
+            for char in pattern:
+                next_state = self._goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append(())
+                    self._goto[state][char] = next_state
+                state = next_state
+            self._out[state] += ((index, len(pattern)),)
+
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                fail = self._goto[fail].get(char, 0)
+                self._fail[next_state] = fail if fail != next_state else 0
+                self._out[next_state] += self._out[self._fail[next_state]]
+
+    def scan(self, text, offset=0, state=0):
+        """Yield (keyword index, start, end) for matches in text
+
+        Positions are offset by offset; pass the returned state of the
+        previous call to continue across chunks. Returns the final state.
+        """
+        goto, fail, out = self._goto, self._fail, self._out
+        lowered = text.lower()
+        if len(lowered) != len(text):
+            # A few characters lowercase to two; keep positions aligned
+            lowered = "".join(char.lower()[0] for char in text)
+        for i, char in enumerate(lowered):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if out[state]:
+                end = offset + i + 1
+                for index, length in out[state]:
+                    yield index, end - length, end
+        return state
+
+
+def _is_word_char(char):
+    return char.isalnum() or char == "_"
+
+
+class ContentChecker:
+    """Chunk-fed SEO checker for article markdown
+
+    feed() the content as it arrives and call finish() at the end; violations
+    found so far (heading rules) can be read at any time.
+    """
+
+    def __init__(self, keywords=None):
+        # Chunks fed so far; the text property joins them when it is read
+        self._chunks = []
+        self._length = 0
+        self.words = 0
+        self.headings = []
+        self.violations = []
+        self.keywords = []
+        self.keyword_counts = {}
+        self.keyword_positions = {}
+        self.finished = False
+        self._matcher = None
+        self._match_state = 0
+        # Matches at the very end of the text wait for the next character
+        # to tell whether they end on a word boundary
+        self._pending = []
+        # The last characters fed, enough to look just before any keyword
+        self._window = ""
+        self._window_start = 0
+        self._window_size = 0
+        # Pieces of the line being fed, until its newline arrives
+        self._line = []
+        self._line_start = 0
+        self._line_number = 1
+        self._fence = None
+        self._heading_level = 1
+        if keywords:
+            self.set_keywords(keywords)
+
+    def set_keywords(self, keywords):
+        """Set the keywords to count, scanning the text fed so far"""
+        self.keywords = parse_keywords(keywords)
+        self.keyword_counts = {keyword: 0 for keyword in self.keywords}
+        self.keyword_positions = {keyword: None for keyword in self.keywords}
+        self._matcher = KeywordMatcher(self.keywords) if self.keywords else None
+        self._match_state = 0
+        self._pending = []
+        self._window = ""
+        self._window_start = 0
+        self._window_size = max(map(len, self.keywords), default=0) + 2
+        self._scan_keywords(self.text, 0)
+
+    @property
+    def text(self):
+        """The content fed so far"""
+        if len(self._chunks) > 1:
+            self._chunks = ["".join(self._chunks)]
+        return self._chunks[0] if self._chunks else ""
+
+    def feed(self, chunk):
+        if not chunk:
+            return
+        start = self._length
+        previous = self._chunks[-1][-1] if self._chunks else ""
+        self._chunks.append(chunk)
+        self._length += len(chunk)
+        words = len(_WORD.findall(chunk))
+        # A word split across chunks was counted twice
+        if words and previous and _is_word_char(previous) and _is_word_char(chunk[0]):
+            words -= 1
+        self.words += words
+        self._scan_lines(chunk, start)
+        self._scan_keywords(chunk, start)
+
+    def update(self, content):
+        """Feed the part of a growing content string that wasn't fed yet"""
+        if content and len(content) > self._length:
+            self.feed(content[self._length :])
+
+    def finish(self):
+        """Check the last line and the keyword rules; returns all violations"""
+        if self.finished:
+            return self.violations
+        self.finished = True
+        line = "".join(self._line)
+        if line:
+            self._check_line(line, self._line_start)
+        for match in self._pending:
+            self._count_if_word(*match)
+        self._pending = []
+        self.violations.extend(self._keyword_violations())
+        return self.violations
+
+    # Headings
+
+    def _scan_lines(self, chunk, start):
+        position = 0
+        while True:
+            end = chunk.find("\n", position)
+            if end == -1:
+                if position < len(chunk):
+                    self._line.append(chunk[position:])
+                return
+            self._line.append(chunk[position:end])
+            self._check_line("".join(self._line), self._line_start)
+            self._line = []
+            self._line_start = start + end + 1
+            self._line_number += 1
+            position = end + 1
+
+    def _check_line(self, line, position):
+        fence = _FENCE.match(line)
+        if fence:
+            if self._fence is None:
+                self._fence = fence.group(1)
+            elif fence.group(1) == self._fence:
+                self._fence = None
+            return
+        if self._fence is not None or not line.startswith(("#", " ")):
+            return
+        match = _HEADING.match(line)
+        if not match:
+            return
+
+        level = len(match.group(1))
+        text = (match.group(2) or "").strip()
+        heading = Heading(level, text, position, self._line_number)
+        self.headings.append(heading)
+
+        if level == 1:
+            self._violation(
+                "no-h1", ERROR, f"H1 heading '{text}', start with H2", heading
+            )
+        if len(text) > MAX_HEADING_LENGTH:
+            self._violation(
+                "heading-length",
+                ERROR,
+                f"Heading is {len(text)} characters, maximum is {MAX_HEADING_LENGTH}",
+                heading,
+            )
+        if level > self._heading_level + 1:
+            self._violation(
+                "heading-skip",
+                WARNING,
+                f"H{level} follows H{self._heading_level}, skipping a level",
+                heading,
+            )
+        self._heading_level = level
+
+    def _violation(self, rule, severity, message, heading):
+        self.violations.append(
+            Violation(rule, severity, message, heading.position, heading.line)
+        )
+
+    # Keywords
+
+    def _scan_keywords(self, chunk, start):
+        """Count the keywords in chunk, which starts at position start"""
+        if self._matcher is None or not chunk:
+            return
+        self._window += chunk
+        pending, self._pending = self._pending, []
+        for match in pending:
+            self._count_if_word(*match)
+
+        scan = self._matcher.scan(chunk, start, self._match_state)
+        while True:
+            try:
+                match = next(scan)
+            except StopIteration as done:
+                self._match_state = done.value
+                break
+            if match[2] == self._length:
+                self._pending.append(match)
+            else:
+                self._count_if_word(*match)
+
+        excess = len(self._window) - self._window_size
+        if excess > 0:
+            self._window = self._window[excess:]
+            self._window_start += excess
+
+    def _char(self, position):
+        return self._window[position - self._window_start]
+
+    def _count_if_word(self, index, start, end):
+        keyword = self.keywords[index]
+        # Whole words only: "test" doesn't count inside "testing"
+        if (
+            _is_word_char(keyword[0])
+            and start > 0
+            and _is_word_char(self._char(start - 1))
+        ):
+            return
+        if (
+            _is_word_char(keyword[-1])
+            and end < self._length
+            and _is_word_char(self._char(end))
+        ):
+            return
+        self._count(index, start, end)
+
+    def _count(self, index, start, end):
+        keyword = self.keywords[index]
+        self.keyword_counts[keyword] += 1
+        if self.keyword_positions[keyword] is None:
+            self.keyword_positions[keyword] = start
+
+    def density(self, keyword):
+        """Percent of the content's words taken up by a keyword"""
+        if not self.words:
+            return 0.0
+        return 100.0 * self.keyword_counts[keyword] * len(keyword.split()) / self.words
+
+    def _keyword_violations(self):
+        violations = []
+        low, high = KEYWORD_COUNT_RANGE
+        if self.keywords and not low <= len(self.keywords) <= high:
+            violations.append(
+                Violation(
+                    "keyword-count",
+                    WARNING,
+                    f"{len(self.keywords)} keywords, use {low}-{high}",
+                    None,
+                    None,
+                )
+            )
+        for keyword in self.keywords:
+            count = self.keyword_counts[keyword]
+            position = self.keyword_positions[keyword]
+            line = (
+                self.text.count("\n", 0, position) + 1 if position is not None else None
+            )
+            if count < MIN_KEYWORD_OCCURRENCES:
+                violations.append(
+                    Violation(
+                        "keyword-occurrences",
+                        ERROR,
+                        f"Keyword '{keyword}' appears {count} time(s), "
+                        f"at least {MIN_KEYWORD_OCCURRENCES} required",
+                        position,
+                        line,
+                    )
+                )
+            elif self.density(keyword) > MAX_KEYWORD_DENSITY:
+                violations.append(
+                    Violation(
+                        "keyword-density",
+                        WARNING,
+                        f"Keyword '{keyword}' is {self.density(keyword):.1f}% of the "
+                        f"words, maximum is {MAX_KEYWORD_DENSITY:g}%",
+                        position,
+                        line,
+                    )
+                )
+        return violations
+
+
+def parse_headings(markdown):
+    """The ATX headings of a markdown text, outside fenced code"""
+    checker = ContentChecker()
+    checker.feed(markdown)
+    checker.finish()
+    return checker.headings
+
+
+def check_content(content, keywords=None):
+    """Check markdown in one go; returns the finished ContentChecker"""
+    checker = ContentChecker(keywords)
+    checker.feed(content or "")
+    checker.finish()
+    return checker
+
+
+def check_article(data):
+    """Check a generated article dict, returning a list of Violations"""
+    article = data.get("article") or {}
+    seo = data.get("seo") or {}
+    return check_content(article.get("content"), seo.get("keywords")).violations
+
+
+def format_violation(violation):
+    where = f"line {violation.line}: " if violation.line else ""
+    icon = "❌" if violation.severity == ERROR else "⚠️"
+    return f"{icon} {where}{violation.message} [{violation.rule}]"
+
+
+# Command line
+
+
+def _print_report(label, violations):
+    if not violations:
+        print(f"✅ {label}")
+        return
+    print(f"🔎 {label}: {len(violations)} issue(s)")
+    for violation in violations:
+        print(f"  {format_violation(violation)}")
+
+
+def check_files(paths):
+    """Check generated article JSON files; returns the number of errors"""
+    errors = 0
+    for path in paths:
+        with open(path, "r") as f:
+            violations = check_article(json.load(f))
+        _print_report(path, violations)
+        errors += sum(v.severity == ERROR for v in violations)
+    return errors
+
+
+def audit_archive(strapi, full=False, json_path=None):
+    """Check every published article, or only the ones changed since the
+    last audit; results are kept in the cache between runs"""
+    state_path = cache_path("seo_audit.json")
+    state = {} if full else load_json(state_path, {})
+    results = state.get("articles", {})
+    params = {"updatedSince": state["updatedAt"]} if state.get("updatedAt") else None
+
+    checked = 0
+    latest = state.get("updatedAt")
+    for entry in strapi.iter_collection("articles/content", params=params):
+        attributes = entry["attributes"]
+        seo = attributes.get("seo") or {}
+        violations = check_content(
+            attributes.get("content"), seo.get("keywords")
+        ).violations
+        results[str(entry["id"])] = {
+            "slug": attributes["slug"],
+            "updatedAt": attributes["updatedAt"],
+            "violations": [v._asdict() for v in violations],
+        }
+        latest = max(latest or "", attributes["updatedAt"])
+        checked += 1
+    save_json(state_path, {"updatedAt": latest, "articles": results})
+
+    print(f"📚 Checked {checked} new or updated articles ({len(results)} in total)\n")
+    rules = {}
+    for result in sorted(results.values(), key=lambda r: r["slug"]):
+        violations = [Violation(**v) for v in result["violations"]]
+        if violations:
+            _print_report(result["slug"], violations)
+        for violation in violations:
+            rules[violation.rule] = rules.get(violation.rule, 0) + 1
+
+    clean = sum(not r["violations"] for r in results.values())
+    print(f"\n📊 {clean}/{len(results)} articles pass every rule")
+    for rule, count in sorted(rules.items(), key=lambda item: -item[1]):
+        print(f"  {rule}: {count}")
+
+    if json_path:
+        with open(json_path, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"💾 Report written to {json_path}")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check articles against SEO rules")
+    commands = parser.add_subparsers(dest="command", required=True)
+    check = commands.add_parser("check", help="Check generated article JSON files")
+    check.add_argument("paths", nargs="+", metavar="FILE")
+    audit = commands.add_parser("audit", help="Check every article in Strapi")
+    audit.add_argument(
+        "--full",
+        action="store_true",
+        help="Check every article again, not only the ones changed since the last audit",
+    )
+    audit.add_argument("--json", metavar="PATH", help="Also write the report as JSON")
+    args = parser.parse_args()
+
+    if args.command == "check":
+        sys.exit(1 if check_files(args.paths) else 0)
+
+    load_dotenv()
+    strapi = StrapiClient(os.getenv("STRAPI_API_URL"), os.getenv("STRAPI_API_TOKEN"))
+    audit_archive(strapi, args.full, args.json)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,639 @@
+#!/usr/bin/env python3
+"""
+asyncio Strapi API layer
+
+The Strapi operations of real_article.py and the Streamlit app, built on a
+single shared httpx.AsyncClient. Batch and server workloads can keep many
+uploads in flight on one event loop instead of blocking a thread per article.
+
+Synchronous callers (the interactive CLI, --bulk and the app's publish jobs)
+go through SyncRunner, which runs these functions on an event loop in a
+background thread, so media reuse, taxonomy matching and the publish journal
+are implemented once. Messages are printed, or sent elsewhere with
+reporting_to().
+"""
+
+import asyncio
+import contextlib
+import contextvars
+import threading
+import time
+
+import httpx
+
+from article_corpus import get_article_corpus
+from image_pipeline import describe as describe_image, prepare_image
+from media_index import file_digest, get_media_index, info_changed
+from metrics import ARTICLES_PUBLISHED, counted, observe_request
+from publish_journal import PUBLISHED, get_publish_journal, publish_key
+from strapi_client import (
+    AUTHOR_FIELDS,
+    DEFAULT_BACKOFF_FACTOR,
+    DEFAULT_CONNECT_TIMEOUT,
+    DEFAULT_MAX_RETRIES,
+    DEFAULT_PAGE_SIZE,
+    DEFAULT_POOL_SIZE,
+    DEFAULT_READ_TIMEOUT,
+    TAXONOMY_FIELDS,
+    api_route,
+    article_payload,
+    author_payload,
+    collection_page_params,
+    file_info_data,
+    has_next_page,
+    should_retry,
+    taxonomy_payload,
+    upload_body,
+)
+from taxonomy_index import (
+    INDEX_FIELDS,
+    SYNC_INTERVAL,
+    get_taxonomy_index,
+    normalize_name,
+)
+from tracing import current_span, http_span, record_http, traced
+
+# Where progress messages go, see reporting_to()
+_reporter = contextvars.ContextVar("strapi_reporter", default=print)
+
+
+def report(message):
+    """Print a progress message, or pass it to the current reporter"""
+    _reporter.get()(message)
+
+
+@contextlib.contextmanager
+def reporting_to(callback):
+    """Send the messages of the operations started inside to callback
+
+    Tasks and threads started from the block inherit the reporter, including
+    SyncRunner.run() calls.
+    """
+    token = _reporter.set(callback)
+    try:
+        yield
+    finally:
+        _reporter.reset(token)
+
+
+class KeyedLocks:
+    """asyncio locks by key, dropped once nobody holds or waits for them
+
+    Used from a single event loop (the client's), so the bookkeeping itself
+    needs no locking.
+    """
+
+    def __init__(self):
+        self._locks = {}
+
+    def __len__(self):
+        return len(self._locks)
+
+    @contextlib.asynccontextmanager
+    async def hold(self, key):
+        entry = self._locks.setdefault(key, [asyncio.Lock(), 0])
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                yield
+        finally:
+            entry[1] -= 1
+            if not entry[1]:
+                del self._locks[key]
+
+
+class AsyncStrapiClient:
+    """Async Strapi REST client with connection limits, timeouts and retries"""
+
+    def __init__(
+        self,
+        api_url,
+        api_token,
+        max_connections=DEFAULT_POOL_SIZE,
+        connect_timeout=DEFAULT_CONNECT_TIMEOUT,
+        read_timeout=DEFAULT_READ_TIMEOUT,
+        max_retries=DEFAULT_MAX_RETRIES,
+        backoff_factor=DEFAULT_BACKOFF_FACTOR,
+    ):
+        self.api_url = (api_url or "").rstrip("/")
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.client = httpx.AsyncClient(
+            headers={"Authorization": f"Bearer {api_token}"},
+            timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections,
+            ),
+            # Connection errors are retried by the transport itself
+            transport=httpx.AsyncHTTPTransport(retries=max_retries),
+        )
+        # Serialize uploads of the same file and creates of the same
+        # category/tag name among this client's concurrent operations
+        self.media_locks = KeyedLocks()
+        self.taxonomy_locks = KeyedLocks()
+
+    def url(self, path):
+        """Build the full URL for an API path such as "/articles" """
+        return f"{self.api_url}/{path.lstrip('/')}"
+
+    async def request(self, method, path, **kwargs):
+        """Send a request, retrying 429 and 5xx responses with backoff
+
+        POSTs are only retried when Strapi turned them away (see should_retry()).
+        """
+        route = api_route(path)
+        started = time.perf_counter()
+        response = None
+        with http_span(method, route, path) as current:
+            try:
+                for attempt in range(self.max_retries + 1):
+                    response = await self.client.request(
+                        method, self.url(path), **kwargs
+                    )
+                    retry_after = response.headers.get("retry-after")
+                    if attempt == self.max_retries or not should_retry(
+                        method, response.status_code, retry_after is not None
+                    ):
+                        current.set({"http.retries": attempt})
+                        record_http(current, response)
+                        return response
+
+                    try:
+                        delay = float(retry_after)
+                    except (TypeError, ValueError):
+                        delay = self.backoff_factor * (2**attempt)
+                    await asyncio.sleep(delay)
+            finally:
+                observe_request(method, route, started, response)
+
+    async def get(self, path, **kwargs):
+        return await self.request("GET", path, **kwargs)
+
+    async def post(self, path, **kwargs):
+        return await self.request("POST", path, **kwargs)
+
+    async def iter_collection(
+        self,
+        collection,
+        fields=None,
+        populate=None,
+        params=None,
+        page_size=DEFAULT_PAGE_SIZE,
+    ):
+        """Async generator over every entry of a collection, one page at a time"""
+        page = 1
+        while True:
+            response = await self.get(
+                f"/{collection}",
+                params=collection_page_params(
+                    collection, page, page_size, fields, populate, params
+                ),
+            )
+            response.raise_for_status()
+            body = response.json()
+            entries = body.get("data") or []
+            for entry in entries:
+                yield entry
+
+            if not entries or not has_next_page(body, page, page_size, len(entries)):
+                return
+            page += 1
+
+    async def aclose(self):
+        await self.client.aclose()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
+
+
+class SyncRunner:
+    """Runs the async Strapi operations for synchronous callers
+
+    One event loop in a daemon thread with one AsyncStrapiClient, so every
+    thread calling run() shares its connection pool and locks.
+    """
+
+    def __init__(self, api_url, api_token, **client_options):
+        self.strapi = AsyncStrapiClient(api_url, api_token, **client_options)
+        self.loop = asyncio.new_event_loop()
+        threading.Thread(
+            target=self.loop.run_forever, name="strapi-async", daemon=True
+        ).start()
+
+    def run(self, func, *args):
+        """Call func(strapi, *args) on the runner's loop and wait for the result
+
+        The call runs in a copy of the caller's context, so the current
+        tracing span and reporter carry over.
+        """
+        return asyncio.run_coroutine_threadsafe(
+            func(self.strapi, *args), self.loop
+        ).result()
+
+
+_runners = {}
+_runners_lock = threading.Lock()
+
+
+def get_sync_runner(api_url, api_token):
+    """Return the process-wide runner for a Strapi URL and token"""
+    with _runners_lock:
+        if (api_url, api_token) not in _runners:
+            _runners[api_url, api_token] = SyncRunner(api_url, api_token)
+        return _runners[api_url, api_token]
+
+
+def _report_failure(message, response):
+    report(
+        f"❌ {message}\nStatus code: {response.status_code}\nResponse: {response.text}"
+    )
+
+
+async def _upload_new_image(strapi, image_path, name, alt_text):
+    # Read, shrink and re-encode the file off the event loop
+    image = await asyncio.to_thread(prepare_image, image_path)
+    report(f"🗜️ {describe_image(image)}")
+
+    with upload_body(image, name, alt_text) as body:
+        response = await strapi.post("/upload", content=body, headers=body.headers)
+
+    if response.status_code == 200:
+        uploaded_file = response.json()[0]
+        report(
+            f"✅ Uploaded image: {uploaded_file['name']} (ID: {uploaded_file['id']})"
+        )
+        return uploaded_file["id"]
+    _report_failure(f"Failed to upload image: {image_path}", response)
+    return None
+
+
+async def upload_image(strapi, image_path, name=None, alt_text=None):
+    """Upload an image to Strapi media library with alternative text
+
+    A file that was uploaded before is reused instead (see media_index.py).
+    """
+    return (await _upload_image(strapi, image_path, name, alt_text))[0]
+
+
+@traced("upload_image")
+async def _upload_image(strapi, image_path, name, alt_text):
+    """upload_image(), returning (media ID, uploaded)"""
+    report(f"📤 Uploading image: {image_path}")
+
+    index = get_media_index()
+    digest = await asyncio.to_thread(file_digest, image_path)
+
+    # Concurrent uploads of the same file (e.g. one author's profile picture)
+    # wait for the first one
+    async with strapi.media_locks.hold(digest):
+        entry = index.lookup(digest)
+        if entry:
+            # Only a 404 means the media was deleted in Strapi
+            response = await strapi.get(f"/upload/files/{entry['id']}")
+            if response.status_code != 404:
+                if info_changed(entry, name, alt_text):
+                    response = await strapi.post(
+                        "/upload",
+                        params={"id": entry["id"]},
+                        data=file_info_data(name, alt_text),
+                    )
+                    if response.status_code == 200:
+                        await asyncio.to_thread(
+                            index.add, digest, entry["id"], name, alt_text
+                        )
+                report(f"♻️ Reusing uploaded image (ID: {entry['id']})")
+                return entry["id"], False
+            await asyncio.to_thread(index.remove, digest)
+
+        media_id = await _upload_new_image(strapi, image_path, name, alt_text)
+        if media_id:
+            await asyncio.to_thread(index.add, digest, media_id, name, alt_text)
+        return media_id, True
+
+
+async def _get_collection(strapi, collection, fields):
+    report(f"📚 Fetching existing {collection} from Strapi...")
+
+    try:
+        entries = [e async for e in strapi.iter_collection(collection, fields=fields)]
+    except httpx.HTTPStatusError as e:
+        _report_failure(f"Failed to fetch {collection}", e.response)
+        return []
+
+    if entries:
+        report(f"✅ Found {len(entries)} existing {collection}")
+    else:
+        report(f"⚠️ No existing {collection} found")
+    return entries
+
+
+async def get_authors(strapi):
+    """Get all authors from Strapi"""
+    return await _get_collection(strapi, "authors", AUTHOR_FIELDS)
+
+
+async def get_categories(strapi):
+    """Get all categories from Strapi"""
+    return await _get_collection(strapi, "categories", TAXONOMY_FIELDS)
+
+
+async def get_tags(strapi):
+    """Get all tags from Strapi"""
+    return await _get_collection(strapi, "tags", TAXONOMY_FIELDS)
+
+
+@traced()
+async def create_author(strapi, author_data, profile_image_id=None):
+    """Create an author in Strapi"""
+    response = await strapi.post(
+        "/authors", json=author_payload(author_data, profile_image_id)
+    )
+
+    if response.status_code == 200:
+        author_id = response.json()["data"]["id"]
+        report(f"✅ Created author: {author_data['name']} (ID: {author_id})")
+        return author_id
+    _report_failure(f"Failed to create author: {author_data['name']}", response)
+    return None
+
+
+async def _create_taxonomy(strapi, collection, label, taxonomy_data):
+    response = await strapi.post(f"/{collection}", json=taxonomy_payload(taxonomy_data))
+
+    if response.status_code == 200:
+        entry_id = response.json()["data"]["id"]
+        report(f"✅ Created {label}: {taxonomy_data['name']} (ID: {entry_id})")
+        return entry_id
+    _report_failure(f"Failed to create {label}: {taxonomy_data['name']}", response)
+    return None
+
+
+@traced()
+async def create_category(strapi, category_data):
+    """Create a category in Strapi"""
+    return await _create_taxonomy(strapi, "categories", "category", category_data)
+
+
+@traced()
+async def create_tag(strapi, tag_data):
+    """Create a tag in Strapi"""
+    return await _create_taxonomy(strapi, "tags", "tag", tag_data)
+
+
+@traced()
+async def create_article(
+    strapi, article_data, seo_data, author_id, category_ids, tag_ids, image_id=None
+):
+    """Create an article in Strapi with all fields including SEO and CTAs"""
+    if not image_id:
+        report(
+            "⚠️ Warning: No featured image provided. Article may not display correctly."
+        )
+    payload = article_payload(
+        article_data, seo_data, author_id, category_ids, tag_ids, image_id
+    )
+    response = await strapi.post("/articles", json=payload)
+
+    if response.status_code == 200:
+        article_id = response.json()["data"]["id"]
+        report(f"✅ Created article: {article_data['title']} (ID: {article_id})")
+        await asyncio.to_thread(get_article_corpus().add, article_id, payload["data"])
+        return article_id
+    _report_failure(f"Failed to create article: {article_data['title']}", response)
+    return None
+
+
+async def sync_taxonomy_index(strapi, index, max_age=SYNC_INTERVAL):
+    """Incrementally sync a local taxonomy index through the async client"""
+    if time.time() - index.last_synced < max_age:
+        return True
+    try:
+        entries = [
+            e
+            async for e in strapi.iter_collection(
+                index.collection, fields=INDEX_FIELDS, params=index.sync_params()
+            )
+        ]
+    except httpx.HTTPStatusError as e:
+        report(f"⚠️ Failed to sync {index.collection} index: {e.response.status_code}")
+        return False
+    await asyncio.to_thread(index.apply_entries, entries)
+    return True
+
+
+async def _select_or_create(strapi, index_synced, index, generated, create):
+    """Reuse an indexed entry with the same name or slug, or create it
+
+    Returns (ID, created).
+    """
+    await index_synced
+
+    # Serialize creates of the same name so concurrent uploads don't duplicate it
+    key = (index.collection, normalize_name(generated["name"]))
+    async with strapi.taxonomy_locks.hold(key):
+        entry_id = index.lookup(generated["name"], generated["slug"])
+        if entry_id is not None:
+            report(f"✅ Using existing {generated['name']} (ID: {entry_id})")
+            return entry_id, False
+
+        entry_id = await create(strapi, generated)
+        if entry_id:
+            await asyncio.to_thread(
+                index.add, entry_id, generated["name"], generated["slug"]
+            )
+        return entry_id, True
+
+
+async def select_or_create_category(strapi, category):
+    """Return the ID of a matching existing category, or create a new one"""
+    index = get_taxonomy_index("categories")
+    synced = sync_taxonomy_index(strapi, index)
+    return (await _select_or_create(strapi, synced, index, category, create_category))[
+        0
+    ]
+
+
+async def select_or_create_tag(strapi, tag):
+    """Return the ID of a matching existing tag, or create a new one"""
+    index = get_taxonomy_index("tags")
+    synced = sync_taxonomy_index(strapi, index)
+    return (await _select_or_create(strapi, synced, index, tag, create_tag))[0]
+
+
+async def _step(run, step, collection, func):
+    """PublishRun.step() for a coroutine function, off the event loop"""
+    entity_id = await asyncio.to_thread(run.get, step)
+    if entity_id is not None:
+        report(f"↩️ Resuming: {step} already done (ID: {entity_id})")
+        return entity_id
+    entity_id, created = await func()
+    if entity_id:
+        await asyncio.to_thread(run.record, step, collection, entity_id, created)
+    return entity_id
+
+
+async def _created(coro):
+    """Await a create call as (ID, created)"""
+    return await coro, True
+
+
+@traced("upload_to_strapi")
+@counted(ARTICLES_PUBLISHED)
+async def upload_to_strapi_async(
+    strapi, content, selected_author, image_path, profile_image_path=None
+):
+    """Upload generated content to Strapi without blocking the event loop
+
+    Non-interactive: the featured image path (and, for a new author without an
+    "id", a profile image path) must be provided. Image, author, categories
+    and tags are requested concurrently; the article waits for their IDs.
+
+    Every step is recorded in the publish journal (see publish_journal.py):
+    uploading the same content again resumes after the last completed step
+    instead of creating everything twice.
+    """
+    report("\n🚀 Starting upload to Strapi...\n")
+
+    journal = get_publish_journal()
+    digest = await asyncio.to_thread(file_digest, image_path)
+    run = await asyncio.to_thread(
+        journal.start,
+        publish_key(content, selected_author, digest),
+        content["article"]["title"],
+    )
+    current_span().set(
+        {"article.slug": content["article"]["slug"], "publish.key": run.key}
+    )
+    if await asyncio.to_thread(lambda: run.status) == PUBLISHED:
+        report(f"✅ Already published: {content['article']['title']}")
+        return True
+
+    try:
+        if await _publish(
+            strapi, run, content, selected_author, image_path, profile_image_path
+        ):
+            await asyncio.to_thread(run.finish)
+            report(f"\n✨ Content upload complete: {content['article']['title']}")
+            return True
+        report("❌ Failed to create article.")
+    except Exception as e:
+        report(f"❌ Error uploading to Strapi: {e}")
+    report_unfinished_run(run)
+    return False
+
+
+async def _publish(
+    strapi, run, content, selected_author, image_path, profile_image_path
+):
+    """The journaled steps of upload_to_strapi_async(), returning the article ID"""
+
+    async def resolve_author():
+        if "id" in selected_author:
+            return selected_author["id"]
+        profile_image_id = None
+        if profile_image_path:
+            profile_image_id = await _step(
+                run,
+                "profile_image",
+                "media",
+                lambda: _upload_image(
+                    strapi,
+                    profile_image_path,
+                    f"{selected_author['name']}_profile",
+                    f"Profile picture of {selected_author['name']}, {selected_author['role']}",
+                ),
+            )
+        return await _step(
+            run,
+            "author",
+            "authors",
+            lambda: _created(create_author(strapi, selected_author, profile_image_id)),
+        )
+
+    # Each index is synced once and shared by every category/tag coroutine
+    category_index = get_taxonomy_index("categories")
+    tag_index = get_taxonomy_index("tags")
+    categories_synced = asyncio.ensure_future(
+        sync_taxonomy_index(strapi, category_index)
+    )
+    tags_synced = asyncio.ensure_future(sync_taxonomy_index(strapi, tag_index))
+
+    image_id, author_id, *taxonomy_ids = await asyncio.gather(
+        _step(
+            run,
+            "image",
+            "media",
+            lambda: _upload_image(
+                strapi,
+                image_path,
+                f"{content['article']['slug']}_featured",
+                f"Featured image for article: {content['article']['title']}",
+            ),
+        ),
+        resolve_author(),
+        *[
+            _step(
+                run,
+                f"category:{c['slug']}",
+                "categories",
+                lambda c=c: _select_or_create(
+                    strapi, categories_synced, category_index, c, create_category
+                ),
+            )
+            for c in content["categories"]
+        ],
+        *[
+            _step(
+                run,
+                f"tag:{t['slug']}",
+                "tags",
+                lambda t=t: _select_or_create(
+                    strapi, tags_synced, tag_index, t, create_tag
+                ),
+            )
+            for t in content["tags"]
+        ],
+    )
+
+    if not image_id:
+        report("❌ Failed to upload image.")
+        return None
+    if not author_id:
+        report("❌ Failed to create author.")
+        return None
+
+    category_count = len(content["categories"])
+    category_ids = [i for i in taxonomy_ids[:category_count] if i]
+    tag_ids = [i for i in taxonomy_ids[category_count:] if i]
+
+    return await _step(
+        run,
+        "article",
+        "articles",
+        lambda: _created(
+            create_article(
+                strapi,
+                content["article"],
+                content["seo"],
+                author_id,
+                category_ids,
+                tag_ids,
+                image_id,
+            )
+        ),
+    )
+
+
+def report_unfinished_run(run):
+    """Tell the user how to resume or roll back a failed publish"""
+    report(
+        f"🧾 Completed steps are kept in the publish journal (key {run.key[:12]})\n"
+        "   Upload the same content again to resume it, e.g. with:\n"
+        "   python real_article.py --publish <saved seo_article_*.json>\n"
+        "   or delete what it created with:\n"
+        f"   python real_article.py --rollback {run.key[:12]}"
+    )
@@ -0,0 +1,329 @@
+#!/usr/bin/env python3
+"""
+Shared Strapi HTTP client
+
+A single pooled, keep-alive session used by both the command-line generator
+(real_article.py) and the Streamlit app (article_generator_app.py).
+
+- Connections are reused across requests (and across threads)
+- Every request has a timeout
+- 429 and 5xx responses are retried with exponential backoff; writes
+  (POST) only when Strapi turned them away, so nothing is created twice
+"""
+
+import json
+import os
+import re
+import time
+from datetime import datetime
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from article_corpus import article_url
+from metrics import observe_request
+from multipart import MultipartBody
+from tracing import http_span, record_http
+
+DEFAULT_POOL_SIZE = int(os.getenv("STRAPI_POOL_SIZE", "10"))
+DEFAULT_CONNECT_TIMEOUT = float(os.getenv("STRAPI_CONNECT_TIMEOUT", "5"))
+DEFAULT_READ_TIMEOUT = float(os.getenv("STRAPI_READ_TIMEOUT", "60"))
+DEFAULT_MAX_RETRIES = int(os.getenv("STRAPI_MAX_RETRIES", "3"))
+DEFAULT_BACKOFF_FACTOR = float(os.getenv("STRAPI_BACKOFF_FACTOR", "0.5"))
+
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+# Methods that can be sent again after a timeout or a 5xx
+IDEMPOTENT_METHODS = Retry.DEFAULT_ALLOWED_METHODS
+
+DEFAULT_PAGE_SIZE = int(os.getenv("STRAPI_PAGE_SIZE", "100"))
+
+# Fields the scripts actually read from each collection
+AUTHOR_FIELDS = ["name", "slug", "email", "bio", "role", "expertise"]
+TAXONOMY_FIELDS = ["name", "slug", "description"]
+
+# Collections whose custom find controller reads ?page=&pageSize= instead of
+# the standard pagination[page]/pagination[pageSize] (see
+# cms/src/api/article/controllers/article.js)
+CUSTOM_PAGINATION = {
+    "articles": ("page", "pageSize"),
+    "articles/content": ("page", "pageSize"),
+}
+
+
+def collection_page_params(
+    collection, page, page_size, fields=None, populate=None, params=None
+):
+    """Query params for one page of a collection, restricted to fields/populate"""
+    page_key, size_key = CUSTOM_PAGINATION.get(
+        collection, ("pagination[page]", "pagination[pageSize]")
+    )
+    query = dict(params or {})
+    query[page_key] = page
+    query[size_key] = page_size
+    for i, field in enumerate(fields or []):
+        query[f"fields[{i}]"] = field
+    if isinstance(populate, str):
+        query["populate"] = populate
+    else:
+        for i, relation in enumerate(populate or []):
+            query[f"populate[{i}]"] = relation
+    return query
+
+
+def api_route(path):
+    """An API path without query string and with IDs replaced by {id}
+
+    Used to group requests in traces and metrics, e.g. "/articles/{id}".
+    """
+    return re.sub(r"/\d+(?=/|$)", "/{id}", "/" + path.split("?")[0].lstrip("/"))
+
+
+def has_next_page(body, page, page_size, received):
+    """Whether another page follows, from meta.pagination or the page length"""
+    pagination = (body.get("meta") or {}).get("pagination") or {}
+    if "pageCount" in pagination:
+        return page < pagination["pageCount"]
+    return received >= page_size
+
+
+def should_retry(method, status_code, has_retry_after=False):
+    """Whether a response is worth retrying for this request method
+
+    A POST may already have been applied when a 5xx comes back (a 502/504
+    from a proxy after Strapi committed), so it is only retried when the
+    request was turned away: 429, or 503 with Retry-After.
+    """
+    if method.upper() in IDEMPOTENT_METHODS:
+        return status_code in RETRY_STATUS_CODES
+    return status_code == 429 or (status_code == 503 and has_retry_after)
+
+
+class WriteSafeRetry(Retry):
+    """urllib3 Retry that follows should_retry()
+
+    Read errors are only retried for idempotent methods and connect errors
+    for every method (the request never reached Strapi), as in Retry itself.
+    """
+
+    def is_retry(self, method, status_code, has_retry_after=False):
+        return should_retry(
+            method, status_code, has_retry_after and self.respect_retry_after_header
+        )
+
+
+class StrapiClient:
+    """Pooled Strapi REST client with timeouts and retries"""
+
+    def __init__(
+        self,
+        api_url,
+        api_token,
+        pool_size=DEFAULT_POOL_SIZE,
+        timeout=(DEFAULT_CONNECT_TIMEOUT, DEFAULT_READ_TIMEOUT),
+        max_retries=DEFAULT_MAX_RETRIES,
+        backoff_factor=DEFAULT_BACKOFF_FACTOR,
+    ):
+        self.api_url = (api_url or "").rstrip("/")
+        self.timeout = timeout
+        self.pool_size = pool_size
+
+        retry = WriteSafeRetry(
+            total=max_retries,
+            connect=max_retries,
+            read=max_retries,
+            status=max_retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=RETRY_STATUS_CODES,
+            allowed_methods=IDEMPOTENT_METHODS,
+            respect_retry_after_header=True,
+            # Hand the last response back to the caller instead of raising
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(
+            pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry
+        )
+
+        self.session = requests.Session()
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers.update({"Authorization": f"Bearer {api_token}"})
+
+    def url(self, path):
+        """Build the full URL for an API path such as "/articles" """
+        return f"{self.api_url}/{path.lstrip('/')}"
+
+    def request(self, method, path, **kwargs):
+        """Send a request through the pooled session"""
+        kwargs.setdefault("timeout", self.timeout)
+        route = api_route(path)
+        started = time.perf_counter()
+        response = None
+        with http_span(method, route, path) as current:
+            try:
+                response = self.session.request(method, self.url(path), **kwargs)
+            finally:
+                observe_request(method, route, started, response)
+            record_http(current, response)
+        return response
+
+    def get(self, path, **kwargs):
+        return self.request("GET", path, **kwargs)
+
+    def post(self, path, **kwargs):
+        return self.request("POST", path, **kwargs)
+
+    def put(self, path, **kwargs):
+        return self.request("PUT", path, **kwargs)
+
+    def delete(self, path, **kwargs):
+        return self.request("DELETE", path, **kwargs)
+
+    def iter_collection(
+        self,
+        collection,
+        fields=None,
+        populate=None,
+        params=None,
+        page_size=DEFAULT_PAGE_SIZE,
+    ):
+        """Yield every entry of a collection, fetching one page at a time
+
+        Only the requested fields and relations are returned; by default no
+        relations are populated. Raises requests.HTTPError on a failed page.
+        """
+        page = 1
+        while True:
+            response = self.get(
+                f"/{collection}",
+                params=collection_page_params(
+                    collection, page, page_size, fields, populate, params
+                ),
+            )
+            response.raise_for_status()
+            body = response.json()
+            entries = body.get("data") or []
+            yield from entries
+
+            if not entries or not has_next_page(body, page, page_size, len(entries)):
+                return
+            page += 1
+
+    def close(self):
+        self.session.close()
+
+
+# Payload builders shared by the sync and async Strapi operations
+
+
+def unique_slug(slug):
+    """Add a timestamp to a slug to make it unique"""
+    return f"{slug}-{int(time.time())}"
+
+
+def file_info_data(name=None, alt_text=None):
+    """Form data carrying the name and alternative text of an uploaded file"""
+    if not (name or alt_text):
+        return {}
+    file_info = {}
+    if name:
+        file_info["name"] = name
+    if alt_text:
+        file_info["alternativeText"] = alt_text
+    return {"fileInfo": json.dumps(file_info)}
+
+
+def upload_body(image, name=None, alt_text=None):
+    """Streaming /upload body for a PreparedImage (see image_pipeline.py)
+
+    Send it as data=body (requests) or content=body (httpx) with
+    headers=body.headers, and close it afterwards.
+    """
+    return MultipartBody(
+        fields=file_info_data(name, alt_text),
+        files={"files": (image.filename, image.source, image.mime_type)},
+    )
+
+
+def author_payload(author_data, profile_image_id=None):
+    """Build the /authors payload for a generated or entered author"""
+    payload = {
+        "data": {
+            "name": author_data["name"],
+            "slug": unique_slug(author_data["slug"]),
+            "email": author_data["email"],
+            "bio": author_data["bio"],
+            "role": author_data["role"],
+            "expertise": author_data["expertise"],
+            "socialLinks": author_data.get("socialLinks", []),
+        }
+    }
+
+    # Add profile picture if provided
+    if profile_image_id:
+        payload["data"]["profilePicture"] = profile_image_id
+
+    return payload
+
+
+def taxonomy_payload(taxonomy_data):
+    """Build the /categories or /tags payload for a category or tag"""
+    return {
+        "data": {
+            "name": taxonomy_data["name"],
+            "slug": unique_slug(taxonomy_data["slug"]),
+            "description": taxonomy_data["description"],
+        }
+    }
+
+
+def article_payload(
+    article_data, seo_data, author_id, category_ids, tag_ids, image_id=None
+):
+    """Build the /articles payload, filling in the dynamic SEO values"""
+    # Current date in ISO format
+    current_date = datetime.now().isoformat()
+
+    slug = unique_slug(article_data["slug"])
+
+    # Update structured data with dynamic values if it exists
+    if "structuredData" in seo_data:
+        seo_data["structuredData"]["datePublished"] = current_date
+        seo_data["structuredData"]["dateModified"] = current_date
+        seo_data["structuredData"]["headline"] = article_data["title"]
+        seo_data["structuredData"]["description"] = article_data["summary"]
+        if isinstance(seo_data["structuredData"].get("mainEntityOfPage"), dict):
+            seo_data["structuredData"]["mainEntityOfPage"]["@id"] = article_url(slug)
+
+    # Ensure metaSocial entries have the correct image ID
+    if "metaSocial" in seo_data and image_id:
+        for social in seo_data["metaSocial"]:
+            social["image"] = image_id
+
+    payload = {
+        "data": {
+            "title": article_data["title"],
+            "slug": slug,
+            "summary": article_data["summary"],
+            "content": article_data["content"],
+            "author": author_id,
+            "categories": category_ids,
+            "tags": tag_ids,
+            "readingTime": article_data.get(
+                "readingTime", len(article_data["content"].split()) // 200 + 1
+            ),
+            "publishDate": current_date,
+            "updateDate": current_date,
+            "featured": True,
+            "seo": seo_data,
+            "cta": article_data.get("ctas", []),
+            "references": article_data.get("references", []),
+        }
+    }
+
+    # Add featured image if provided
+    if image_id:
+        payload["data"]["featuredImage"] = image_id
+
+    return payload
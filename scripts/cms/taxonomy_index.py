@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+Local taxonomy index for categories and tags
+
+Keeps a persistent map of normalized name and slug -> Strapi ID so both
+scripts can resolve generated categories/tags in O(1) without downloading the
+whole collection on every upload.
+
+- Synced incrementally from Strapi using updatedAt (only changed entries)
+- Updated in place after every create
+- Shared by real_article.py, strapi_async.py and article_generator_app.py
+"""
+
+import os
+import re
+import threading
+import time
+
+import requests
+
+from local_store import cache_path, load_json, save_json
+
+# Minimum seconds between two incremental syncs of the same index
+SYNC_INTERVAL = float(os.getenv("TAXONOMY_SYNC_INTERVAL", "300"))
+
+# Only these fields are fetched when syncing
+INDEX_FIELDS = ["name", "slug", "updatedAt"]
+
+# Slugs created by these scripts get a "-<unix timestamp>" suffix
+TIMESTAMP_SUFFIX = re.compile(r"-\d{10}$")
+
+
+def normalize_name(name):
+    """Lowercase and collapse whitespace so "CI/CD  Tools" == "ci/cd tools" """
+    return " ".join((name or "").lower().split())
+
+
+def normalize_slug(slug):
+    """Lowercase and drop the uniqueness timestamp added by unique_slug()"""
+    return TIMESTAMP_SUFFIX.sub("", (slug or "").strip().lower())
+
+
+class TaxonomyIndex:
+    """Persistent name/slug -> ID index for one Strapi collection"""
+
+    def __init__(self, collection, path=None):
+        self.collection = collection
+        self.path = path or cache_path(f"taxonomy_{collection}.json")
+        self._lock = threading.RLock()
+        self._entries = {}
+        self._keys = {}
+        self.last_updated_at = None
+        self.last_synced = 0.0
+        self._load()
+
+    # Persistence
+
+    def _load(self):
+        data = load_json(self.path, {}) or {}
+        with self._lock:
+            for entry in data.get("entries", []):
+                self._put(entry)
+            self.last_updated_at = data.get("last_updated_at")
+
+    def _save(self, removed=None):
+        with self._lock:
+            # Merge with what other processes may have written since we loaded
+            on_disk = load_json(self.path, {}) or {}
+            for entry in on_disk.get("entries", []):
+                if str(entry["id"]) not in self._entries and entry["id"] != removed:
+                    self._put(entry)
+            if (on_disk.get("last_updated_at") or "") > (self.last_updated_at or ""):
+                self.last_updated_at = on_disk["last_updated_at"]
+
+            save_json(
+                self.path,
+                {
+                    "collection": self.collection,
+                    "last_updated_at": self.last_updated_at,
+                    "entries": list(self._entries.values()),
+                },
+            )
+
+    def _put(self, entry):
+        entry_id = str(entry["id"])
+        previous = self._entries.get(entry_id)
+        if previous:
+            # Drop the keys of the old name/slug if the entry was renamed
+            for key in self._keys_for(previous):
+                if self._keys.get(key) == previous["id"]:
+                    del self._keys[key]
+        self._entries[entry_id] = entry
+        for key in self._keys_for(entry):
+            self._keys[key] = entry["id"]
+
+    @staticmethod
+    def _keys_for(entry):
+        keys = []
+        if entry.get("name"):
+            keys.append("name:" + normalize_name(entry["name"]))
+        if entry.get("slug"):
+            keys.append("slug:" + normalize_slug(entry["slug"]))
+        return keys
+
+    # Lookups and updates
+
+    def lookup(self, name=None, slug=None):
+        """Return the ID of an entry matching the name or slug, or None"""
+        with self._lock:
+            if name:
+                entry_id = self._keys.get("name:" + normalize_name(name))
+                if entry_id is not None:
+                    return entry_id
+            if slug:
+                return self._keys.get("slug:" + normalize_slug(slug))
+            return None
+
+    def add(self, entry_id, name, slug, updated_at=None):
+        """Record an entry (e.g. right after creating it) and persist the index"""
+        with self._lock:
+            self._put(
+                {"id": entry_id, "name": name, "slug": slug, "updatedAt": updated_at}
+            )
+            self._save()
+
+    def remove(self, entry_id):
+        """Forget an entry, e.g. after it was deleted in Strapi"""
+        with self._lock:
+            entry = self._entries.pop(str(entry_id), None)
+            if entry:
+                for key in self._keys_for(entry):
+                    if self._keys.get(key) == entry["id"]:
+                        del self._keys[key]
+            self._save(removed=entry_id)
+
+    def apply_entries(self, entries):
+        """Merge Strapi entries ({"id", "attributes": {...}}) into the index"""
+        with self._lock:
+            for entry in entries:
+                attrs = entry.get("attributes", entry)
+                updated_at = attrs.get("updatedAt")
+                self._put(
+                    {
+                        "id": entry["id"],
+                        "name": attrs.get("name"),
+                        "slug": attrs.get("slug"),
+                        "updatedAt": updated_at,
+                    }
+                )
+                if updated_at and updated_at > (self.last_updated_at or ""):
+                    self.last_updated_at = updated_at
+            self.last_synced = time.time()
+            self._save()
+
+    # Syncing
+
+    def sync_params(self):
+        """Query params that fetch only entries changed since the last sync"""
+        params = {
+            # Include drafts: entries created through the API are not published
+            "publicationState": "preview",
+            "sort": "updatedAt:asc",
+        }
+        if self.last_updated_at:
+            params["filters[updatedAt][$gt]"] = self.last_updated_at
+        return params
+
+    def sync(self, strapi):
+        """Incrementally pull changed entries from Strapi, page by page"""
+        try:
+            entries = list(
+                strapi.iter_collection(
+                    self.collection, fields=INDEX_FIELDS, params=self.sync_params()
+                )
+            )
+        except requests.HTTPError as e:
+            print(f"⚠️ Failed to sync {self.collection} index: {e.response.status_code}")
+            return False
+        self.apply_entries(entries)
+        return True
+
+    def sync_if_stale(self, strapi, max_age=SYNC_INTERVAL):
+        """Sync unless the index was synced less than max_age seconds ago"""
+        if time.time() - self.last_synced < max_age:
+            return True
+        return self.sync(strapi)
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def get_taxonomy_index(collection):
+    """Return the process-wide index for "categories" or "tags" """
+    with _indexes_lock:
+        if collection not in _indexes:
+            _indexes[collection] = TaxonomyIndex(collection)
+        return _indexes[collection]
@@ -0,0 +1,7 @@
+import os
+import sys
+import tempfile
+
+# The modules are scripts in scripts/cms, and read CMS_CACHE_DIR on import
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ["CMS_CACHE_DIR"] = tempfile.mkdtemp(prefix="cms-tests-")
@@ -0,0 +1,78 @@
+from bulk_publisher import BulkPublisher, group_entries
+
+
+def entry(slug, content="Body"):
+    return {"slug": slug, "title": slug.title(), "content": content}
+
+
+class FakeResponse:
+    def __init__(self, status_code, body=None):
+        self.status_code = status_code
+        self.text = ""
+        self._body = body
+
+    def json(self):
+        return self._body
+
+
+class FakeStrapi:
+    """Answers /articles/bulk with the given response, recording requests"""
+
+    def __init__(self, response):
+        self.response = response
+        self.posted = []
+
+    def post(self, path, json=None):
+        self.posted.append((path, json))
+        return self.response
+
+
+def test_group_entries_splits_by_count():
+    entries = [(key, entry(f"article-{key}")) for key in range(5)]
+    groups = list(group_entries(entries, size=2, max_bytes=10**6))
+    assert [[key for key, _ in group] for group in groups] == [[0, 1], [2, 3], [4]]
+
+
+def test_group_entries_splits_by_size_and_sends_oversized_alone():
+    entries = [
+        (0, entry("small")),
+        (1, entry("large", "x" * 500)),
+        (2, entry("small-again")),
+    ]
+    groups = list(group_entries(entries, size=10, max_bytes=200))
+    assert [[key for key, _ in group] for group in groups] == [[0], [1], [2]]
+
+
+def test_results_follow_the_order_sent():
+    group = [("a", entry("first")), ("b", entry("second"))]
+    strapi = FakeStrapi(
+        FakeResponse(200, {"data": [{"id": 11}, {"id": 12}], "meta": {}})
+    )
+    publisher = BulkPublisher(strapi, size=10)
+    for key, data in group:
+        publisher._pending.append((key, data))
+    assert publisher.flush() == [("a", 11), ("b", 12)]
+    assert [article["slug"] for article in strapi.posted[0][1]["data"]] == [
+        "first",
+        "second",
+    ]
+
+
+def test_count_mismatch_keeps_the_created_articles():
+    group = [("a", entry("first")), ("b", entry("second")), ("c", entry("third"))]
+    strapi = FakeStrapi(
+        FakeResponse(
+            200,
+            {
+                "data": [{"id": 23, "slug": "third"}, {"id": 21, "slug": "first"}],
+                "meta": {"created": {}},
+            },
+        )
+    )
+    assert BulkPublisher(strapi)._post(group) == [21, None, 23]
+
+
+def test_rejected_group_fails_every_article():
+    group = [("a", entry("first")), ("b", entry("second"))]
+    strapi = FakeStrapi(FakeResponse(400, {"error": "invalid"}))
+    assert BulkPublisher(strapi)._post(group) == [None, None]
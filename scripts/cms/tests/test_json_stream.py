@@ -0,0 +1,67 @@
+import json
+
+import pytest
+
+from json_stream import IncrementalJSONExtractor, JSONStreamError, extract_json
+
+ARTICLE = {
+    "article": {
+        "title": 'Selenium "Grid" — Tips',
+        "content": '## Setup\n\n```json\n{"a": 1}\n```\n\\ done',
+        "references": [
+            {"title": "Docs", "url": "https://www.selenium.dev"},
+            {"title": "Bugninja", "url": "https://www.bugninja.ai"},
+        ],
+    },
+    "tags": [[1, 2.5e3], [], {}, True, None],
+}
+
+
+def feed(text, chunk_size, on_value=None):
+    parser = IncrementalJSONExtractor(on_value)
+    for i in range(0, len(text), chunk_size):
+        parser.feed(text[i : i + chunk_size])
+    return parser
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 7, 1000])
+def test_parses_any_chunking(chunk_size):
+    text = "Here you go:\n```json\n" + json.dumps(ARTICLE, indent=2) + "\n```"
+    assert feed(text, chunk_size).result() == ARTICLE
+
+
+def test_reports_paths_of_completed_values():
+    paths = []
+    feed(json.dumps(ARTICLE), 1, lambda path, value: paths.append(path))
+    assert ("article", "title") in paths
+    assert ("article", "references", 0, "url") in paths
+    assert ("article", "references", 1, "title") in paths
+    assert ("article", "references", 1) in paths
+    assert ("tags", 0, 1) in paths
+    assert ("tags", 4) in paths
+    assert paths[-1] == ()
+
+
+def test_value_at_inside_list_elements_while_streaming():
+    parser = feed('{"a": [{"n": "first"}, {"n": "sec', 1)
+    assert parser.value_at(("a", 0, "n")) == "first"
+    assert parser.value_at(("a", 1, "n")) == "sec"
+    assert parser.value_at(("a", 2, "n")) is None
+
+
+def test_value_at_decodes_partial_escapes():
+    parser = feed('{"content": "line\\nnext \\u00e', 1)
+    assert parser.value_at(("content",)) == "line\nnext "
+
+
+def test_ignores_text_after_the_object():
+    assert extract_json('{"a": "`x`"}\n```\nThanks!') == {"a": "`x`"}
+
+
+@pytest.mark.parametrize(
+    "text",
+    ['{"a": 1', '{"a": [1, 2}', '{"a" 1}', "no json here", '{"a": tru}'],
+)
+def test_incomplete_or_invalid_json_raises(text):
+    with pytest.raises(JSONStreamError):
+        feed(text, 3).result()
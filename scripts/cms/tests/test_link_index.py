@@ -0,0 +1,67 @@
+from link_index import LinkIndex, fix_links, links_prompt
+
+
+class FakeCorpus:
+    generation = 1
+
+    def __init__(self, articles):
+        self.articles = articles
+
+    def changed_since(self, seq):
+        return [article for article in self.articles if article["seq"] > seq]
+
+
+def article(article_id, slug, title, keywords="", content=""):
+    return {
+        "id": article_id,
+        "slug": slug,
+        "title": title,
+        "keywords": keywords,
+        "content": content,
+        "seq": article_id,
+    }
+
+
+ARTICLES = [
+    article(1, "visual-regression", "Visual regression testing", "screenshots"),
+    article(2, "flaky-tests", "Fixing flaky tests", "retries, waits"),
+    article(3, "ci-pipelines", "Tests in CI pipelines", content="## Visual checks"),
+]
+CONTENT = (
+    "See [visual tests](https://bugninja.ai/blog/visual-regression) and "
+    '[made up](https://bugninja.ai/blog/made-up-post "Title"), '
+    "[elsewhere](https://example.com/blog/x)."
+)
+
+
+def make_index(articles):
+    index = LinkIndex(FakeCorpus(articles))
+    index.refresh()
+    return index
+
+
+def test_suggest_ranks_by_shared_words():
+    index = make_index(ARTICLES)
+    suggestions = index.suggest("Visual regression testing in CI")
+    assert [s.slug for s in suggestions][:2] == ["visual-regression", "ci-pipelines"]
+    assert index.suggest("Visual regression", exclude={1})[0].slug == "ci-pipelines"
+    assert "https://bugninja.ai/blog/flaky-tests" in links_prompt(
+        index.suggest("flaky retries")
+    )
+
+
+def test_fix_links_unlinks_unpublished_slugs():
+    content, linked, removed, unchecked = fix_links(CONTENT, make_index(ARTICLES))
+    assert linked == ["visual-regression"]
+    assert removed == ["made-up-post"]
+    assert unchecked == []
+    assert "made up," in content
+    assert "https://bugninja.ai/blog/visual-regression" in content
+    assert "https://example.com/blog/x" in content
+
+
+def test_fix_links_keeps_links_when_nothing_is_indexed():
+    content, linked, removed, unchecked = fix_links(CONTENT, make_index([]))
+    assert content == CONTENT
+    assert (linked, removed) == ([], [])
+    assert unchecked == ["visual-regression", "made-up-post"]
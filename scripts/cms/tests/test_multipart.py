@@ -0,0 +1,101 @@
+import asyncio
+import io
+
+import pytest
+from urllib3 import encode_multipart_formdata
+
+from multipart import MultipartBody
+
+IMAGE = bytes(range(256)) * 1000
+
+
+@pytest.fixture
+def image_path(tmp_path):
+    path = tmp_path / "image.png"
+    path.write_bytes(IMAGE)
+    return path
+
+
+def make_body(image_path, chunk_size=1000):
+    fileobj = io.BytesIO(b"skipped" + IMAGE)
+    fileobj.seek(len(b"skipped"))
+    return MultipartBody(
+        fields={"data": '{"caption": "Ünïcode \\"quoted\\""}'},
+        files={
+            "files": ("image.png", image_path, "image/png"),
+            "copy": ("copy.png", fileobj, "image/png"),
+            "raw": ("raw.bin", b"raw bytes", "application/octet-stream"),
+        },
+        chunk_size=chunk_size,
+    )
+
+
+def expected(body):
+    encoded, _ = encode_multipart_formdata(
+        {
+            "data": '{"caption": "Ünïcode \\"quoted\\""}',
+            "files": ("image.png", IMAGE, "image/png"),
+            "copy": ("copy.png", IMAGE, "image/png"),
+            "raw": ("raw.bin", b"raw bytes", "application/octet-stream"),
+        },
+        boundary=body.boundary,
+    )
+    return encoded
+
+
+def test_body_matches_urllib3_encoding(image_path):
+    body = make_body(image_path)
+    data = body.read()
+    assert data == expected(body)
+    assert len(body) == len(data) == int(body.headers["Content-Length"])
+    assert body.headers["Content-Type"] == body.content_type
+    assert body.read() == b""
+
+
+def test_chunked_reads_and_file_handles(image_path):
+    body = make_body(image_path)
+    chunks = []
+    while chunk := body.read(777):
+        chunks.append(chunk)
+        assert len(chunk) <= 777
+    assert b"".join(chunks) == expected(body)
+    # The path's file is closed as soon as it has been read
+    assert body._open_file is None
+
+
+def test_seek_and_tell_rewind_for_retries(image_path):
+    body = make_body(image_path)
+    data = expected(body)
+    body.read(5000)
+    assert body.tell() == 5000
+
+    assert body.seek(0) == 0
+    assert body.read() == data
+    assert body.seek(-100, io.SEEK_END) == len(data) - 100
+    assert body.read() == data[-100:]
+    body.seek(1234)
+    assert body.seek(10, io.SEEK_CUR) == 1244
+    assert body.read(50) == data[1244:1294]
+    assert body.seek(-1) == 0
+    assert body.seek(len(data) + 10) == len(data)
+    body.close()
+    assert body._open_file is None
+
+
+def test_async_iteration_starts_over(image_path):
+    body = make_body(image_path, chunk_size=4096)
+
+    async def collect():
+        return [chunk async for chunk in body]
+
+    first = asyncio.run(collect())
+    assert all(len(chunk) <= 4096 for chunk in first)
+    assert b"".join(first) == expected(body)
+    assert b"".join(asyncio.run(collect())) == expected(body)
+
+
+def test_file_that_shrinks_while_uploading_fails(image_path):
+    body = make_body(image_path)
+    image_path.write_bytes(IMAGE[:10])
+    with pytest.raises(OSError):
+        body.read()
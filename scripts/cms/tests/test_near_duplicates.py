@@ -0,0 +1,103 @@
+import os
+
+from near_duplicates import (
+    NearDuplicateIndex,
+    containment,
+    content_shingles,
+    signature,
+    similarity,
+    title_terms,
+)
+
+BRIEF = os.path.join(
+    os.path.dirname(os.path.dirname(__file__)), "SELENIUM_VS_BUGNINJA.md"
+)
+
+
+class FakeCorpus:
+    def __init__(self, articles):
+        self.generation = 1
+        self.articles = articles
+
+    def changed_since(self, seq):
+        return [article for article in self.articles if article["seq"] > seq]
+
+
+def article(article_id, title, content=""):
+    return {
+        "id": article_id,
+        "slug": f"article-{article_id}",
+        "title": title,
+        "content": content or f"{title} body text",
+        "seq": article_id,
+    }
+
+
+def make_index(tmp_path, articles):
+    index = NearDuplicateIndex(FakeCorpus(articles), str(tmp_path / "nd.sqlite3"))
+    index.refresh()
+    return index
+
+
+def test_title_terms_drop_stopwords_and_stem():
+    assert title_terms("The Ultimate Guide to Testing Tests") == {"test"}
+    assert title_terms("Playwright vs Selenium") == {"playwright", "selenium"}
+
+
+def test_containment_is_relative_to_the_title():
+    title = title_terms("Bugninja vs Selenium")
+    assert containment(title, title_terms("Selenium and Bugninja compared")) == 1.0
+    assert containment(title, title_terms("Selenium grid")) == 0.5
+    assert containment(frozenset(), title) == 0.0
+
+
+def test_whole_brief_matches_similar_titles(tmp_path):
+    index = make_index(
+        tmp_path,
+        [
+            article(1, "Bugninja vs Selenium"),
+            article(2, "Kubernetes Monitoring Guide"),
+            article(3, "Selenium vs Bugninja: Self-Healing AI Tests"),
+        ],
+    )
+    with open(BRIEF) as f:
+        matches = index.similar_topics(f.read())
+    assert [match.id for match in matches] == [1, 3]
+    assert matches[0].similarity == 1.0
+
+
+def test_similar_topics_excludes_and_thresholds(tmp_path):
+    index = make_index(
+        tmp_path, [article(1, "Playwright vs Cypress"), article(2, "Cypress Tips")]
+    )
+    assert [m.id for m in index.similar_topics("Cypress and Playwright")] == [1, 2]
+    assert [m.id for m in index.similar_topics("Cypress", exclude=1)] == [2]
+    assert index.similar_topics("Playwright", threshold=0.6) == []
+
+
+def test_similar_articles_by_content(tmp_path):
+    body = " ".join(f"word{i}" for i in range(300))
+    index = make_index(
+        tmp_path,
+        [article(1, "One", body), article(2, "Two", "something else entirely " * 50)],
+    )
+    edited = body.replace("word150", "changed")
+    assert [m.id for m in index.similar_articles(edited)] == [1]
+    assert index.duplicate_pairs() == []
+
+
+def test_signature_estimates_jaccard():
+    a = content_shingles(" ".join(f"w{i}" for i in range(400)))
+    b = content_shingles(" ".join(f"w{i}" for i in range(200, 600)))
+    assert signature(set()) is None
+    assert abs(similarity(signature(a), signature(b)) - 1 / 3) < 0.15
+
+
+def test_index_is_reloaded_from_disk(tmp_path):
+    corpus = FakeCorpus([article(1, "Playwright vs Cypress")])
+    NearDuplicateIndex(corpus, str(tmp_path / "nd.sqlite3")).refresh()
+
+    reloaded = NearDuplicateIndex(corpus, str(tmp_path / "nd.sqlite3"))
+    assert reloaded.refresh() == 0
+    assert len(reloaded) == 1
+    assert [m.id for m in reloaded.similar_topics("Cypress vs Playwright")] == [1]
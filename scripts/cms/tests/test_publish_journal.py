@@ -0,0 +1,139 @@
+import pytest
+
+from publish_journal import (
+    IN_PROGRESS,
+    PUBLISHED,
+    ROLLED_BACK,
+    PublishJournal,
+    publish_key,
+)
+
+CONTENT = {
+    "article": {"title": "Title", "slug": "title", "content": "Body"},
+    "seo": {"metaTitle": "Title"},
+    "categories": [{"name": "Testing"}],
+    "tags": [{"name": "Selenium"}],
+}
+AUTHOR = {"id": 3, "name": "Author"}
+
+
+class FakeResponse:
+    def __init__(self, status_code, data=None):
+        self.status_code = status_code
+        self.text = ""
+        self._data = data
+
+    def json(self):
+        return {"data": self._data}
+
+    def raise_for_status(self):
+        pass
+
+
+class FakeStrapi:
+    """Records deletes; references maps (collection, id) to usage counts"""
+
+    def __init__(self, references=None, failing=()):
+        self.references = references or {}
+        self.failing = set(failing)
+        self.deleted = []
+
+    def get(self, path, params=None):
+        key = (params["collection"], params["id"])
+        return FakeResponse(200, self.references.get(key, {"articles": 0}))
+
+    def delete(self, path):
+        if path in self.failing:
+            return FakeResponse(500)
+        self.deleted.append(path)
+        return FakeResponse(204)
+
+
+@pytest.fixture
+def journal(tmp_path):
+    return PublishJournal(str(tmp_path / "journal.sqlite3"))
+
+
+def test_publish_key_covers_what_the_upload_reads():
+    key = publish_key(CONTENT, AUTHOR, "digest")
+    assert key == publish_key(dict(CONTENT, seo={"other": 1}), AUTHOR, "digest")
+    assert key == publish_key(
+        dict(CONTENT, upload={"image_path": "x"}), AUTHOR, "digest"
+    )
+    assert key != publish_key(CONTENT, {"id": 4}, "digest")
+    assert key != publish_key(CONTENT, AUTHOR, "other")
+    assert key != publish_key(dict(CONTENT, tags=[]), AUTHOR, "digest")
+
+
+def test_steps_resume_and_finish(journal):
+    run = journal.start("key1", "Title")
+    calls = []
+
+    def create():
+        calls.append(1)
+        return 10, True
+
+    assert run.step("image", "media", create) == 10
+    assert run.step("image", "media", create) == 10
+    assert calls == [1]
+    # A failed step (no ID) runs again next time
+    assert run.step("article", "articles", lambda: (None, False)) is None
+    assert run.get("article") is None
+    assert run.status == IN_PROGRESS
+
+    run.finish()
+    assert journal.start("key1").status == PUBLISHED
+    assert journal.runs(status=PUBLISHED)[0]["title"] == "Title"
+
+
+def test_find_by_prefix(journal):
+    journal.start("abc123")
+    journal.start("abd456")
+    assert journal.find("abc") == "abc123"
+    with pytest.raises(KeyError):
+        journal.find("ab")
+    with pytest.raises(KeyError):
+        journal.find("zz")
+
+
+def test_rollback_deletes_only_what_the_run_created(journal):
+    run = journal.start("key1")
+    run.record("author", "authors", 5, created=False)
+    run.record("image", "media", 10, created=True)
+    run.record("category:testing", "categories", 11, created=True)
+    run.record("article", "articles", 12, created=True)
+    strapi = FakeStrapi(references={("categories", 11): {"articles": 2}})
+
+    assert journal.rollback("key1", strapi)
+    assert sorted(strapi.deleted) == ["/articles/12", "/upload/files/10"]
+    assert journal.run_status("key1") == ROLLED_BACK
+    assert journal.start("key1").get("image") is None
+
+
+def test_rollback_hands_shared_entities_to_the_other_run(journal):
+    journal.start("key1").record("tag:selenium", "tags", 20, created=True)
+    journal.start("key2").record("tag:selenium", "tags", 20, created=False)
+    strapi = FakeStrapi()
+
+    assert journal.rollback("key1", strapi)
+    assert strapi.deleted == []
+    assert journal.rollback("key2", strapi)
+    assert strapi.deleted == ["/tags/20"]
+
+
+def test_failed_delete_can_be_retried(journal):
+    journal.start("key1").record("image", "media", 10, created=True)
+
+    assert not journal.rollback("key1", FakeStrapi(failing={"/upload/files/10"}))
+    assert journal.run_status("key1") == IN_PROGRESS
+    strapi = FakeStrapi()
+    assert journal.rollback("key1", strapi)
+    assert strapi.deleted == ["/upload/files/10"]
+
+
+def test_published_run_is_not_rolled_back(journal):
+    run = journal.start("key1")
+    run.record("article", "articles", 12, created=True)
+    run.finish()
+    with pytest.raises(ValueError):
+        journal.rollback("key1", FakeStrapi())
@@ -0,0 +1,69 @@
+import pytest
+
+from seo_rules import ContentChecker, check_content, parse_headings
+
+CONTENT = """## Why selenium tests break
+
+Selenium tests break when the UI changes. Self-healing tests don't: self healing
+keeps testing cheap. AI helps, and ai-test tools use AI.
+
+```python
+# not a heading
+```
+
+#### Skipped a level
+# An H1
+"""
+KEYWORDS = "test, self healing, selenium, AI, ai-test"
+
+
+def feed_in_chunks(size, keywords_late=False):
+    checker = ContentChecker(None if keywords_late else KEYWORDS)
+    for i in range(0, len(CONTENT), size):
+        checker.feed(CONTENT[i : i + size])
+        if keywords_late and i >= len(CONTENT) // 2 and not checker.keywords:
+            checker.set_keywords(KEYWORDS)
+    checker.finish()
+    return checker
+
+
+def test_counts_whole_words_only():
+    checker = check_content(CONTENT, KEYWORDS)
+    # "tests" and "testing" aren't "test", but the "test" of "ai-test" is
+    assert checker.keyword_counts == {
+        "test": 1,
+        "self healing": 1,
+        "selenium": 2,
+        "AI": 3,
+        "ai-test": 1,
+    }
+
+
+def test_headings_skip_fenced_code():
+    assert [(h.level, h.text) for h in parse_headings(CONTENT)] == [
+        (2, "Why selenium tests break"),
+        (4, "Skipped a level"),
+        (1, "An H1"),
+    ]
+    rules = {v.rule for v in check_content(CONTENT, KEYWORDS).violations}
+    assert {"no-h1", "heading-skip", "keyword-occurrences"} <= rules
+
+
+@pytest.mark.parametrize("size", [1, 2, 5, 64])
+@pytest.mark.parametrize("keywords_late", [False, True])
+def test_chunked_feeding_matches_one_pass(size, keywords_late):
+    whole = check_content(CONTENT, KEYWORDS)
+    checker = feed_in_chunks(size, keywords_late)
+    assert checker.violations == whole.violations
+    assert checker.keyword_counts == whole.keyword_counts
+    assert checker.words == whole.words
+    assert checker.text == CONTENT
+
+
+def test_update_feeds_only_the_new_part():
+    checker = ContentChecker(KEYWORDS)
+    for end in range(0, len(CONTENT) + 1, 7):
+        checker.update(CONTENT[:end])
+    checker.update(CONTENT)
+    checker.finish()
+    assert checker.keyword_counts == check_content(CONTENT, KEYWORDS).keyword_counts
@@ -0,0 +1,377 @@
+#!/usr/bin/env python3
+"""
+Lightweight tracing for the generation and publish pipeline
+
+The emoji progress lines don't say where a slow publish spends its time.
+With tracing on, the pipeline records nested spans:
+
+- generate_seo_content (with its parse step) and every LLM completion, with
+  token usage, time to first token, retries and whether it came from cache
+- upload_to_strapi and its steps (upload_image, create_author,
+  create_category, create_tag, create_article)
+- every Strapi HTTP request, with method, path, status and body sizes.
+  Bytes and request counts are added up on every enclosing span too, so
+  the upload_to_strapi span shows the total sent and received.
+
+Spans are exported as they finish, as JSON lines (TRACE_EXPORT=jsonl, to
+TRACE_FILE) and/or OTLP/HTTP JSON to a local collector (TRACE_EXPORT=otlp,
+to OTEL_EXPORTER_OTLP_ENDPOINT). With tracing off, span() costs next to
+nothing. Summarize a JSON lines file per span name with:
+
+    python tracing.py .cache/traces.jsonl
+"""
+
+import atexit
+import contextvars
+import functools
+import inspect
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+import requests
+
+from local_store import cache_path
+
+# Comma-separated exporters: "jsonl", "otlp" (empty: tracing off)
+TRACE_EXPORT = os.getenv("TRACE_EXPORT", "")
+TRACE_FILE = os.getenv("TRACE_FILE")
+OTLP_ENDPOINT = os.getenv("OTEL_EXPORTER_OTLP_TRACES_ENDPOINT") or (
+    os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT", "http://localhost:4318").rstrip("/")
+    + "/v1/traces"
+)
+SERVICE_NAME = os.getenv("OTEL_SERVICE_NAME", "cms-article-pipeline")
+# Spans are sent to the collector in batches, at least this often
+OTLP_FLUSH_SECONDS = float(os.getenv("OTLP_FLUSH_SECONDS", "5"))
+OTLP_BATCH_SIZE = 256
+
+EXPORTERS = ("jsonl", "otlp")
+
+_current = contextvars.ContextVar("trace_span", default=None)
+# Guards the counters of spans that child spans in other threads add to
+_counter_lock = threading.Lock()
+_exporters = []
+
+
+class Span:
+    """One timed operation; attributes are OpenTelemetry-style key/values"""
+
+    def __init__(self, name, parent=None, attributes=None):
+        self.name = name
+        self.parent = parent
+        self.trace_id = parent.trace_id if parent else os.urandom(16).hex()
+        self.span_id = os.urandom(8).hex()
+        self.attributes = {}
+        self.set(attributes or {})
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self.error = None
+
+    def set(self, attributes=None, **more):
+        """Set attributes; None values are skipped"""
+        for key, value in {**(attributes or {}), **more}.items():
+            if value is not None:
+                self.attributes[key] = value
+
+    def add(self, key, amount, propagate=False):
+        """Add to a counter attribute, and with propagate to every ancestor's"""
+        span = self
+        with _counter_lock:
+            while span is not None:
+                span.attributes[key] = span.attributes.get(key, 0) + amount
+                span = span.parent if propagate else None
+
+    @property
+    def duration(self):
+        return ((self.end_ns or time.time_ns()) - self.start_ns) / 1e9
+
+    def to_dict(self):
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent.span_id if self.parent else None,
+            "name": self.name,
+            "start_ns": self.start_ns,
+            "end_ns": self.end_ns,
+            "duration_ms": round(self.duration * 1000, 3),
+            "status": "error" if self.error else "ok",
+            "error": self.error,
+            "attributes": self.attributes,
+        }
+
+
+class _NoopSpan:
+    """Stands in for a span while tracing is off"""
+
+    def set(self, attributes=None, **more):
+        pass
+
+    def add(self, key, amount, propagate=False):
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+def enabled():
+    return bool(_exporters)
+
+
+def current_span():
+    """The innermost open span of this thread/task, or a no-op span"""
+    return _current.get() or NOOP_SPAN
+
+
+@contextmanager
+def span(name, attributes=None, **more):
+    """Time the block as a child of the current span
+
+    An exception marks the span as failed and is re-raised.
+    """
+    if not _exporters:
+        yield NOOP_SPAN
+        return
+
+    current = Span(name, _current.get(), {**(attributes or {}), **more})
+    token = _current.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        current.end_ns = time.time_ns()
+        _current.reset(token)
+        for exporter in _exporters:
+            exporter.export(current)
+
+
+def traced(name=None):
+    """Decorator running a function (or coroutine function) in a span"""
+
+    def decorate(func):
+        span_name = name or func.__name__
+
+        if inspect.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with span(span_name):
+                    return await func(*args, **kwargs)
+
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(span_name):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorate
+
+
+def http_span(method, route, path):
+    """Span for one HTTP request, named by method and route
+
+    e.g. "PUT /articles/{id}", so requests to different entries group together.
+    """
+    return span(f"{method} {route}", {"http.request.method": method, "url.path": path})
+
+
+def record_http(current, response):
+    """Record a requests/httpx response on its span and its ancestors"""
+    if current is NOOP_SPAN:
+        return
+    sent = int(response.request.headers.get("Content-Length") or 0)
+    received = len(response.content)
+    current.set(
+        {
+            "http.response.status_code": response.status_code,
+            "http.request.body.size": sent,
+            "http.response.body.size": received,
+        }
+    )
+    if current.parent is not None:
+        current.parent.add("http.requests", 1, propagate=True)
+        current.parent.add("http.bytes_sent", sent, propagate=True)
+        current.parent.add("http.bytes_received", received, propagate=True)
+
+
+# Exporters
+
+
+class JSONLinesExporter:
+    """Appends every finished span as one JSON line"""
+
+    def __init__(self, path=None):
+        self.path = path or TRACE_FILE or cache_path("traces.jsonl")
+        self._lock = threading.Lock()
+
+    def export(self, finished):
+        line = json.dumps(finished.to_dict(), default=str)
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+
+    def flush(self):
+        pass
+
+
+def _otlp_value(value):
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def otlp_span(finished):
+    """A span in the OTLP/JSON encoding"""
+    encoded = {
+        "traceId": finished.trace_id,
+        "spanId": finished.span_id,
+        "name": finished.name,
+        "kind": 1,
+        "startTimeUnixNano": str(finished.start_ns),
+        "endTimeUnixNano": str(finished.end_ns),
+        "attributes": [
+            {"key": key, "value": _otlp_value(value)}
+            for key, value in finished.attributes.items()
+        ],
+        "status": (
+            {"code": 2, "message": finished.error} if finished.error else {"code": 1}
+        ),
+    }
+    if finished.parent is not None:
+        encoded["parentSpanId"] = finished.parent.span_id
+    return encoded
+
+
+class OTLPExporter:
+    """Batches spans and POSTs them to an OTLP/HTTP collector in the background
+
+    A collector that is down costs a warning, never a failed publish.
+    """
+
+    def __init__(self, endpoint=None, flush_seconds=OTLP_FLUSH_SECONDS):
+        self.endpoint = endpoint or OTLP_ENDPOINT
+        self.flush_seconds = flush_seconds
+        self._spans = []
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._warned = False
+        self._session = requests.Session()
+        threading.Thread(target=self._run, name="otlp-export", daemon=True).start()
+        atexit.register(self.flush)
+
+    def export(self, finished):
+        with self._lock:
+            self._spans.append(otlp_span(finished))
+            if len(self._spans) >= OTLP_BATCH_SIZE:
+                self._wake.set()
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.flush_seconds)
+            self._wake.clear()
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            spans, self._spans = self._spans, []
+        if not spans:
+            return
+        payload = {
+            "resourceSpans": [
+                {
+                    "resource": {
+                        "attributes": [
+                            {
+                                "key": "service.name",
+                                "value": {"stringValue": SERVICE_NAME},
+                            }
+                        ]
+                    },
+                    "scopeSpans": [{"scope": {"name": "cms.tracing"}, "spans": spans}],
+                }
+            ]
+        }
+        try:
+            response = self._session.post(self.endpoint, json=payload, timeout=5)
+            response.raise_for_status()
+        except requests.RequestException as e:
+            if not self._warned:
+                print(f"⚠️ Failed to export traces to {self.endpoint}: {e}")
+                self._warned = True
+
+
+def configure(export=None):
+    """Turn tracing on for the given exporters ("jsonl", "otlp" or both,
+    comma-separated); an empty value turns it off"""
+    for exporter in _exporters:
+        exporter.flush()
+    _exporters.clear()
+    for name in filter(None, (n.strip().lower() for n in (export or "").split(","))):
+        if name == "jsonl":
+            _exporters.append(JSONLinesExporter())
+        elif name == "otlp":
+            _exporters.append(OTLPExporter())
+        else:
+            raise ValueError(f"Unknown trace exporter: {name}")
+
+
+def flush():
+    """Send spans still waiting for the next OTLP batch"""
+    for exporter in _exporters:
+        exporter.flush()
+
+
+configure(TRACE_EXPORT)
+
+
+# Summary of a JSON lines trace file
+
+
+def _percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def summarize(path):
+    """Print count, total and p50/p95 duration and bytes per span name"""
+    durations = {}
+    sizes = {}
+    traces = set()
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            entry = json.loads(line)
+            traces.add(entry["trace_id"])
+            name = entry["name"]
+            durations.setdefault(name, []).append(entry["duration_ms"] / 1000)
+            attributes = entry["attributes"]
+            totals = sizes.setdefault(name, [0, 0])
+            if "http.request.body.size" in attributes:
+                totals[0] += attributes["http.request.body.size"]
+                totals[1] += attributes["http.response.body.size"]
+
+    print(f"📈 {len(traces)} traces in {path}\n")
+    print(
+        f"{'Span':<32} {'count':>6} {'total':>9} {'p50':>8} {'p95':>8} {'sent':>10} {'received':>10}"
+    )
+    for name, values in sorted(durations.items(), key=lambda item: -sum(item[1])):
+        sent, received = sizes[name]
+        print(
+            f"{name[:32]:<32} {len(values):>6} {sum(values):>8.2f}s "
+            f"{_percentile(values, 0.5):>7.2f}s {_percentile(values, 0.95):>7.2f}s "
+            f"{sent:>10} {received:>10}"
+        )
+
+
+if __name__ == "__main__":
+    summarize(sys.argv[1] if len(sys.argv) > 1 else cache_path("traces.jsonl"))